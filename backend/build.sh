@@ -8,3 +8,9 @@ python manage.py collectstatic --no-input
 
 # Run migrations
 python manage.py migrate
+
+# Build MongoDB task indexes
+python manage.py sync_task_indexes
+
+# Build the monthly analytics rollups (idempotent; repairs drift)
+python manage.py rebuild_monthly_stats
@@ -82,6 +82,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'config.wsgi.application'
+ASGI_APPLICATION = 'config.asgi.application'  # production entry point (uvicorn workers, see Procfile)
 
 # MongoDB Configuration - supports both URI and individual settings
 MONGODB_URI = os.getenv('MONGODB_URI', '')
@@ -98,6 +99,22 @@ else:
         'password': os.getenv('MONGODB_PASSWORD', ''),
     }
 
+# MongoDB client tuning, applied to both connection styles. Pools are per
+# process: total connections = gunicorn workers x MONGODB_MAX_POOL_SIZE
+MONGODB_SETTINGS.update({
+    'maxPoolSize': int(os.getenv('MONGODB_MAX_POOL_SIZE', 50)),
+    'minPoolSize': int(os.getenv('MONGODB_MIN_POOL_SIZE', 0)),
+    'maxIdleTimeMS': int(os.getenv('MONGODB_MAX_IDLE_TIME_MS', 300000)),
+    'waitQueueTimeoutMS': int(os.getenv('MONGODB_WAIT_QUEUE_TIMEOUT_MS', 5000)),  # fail fast when the pool is exhausted
+    'connectTimeoutMS': int(os.getenv('MONGODB_CONNECT_TIMEOUT_MS', 5000)),
+    'socketTimeoutMS': int(os.getenv('MONGODB_SOCKET_TIMEOUT_MS', 30000)),
+    'serverSelectionTimeoutMS': int(os.getenv('MONGODB_SERVER_SELECTION_TIMEOUT_MS', 5000)),
+    'compressors': os.getenv('MONGODB_COMPRESSORS', 'zstd,zlib'),  # snappy also needs python-snappy
+    'appname': os.getenv('MONGODB_APPNAME', 'task-manager'),
+    # e.g. secondaryPreferred to move analytics off the primary (may lag recent writes)
+    'analytics_read_preference': os.getenv('MONGODB_ANALYTICS_READ_PREFERENCE', 'primary'),
+})
+
 # Database - PostgreSQL for production, SQLite for development
 DATABASE_URL = os.getenv('DATABASE_URL', '')
 if DATABASE_URL:
@@ -154,7 +171,8 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 # REST Framework Configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # Builds request.user from token claims; no SQL query per request
+        'users.authentication.ClaimsJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -170,6 +188,23 @@ SIMPLE_JWT = {
     'ROTATE_REFRESH_TOKENS': True,
 }
 
+# Shared cache for token revocations (and TASK_LIST_CACHE_BACKEND='django').
+# Without it every worker has its own LocMemCache, and authentication falls
+# back to the user's is_active, re-read at most every AUTH_ACTIVE_CACHE_TTL
+REDIS_URL = os.getenv('REDIS_URL', '')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+
+# Claims-based authentication (users/authentication.py)
+AUTH_USER_CACHE_TTL = int(os.getenv('AUTH_USER_CACHE_TTL', 60))  # seconds a loaded User row is reused
+AUTH_REVOCATION_CACHE_ALIAS = os.getenv('AUTH_REVOCATION_CACHE_ALIAS', 'default')  # must be shared across workers
+AUTH_ACTIVE_CACHE_TTL = int(os.getenv('AUTH_ACTIVE_CACHE_TTL', 5))  # seconds is_active is reused without a shared cache
+
 # CORS Settings - Get from environment for deployment
 CORS_ALLOWED_ORIGINS_ENV = os.getenv('CORS_ALLOWED_ORIGINS', '')
 if CORS_ALLOWED_ORIGINS_ENV:
@@ -189,6 +224,62 @@ CORS_ALLOW_CREDENTIALS = True
 # OpenAI API Key
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY', '')
 
+# Background AI analysis worker pool
+AI_ANALYSIS_WORKERS = int(os.getenv('AI_ANALYSIS_WORKERS', 4))
+AI_ANALYSIS_QUEUE_SIZE = int(os.getenv('AI_ANALYSIS_QUEUE_SIZE', 256))
+AI_ANALYSIS_SUBMIT_TIMEOUT = float(os.getenv('AI_ANALYSIS_SUBMIT_TIMEOUT', 0.5))  # seconds to wait for a queue slot
+AI_ANALYSIS_SHUTDOWN_TIMEOUT = float(os.getenv('AI_ANALYSIS_SHUTDOWN_TIMEOUT', 30))  # seconds to drain on exit
+AI_ANALYSIS_JOB_STALE_SECONDS = int(os.getenv('AI_ANALYSIS_JOB_STALE_SECONDS', 300))  # in-flight reanalyze jobs older than this are retried
+
+# AI analysis result cache (in-process LRU + MongoDB collection with TTL)
+AI_ANALYSIS_CACHE_SIZE = int(os.getenv('AI_ANALYSIS_CACHE_SIZE', 2048))
+AI_ANALYSIS_CACHE_TTL = int(os.getenv('AI_ANALYSIS_CACHE_TTL', 30 * 24 * 3600))  # seconds
+AI_ANALYSIS_CACHE_PERSISTENT = os.getenv('AI_ANALYSIS_CACHE_PERSISTENT', 'True') == 'True'
+
+# Batched analysis: pending analyses within the window share one chat completion
+AI_ANALYSIS_BATCH_WINDOW_MS = int(os.getenv('AI_ANALYSIS_BATCH_WINDOW_MS', 50))
+AI_ANALYSIS_BATCH_MAX = int(os.getenv('AI_ANALYSIS_BATCH_MAX', 20))
+
+# WebSocket broadcast dispatcher (one background event loop per process)
+WS_BROADCAST_QUEUE_SIZE = int(os.getenv('WS_BROADCAST_QUEUE_SIZE', 10000))  # messages beyond this are dropped
+WS_BROADCAST_BATCH_SIZE = int(os.getenv('WS_BROADCAST_BATCH_SIZE', 100))
+WS_BROADCAST_SHUTDOWN_TIMEOUT = float(os.getenv('WS_BROADCAST_SHUTDOWN_TIMEOUT', 5))  # seconds to flush on exit
+WS_REPLAY_BUFFER_SIZE = int(os.getenv('WS_REPLAY_BUFFER_SIZE', 500))  # events kept per user for resume
+WS_REPLAY_TTL = int(os.getenv('WS_REPLAY_TTL', 24 * 3600))  # seconds
+WS_COALESCE_WINDOW_MS = int(os.getenv('WS_COALESCE_WINDOW_MS', 50))  # 0 sends every event immediately
+
+# WebSocket handshake authentication and admission control (tasks/ws_auth.py)
+WS_TICKET_LIFETIME = int(os.getenv('WS_TICKET_LIFETIME', 30))  # seconds
+# Deprecated: accept ?token=<access token> from clients that predate tickets
+WS_ALLOW_TOKEN_QUERY = os.getenv('WS_ALLOW_TOKEN_QUERY', 'False') == 'True'
+WS_MAX_CONNECTIONS = int(os.getenv('WS_MAX_CONNECTIONS', 10000))  # per process; 0 disables the cap
+WS_MAX_PENDING_HANDSHAKES = int(os.getenv('WS_MAX_PENDING_HANDSHAKES', 200))  # per process; 0 disables the cap
+WS_CONNECT_RATE_PER_IP = float(os.getenv('WS_CONNECT_RATE_PER_IP', 5))  # handshakes per second; 0 disables
+WS_CONNECT_BURST_PER_IP = int(os.getenv('WS_CONNECT_BURST_PER_IP', 20))
+WS_CONNECT_RATE_PER_USER = float(os.getenv('WS_CONNECT_RATE_PER_USER', 1))
+WS_CONNECT_BURST_PER_USER = int(os.getenv('WS_CONNECT_BURST_PER_USER', 5))
+# Behind the platform router every handshake comes from the router's address;
+# the client's is the last X-Forwarded-For entry. Set '' when serving directly
+WS_CLIENT_IP_HEADER = os.getenv('WS_CLIENT_IP_HEADER', '' if DEBUG else 'X-Forwarded-For')
+WS_TRUSTED_PROXY_COUNT = int(os.getenv('WS_TRUSTED_PROXY_COUNT', 1))  # proxies appending to that header
+
+# Bulk task endpoints
+TASK_BULK_MAX_ITEMS = int(os.getenv('TASK_BULK_MAX_ITEMS', 500))
+
+# Recurrence expansion (occurrences endpoint)
+RECURRENCE_CACHE_SIZE = int(os.getenv('RECURRENCE_CACHE_SIZE', 10000))  # (task version, month) expansions kept in memory
+RECURRENCE_MAX_RANGE_DAYS = int(os.getenv('RECURRENCE_MAX_RANGE_DAYS', 366))
+
+# Task listing cache: 'local' (in-process LRU, versions in MongoDB), 'django' (shared CACHES alias) or 'none'
+TASK_LIST_CACHE_BACKEND = os.getenv('TASK_LIST_CACHE_BACKEND', 'local')
+TASK_LIST_CACHE_ALIAS = os.getenv('TASK_LIST_CACHE_ALIAS', 'default')
+TASK_LIST_CACHE_SIZE = int(os.getenv('TASK_LIST_CACHE_SIZE', 1000))  # responses kept per process (local backend)
+TASK_LIST_CACHE_TTL = int(os.getenv('TASK_LIST_CACHE_TTL', 300))  # seconds
+
+# Local priority classifier (trained with `manage.py train_priority_model`)
+PRIORITY_MODEL_PATH = os.getenv('PRIORITY_MODEL_PATH', str(BASE_DIR / 'priority_model.npz'))
+PRIORITY_MODEL_MIN_CONFIDENCE = float(os.getenv('PRIORITY_MODEL_MIN_CONFIDENCE', 0.8))  # below this the LLM is asked
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -19,7 +19,8 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from tasks.views import TaskViewSet
-from users.views import register, profile
+from tasks import async_views
+from users.views import register, profile, ws_ticket
 
 # Create router and register viewsets
 router = DefaultRouter()
@@ -28,8 +29,15 @@ router.register(r'tasks', TaskViewSet, basename='task')
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include(router.urls)),
+    # Async (ASGI) variants of the task endpoints
+    path('api/async/tasks/', async_views.task_list, name='async-task-list'),
+    path('api/async/tasks/daily_tasks/', async_views.daily_tasks, name='async-task-daily-tasks'),
+    path('api/async/tasks/monthly_tasks/', async_views.monthly_tasks, name='async-task-monthly-tasks'),
+    path('api/async/tasks/analytics/', async_views.analytics, name='async-task-analytics'),
+    path('api/async/tasks/<str:pk>/', async_views.task_detail, name='async-task-detail'),
     path('api/auth/register/', register, name='register'),
     path('api/auth/login/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/auth/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('api/auth/profile/', profile, name='profile'),
+    path('api/auth/ws-ticket/', ws_ticket, name='ws_ticket'),
 ]
@@ -1,22 +1,59 @@
 import os
-from openai import OpenAI
+import json
+import threading
+from concurrent.futures import Future
+from asgiref.sync import sync_to_async
+from openai import AsyncOpenAI, OpenAI
 from django.conf import settings
 
+from .analysis_cache import analysis_cache, cache_key
+from .priority_model import get_priority_model
+
 client = OpenAI(api_key=settings.OPENAI_API_KEY or os.getenv('OPENAI_API_KEY', ''))
+async_client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY or os.getenv('OPENAI_API_KEY', ''))
 
+# Bump whenever the prompt or model changes so cached results are not reused
+PROMPT_VERSION = 'v1:gpt-3.5-turbo'
 
-def analyze_task(task_description: str) -> dict:
+SYSTEM_PROMPT = "You are a task prioritization assistant. Analyze tasks and provide urgency and importance ratings."
+
+
+def _parse_json_response(result_text: str):
+    """Strip optional markdown code fences and parse the JSON payload"""
+    result_text = result_text.strip()
+    if result_text.startswith('```json'):
+        result_text = result_text.replace('```json', '').replace('```', '').strip()
+    elif result_text.startswith('```'):
+        result_text = result_text.replace('```', '').strip()
+    return json.loads(result_text)
+
+
+def _local_predictions(task_descriptions: list) -> list:
     """
-    Analyze task description using OpenAI to determine urgency and importance.
-    Returns a dictionary with urgency, importance, and context.
+    Score descriptions with the offline-trained classifier.
+    Returns one result per input, or None where there is no trained model
+    or its confidence is below PRIORITY_MODEL_MIN_CONFIDENCE.
     """
-    if not task_description:
-        return {
-            'urgency': 2,
-            'importance': 2,
-            'context': 'No description provided'
-        }
+    model = get_priority_model()
+    if model is None or not task_descriptions:
+        return [None] * len(task_descriptions)
     
+    min_confidence = getattr(settings, 'PRIORITY_MODEL_MIN_CONFIDENCE', 0.8)
+    results = []
+    for prediction in model.predict(task_descriptions):
+        if prediction['confidence'] < min_confidence:
+            results.append(None)
+        else:
+            results.append({
+                'urgency': prediction['urgency'],
+                'importance': prediction['importance'],
+                'context': f"Local model prediction (confidence {prediction['confidence']:.2f})"
+            })
+    return results
+
+
+def _analysis_request(task_description: str) -> dict:
+    """Chat completion arguments for analyzing a single description"""
     prompt = f"""Analyze the following task and rate it on two scales from 1 to 4:
 
 Task: {task_description}
@@ -36,39 +73,346 @@ Respond ONLY in this exact JSON format:
     "reasoning": "<brief explanation>"
 }}"""
 
-    try:
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are a task prioritization assistant. Analyze tasks and provide urgency and importance ratings."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.3,
-            max_tokens=150
-        )
-        
-        import json
-        result_text = response.choices[0].message.content.strip()
-        
-        # Try to extract JSON from response
-        if result_text.startswith('```json'):
-            result_text = result_text.replace('```json', '').replace('```', '').strip()
-        elif result_text.startswith('```'):
-            result_text = result_text.replace('```', '').strip()
+    return {
+        'model': "gpt-3.5-turbo",
+        'messages': [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ],
+        'temperature': 0.3,
+        'max_tokens': 150,
+    }
+
+
+def _valid_rating(urgency: int, importance: int) -> bool:
+    """Whether both ratings are on the 1-4 scale the Task model accepts"""
+    return 1 <= urgency <= 4 and 1 <= importance <= 4
+
+
+def _analysis_result(response) -> dict:
+    """
+    Parse a single-description chat completion. Raises on parse errors and
+    out-of-range ratings, so they fall back to defaults instead of being cached.
+    """
+    result = _parse_json_response(response.choices[0].message.content)
+    urgency = int(result.get('urgency', 2))
+    importance = int(result.get('importance', 2))
+    if not _valid_rating(urgency, importance):
+        raise ValueError(f'Rating out of range: urgency={urgency}, importance={importance}')
+    
+    return {
+        'urgency': urgency,
+        'importance': importance,
+        'context': result.get('reasoning', 'AI analysis completed')
+    }
+
+
+def _request_analysis(task_description: str) -> dict:
+    """Call OpenAI for a single description. Raises on API or parse errors."""
+    response = client.chat.completions.create(**_analysis_request(task_description))
+    return _analysis_result(response)
+
+
+def _request_batch_analysis(task_descriptions: list) -> dict:
+    """
+    Call OpenAI once for several descriptions.
+    Returns {index: result} for every item that came back well-formed;
+    missing or malformed items are simply absent. Raises on API errors.
+    """
+    task_lines = '\n'.join(
+        f'{index}. {description}' for index, description in enumerate(task_descriptions)
+    )
+    prompt = f"""Analyze each of the following tasks and rate it on two scales from 1 to 4:
+
+{task_lines}
+
+Rate each task on:
+1. Urgency (1=Not urgent, 2=Somewhat urgent, 3=Urgent, 4=Very urgent)
+2. Importance (1=Not important, 2=Somewhat important, 3=Important, 4=Very important)
+
+Consider:
+- Urgency: deadlines, time-sensitive nature, immediate consequences
+- Importance: long-term impact, strategic value, alignment with goals
+
+Respond ONLY with a JSON array containing one object per task, in this exact format:
+[
+    {{"index": <task number>, "urgency": <number 1-4>, "importance": <number 1-4>, "reasoning": "<brief explanation>"}}
+]"""
+
+    response = client.chat.completions.create(
+        model="gpt-3.5-turbo",
+        messages=[
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ],
+        temperature=0.3,
+        max_tokens=80 * len(task_descriptions) + 50
+    )
+    
+    items = _parse_json_response(response.choices[0].message.content)
+    if isinstance(items, dict):
+        # Tolerate {"tasks": [...]} style wrappers
+        items = next((value for value in items.values() if isinstance(value, list)), [])
+    
+    results = {}
+    for item in items if isinstance(items, list) else []:
+        try:
+            index = int(item['index'])
+            urgency = int(item['urgency'])
+            importance = int(item['importance'])
+        except (KeyError, TypeError, ValueError):
+            continue
+        if 0 <= index < len(task_descriptions) and _valid_rating(urgency, importance):
+            results[index] = {
+                'urgency': urgency,
+                'importance': importance,
+                'context': item.get('reasoning', 'AI analysis completed')
+            }
+    return results
+
+
+def _analyze_uncached(task_descriptions: list) -> list:
+    """
+    Analyze descriptions that missed the cache, batching them into as few
+    chat completions as possible. Items the batch response does not cover
+    fall back to a single-item request, then to default values.
+    """
+    max_batch = getattr(settings, 'AI_ANALYSIS_BATCH_MAX', 20)
+    results = [None] * len(task_descriptions)
+    
+    for start in range(0, len(task_descriptions), max_batch):
+        chunk = task_descriptions[start:start + max_batch]
+        if len(chunk) == 1:
+            batch_results = {}
+        else:
+            try:
+                batch_results = _request_batch_analysis(chunk)
+            except Exception as e:
+                print(f"OpenAI batch API error: {str(e)}")
+                batch_results = {}
         
-        result = json.loads(result_text)
+        for offset, description in enumerate(chunk):
+            result = batch_results.get(offset)
+            if result is None:
+                try:
+                    result = _request_analysis(description)
+                except Exception as e:
+                    print(f"OpenAI API error: {str(e)}")
+                    results[start + offset] = {
+                        'urgency': 2,
+                        'importance': 2,
+                        'context': f'Analysis failed: {str(e)}'
+                    }
+                    continue
+            analysis_cache.set(cache_key(description, PROMPT_VERSION), result)
+            results[start + offset] = result
+    
+    return results
+
+
+def analyze_tasks(task_descriptions: list) -> list:
+    """
+    Analyze many task descriptions at once.
+    Returns one result dict per input, in order. Cached and duplicate
+    descriptions are resolved without extra API calls.
+    """
+    results = [None] * len(task_descriptions)
+    pending = {}  # cache key -> (description, [indexes])
+    
+    for index, description in enumerate(task_descriptions):
+        if not description:
+            results[index] = {
+                'urgency': 2,
+                'importance': 2,
+                'context': 'No description provided'
+            }
+            continue
+        key = cache_key(description, PROMPT_VERSION)
+        if key in pending:
+            pending[key][1].append(index)
+            continue
+        cached = analysis_cache.get(key)
+        if cached is not None:
+            results[index] = cached
+        else:
+            pending[key] = (description, [index])
+    
+    if pending:
+        entries = list(pending.values())
+        local = _local_predictions([description for description, _ in entries])
+        uncertain = [entry for entry, prediction in zip(entries, local) if prediction is None]
+        analyzed = _analyze_uncached([description for description, _ in uncertain])
         
+        resolved = [
+            (indexes, prediction)
+            for (_, indexes), prediction in zip(entries, local) if prediction is not None
+        ]
+        resolved.extend((indexes, result) for (_, indexes), result in zip(uncertain, analyzed))
+        for indexes, result in resolved:
+            for index in indexes:
+                results[index] = dict(result)
+    
+    return results
+
+
+class _AnalysisCoalescer:
+    """
+    Collects descriptions submitted within a short window (from any thread)
+    and analyzes them with a single batched request.
+    """
+    
+    def __init__(self, window_seconds, max_batch):
+        self.window_seconds = window_seconds
+        self.max_batch = max_batch
+        self._lock = threading.Lock()
+        self._pending = []
+        self._timer = None
+    
+    def submit(self, description) -> Future:
+        future = Future()
+        batch = None
+        with self._lock:
+            self._pending.append((description, future))
+            if len(self._pending) >= self.max_batch:
+                batch = self._take_batch()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.window_seconds, self._flush_timer)
+                self._timer.daemon = True
+                self._timer.start()
+        if batch:
+            self._run(batch)
+        return future
+    
+    def _take_batch(self):
+        # Caller holds the lock
+        batch, self._pending = self._pending, []
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        return batch
+    
+    def _flush_timer(self):
+        with self._lock:
+            batch = self._take_batch()
+        if batch:
+            self._run(batch)
+    
+    def _run(self, batch):
+        # Descriptions that share a cache key are analyzed once and the result
+        # is handed to every waiter
+        waiters = {}
+        for description, future in batch:
+            key = cache_key(description, PROMPT_VERSION)
+            waiters.setdefault(key, (description, []))[1].append(future)
+        groups = list(waiters.values())
+        try:
+            results = _analyze_uncached([description for description, _ in groups])
+        except Exception as e:
+            for _, futures in groups:
+                for future in futures:
+                    future.set_exception(e)
+            return
+        for (_, futures), result in zip(groups, results):
+            for future in futures:
+                future.set_result(result)
+
+
+_coalescer = _AnalysisCoalescer(
+    window_seconds=getattr(settings, 'AI_ANALYSIS_BATCH_WINDOW_MS', 50) / 1000,
+    max_batch=getattr(settings, 'AI_ANALYSIS_BATCH_MAX', 20),
+)
+
+
+def analyze_task_coalesced(task_description: str) -> dict:
+    """
+    Like analyze_task, but cache misses arriving from concurrent workers
+    within AI_ANALYSIS_BATCH_WINDOW_MS are merged into one batched request.
+    Blocks the calling (background) thread until its result is ready.
+    """
+    if not task_description:
+        return analyze_task(task_description)
+    
+    cached = analysis_cache.get(cache_key(task_description, PROMPT_VERSION))
+    if cached is not None:
+        return cached
+    
+    local = _local_predictions([task_description])[0]
+    if local is not None:
+        return local
+    
+    return _coalescer.submit(task_description).result()
+
+
+def analyze_task(task_description: str) -> dict:
+    """
+    Analyze task description using OpenAI to determine urgency and importance.
+    Returns a dictionary with urgency, importance, and context.
+    Results are cached by normalized description, so repeats skip the API call,
+    and confident predictions from the local classifier skip it entirely.
+    """
+    if not task_description:
         return {
-            'urgency': int(result.get('urgency', 2)),
-            'importance': int(result.get('importance', 2)),
-            'context': result.get('reasoning', 'AI analysis completed')
+            'urgency': 2,
+            'importance': 2,
+            'context': 'No description provided'
         }
+    
+    key = cache_key(task_description, PROMPT_VERSION)
+    cached = analysis_cache.get(key)
+    if cached is not None:
+        return cached
+    
+    local = _local_predictions([task_description])[0]
+    if local is not None:
+        return local
+    
+    try:
+        result = _request_analysis(task_description)
     except Exception as e:
-        # Fallback to default values if API fails
+        # Fallback to default values if API fails (not cached, so the next call retries)
         print(f"OpenAI API error: {str(e)}")
         return {
             'urgency': 2,
             'importance': 2,
             'context': f'Analysis failed: {str(e)}'
         }
+    
+    analysis_cache.set(key, result)
+    return result
 
+
+async def analyze_task_async(task_description: str) -> dict:
+    """
+    analyze_task for the async API: same cache, local model and fallback,
+    but the OpenAI request awaits on the event loop instead of a thread.
+    """
+    if not task_description:
+        return {
+            'urgency': 2,
+            'importance': 2,
+            'context': 'No description provided'
+        }
+    
+    key = cache_key(task_description, PROMPT_VERSION)
+    cached = await sync_to_async(analysis_cache.get, thread_sensitive=False)(key)
+    if cached is not None:
+        return cached
+    
+    local = _local_predictions([task_description])[0]
+    if local is not None:
+        return local
+    
+    try:
+        response = await async_client.chat.completions.create(**_analysis_request(task_description))
+        result = _analysis_result(response)
+    except Exception as e:
+        # Fallback to default values if API fails (not cached, so the next call retries)
+        print(f"OpenAI API error: {str(e)}")
+        return {
+            'urgency': 2,
+            'importance': 2,
+            'context': f'Analysis failed: {str(e)}'
+        }
+    
+    await sync_to_async(analysis_cache.set, thread_sensitive=False)(key, result)
+    return result
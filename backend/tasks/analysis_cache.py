@@ -0,0 +1,132 @@
+"""
+Content-addressed cache for AI analysis results.
+
+Results are keyed on a hash of the prompt version and the normalized task
+description. Lookups go through an in-process LRU first, then the
+analysis_cache MongoDB collection whose TTL index expires old entries.
+"""
+import hashlib
+import logging
+import re
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+from django.conf import settings
+
+from .models import AnalysisCacheEntry
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def normalize_description(description: str) -> str:
+    """Lowercase and collapse whitespace so trivial variations share a key"""
+    return _WHITESPACE_RE.sub(' ', description or '').strip().lower()
+
+
+def cache_key(description: str, prompt_version: str) -> str:
+    """Stable cache key for a description under a given prompt version"""
+    payload = f'{prompt_version}\n{normalize_description(description)}'
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class AnalysisCache:
+    """Two-tier (LRU + MongoDB) cache of analyze_task results"""
+
+    def __init__(self, max_entries=2048, persistent=True):
+        self.max_entries = max_entries
+        self.persistent = persistent
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {
+            'memory_hits': 0,
+            'db_hits': 0,
+            'misses': 0,
+            'stores': 0,
+            'errors': 0,
+        }
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def _remember(self, key, result):
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, key):
+        """Return a cached result dict or None"""
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+                self._counters['memory_hits'] += 1
+                return dict(result)
+
+        if self.persistent:
+            try:
+                entry = AnalysisCacheEntry.objects(key=key).only(
+                    'urgency', 'importance', 'context'
+                ).first()
+            except Exception as e:
+                logger.warning('Analysis cache lookup failed: %s', e)
+                self._count('errors')
+                entry = None
+            if entry is not None:
+                result = {
+                    'urgency': entry.urgency,
+                    'importance': entry.importance,
+                    'context': entry.context,
+                }
+                self._remember(key, result)
+                self._count('db_hits')
+                return dict(result)
+
+        self._count('misses')
+        return None
+
+    def set(self, key, result):
+        """Store a successful analysis result in both tiers"""
+        result = {
+            'urgency': result['urgency'],
+            'importance': result['importance'],
+            'context': result.get('context', ''),
+        }
+        self._remember(key, result)
+        self._count('stores')
+
+        if self.persistent:
+            try:
+                AnalysisCacheEntry.objects(key=key).update_one(
+                    upsert=True,
+                    set__urgency=result['urgency'],
+                    set__importance=result['importance'],
+                    set__context=result['context'],
+                    set_on_insert__created_at=datetime.utcnow(),
+                )
+            except Exception as e:
+                logger.warning('Analysis cache store failed: %s', e)
+                self._count('errors')
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current LRU size"""
+        with self._lock:
+            counters = dict(self._counters)
+            size = len(self._entries)
+        lookups = counters['memory_hits'] + counters['db_hits'] + counters['misses']
+        hits = counters['memory_hits'] + counters['db_hits']
+        counters['size'] = size
+        counters['max_entries'] = self.max_entries
+        counters['hit_rate'] = round(hits / lookups, 4) if lookups else 0
+        return counters
+
+
+analysis_cache = AnalysisCache(
+    max_entries=getattr(settings, 'AI_ANALYSIS_CACHE_SIZE', 2048),
+    persistent=getattr(settings, 'AI_ANALYSIS_CACHE_PERSISTENT', True),
+)
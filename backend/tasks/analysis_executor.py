@@ -0,0 +1,205 @@
+"""
+Bounded worker pool for background AI analysis.
+
+A fixed number of worker threads drain a bounded queue of analysis jobs.
+When the queue is full, submitters wait briefly and are then rejected with
+AnalysisQueueFull, so a burst of task creations cannot spawn unbounded
+threads inside a gunicorn worker.
+"""
+import atexit
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from django.conf import settings
+
+from .broadcast import get_broadcast_dispatcher
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class AnalysisQueueFull(Exception):
+    """Raised when the analysis queue stays full past the submit timeout"""
+
+
+class AnalysisExecutorShutdown(AnalysisQueueFull):
+    """Raised when a job is submitted after shutdown; callers degrade as for a full queue"""
+
+
+class AnalysisExecutor:
+    """Fixed-size thread pool with a bounded job queue and basic metrics"""
+
+    def __init__(self, workers=4, queue_size=256, submit_timeout=0.5, name='ai-analysis'):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.submit_timeout = submit_timeout
+        self.name = name
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._threads = []
+        self._lock = threading.Lock()
+        self._shutdown = False
+        self._stats = {
+            'submitted': 0,
+            'rejected': 0,
+            'completed': 0,
+            'failed': 0,
+            'active': 0,
+            'wait_ms_total': 0.0,
+            'wait_ms_max': 0.0,
+            'run_ms_total': 0.0,
+            'run_ms_max': 0.0,
+        }
+
+    def _start(self):
+        """Start worker threads lazily on first submit"""
+        if self._threads:
+            return
+        for i in range(self.workers):
+            thread = threading.Thread(
+                target=self._worker,
+                name=f'{self.name}-{i}',
+                daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        """
+        Queue fn(*args, **kwargs) for execution.
+
+        Blocks for at most submit_timeout seconds when the queue is full and
+        raises AnalysisQueueFull if no slot frees up in time.
+        """
+        future = Future()
+        with self._lock:
+            if self._shutdown:
+                raise AnalysisExecutorShutdown('Analysis executor is shut down')
+            self._start()
+
+        try:
+            self._queue.put((future, fn, args, kwargs, time.monotonic()), timeout=self.submit_timeout)
+        except queue.Full:
+            with self._lock:
+                self._stats['rejected'] += 1
+            raise AnalysisQueueFull(
+                f'Analysis queue is full ({self.queue_size} pending jobs)'
+            )
+
+        with self._lock:
+            self._stats['submitted'] += 1
+        return future
+
+    def _worker(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is _STOP:
+                    return
+                future, fn, args, kwargs, enqueued_at = item
+                if not future.set_running_or_notify_cancel():
+                    continue
+
+                started_at = time.monotonic()
+                wait_ms = (started_at - enqueued_at) * 1000
+                with self._lock:
+                    self._stats['active'] += 1
+
+                try:
+                    result = fn(*args, **kwargs)
+                except BaseException as e:
+                    future.set_exception(e)
+                    succeeded = False
+                    logger.exception('Analysis job failed')
+                else:
+                    future.set_result(result)
+                    succeeded = True
+
+                run_ms = (time.monotonic() - started_at) * 1000
+                with self._lock:
+                    stats = self._stats
+                    stats['active'] -= 1
+                    stats['completed' if succeeded else 'failed'] += 1
+                    stats['wait_ms_total'] += wait_ms
+                    stats['wait_ms_max'] = max(stats['wait_ms_max'], wait_ms)
+                    stats['run_ms_total'] += run_ms
+                    stats['run_ms_max'] = max(stats['run_ms_max'], run_ms)
+            finally:
+                self._queue.task_done()
+
+    def drain(self):
+        """Block until every job submitted so far has finished"""
+        self._queue.join()
+
+    def stats(self) -> dict:
+        """Snapshot of queue depth, throughput and latency metrics"""
+        with self._lock:
+            stats = dict(self._stats)
+        finished = stats['completed'] + stats['failed']
+        return {
+            'workers': self.workers,
+            'queue_size': self.queue_size,
+            'queue_depth': self._queue.qsize(),
+            'active': stats['active'],
+            'submitted': stats['submitted'],
+            'rejected': stats['rejected'],
+            'completed': stats['completed'],
+            'failed': stats['failed'],
+            'avg_wait_ms': round(stats['wait_ms_total'] / finished, 2) if finished else 0,
+            'max_wait_ms': round(stats['wait_ms_max'], 2),
+            'avg_run_ms': round(stats['run_ms_total'] / finished, 2) if finished else 0,
+            'max_run_ms': round(stats['run_ms_max'], 2),
+        }
+
+    def shutdown(self, timeout=None):
+        """Stop accepting jobs, drain the queue and join the workers"""
+        with self._lock:
+            if self._shutdown:
+                return
+            self._shutdown = True
+            threads = list(self._threads)
+
+        deadline = time.monotonic() + timeout if timeout is not None else None
+
+        def remaining():
+            return None if deadline is None else max(0, deadline - time.monotonic())
+
+        for _ in threads:
+            # Stop markers queue up behind pending jobs, so workers drain first
+            try:
+                self._queue.put(_STOP, timeout=remaining())
+            except queue.Full:
+                # Workers are stuck on a full queue; they are daemon threads
+                # and die with the process
+                logger.warning('Analysis queue still full at shutdown; abandoning %d jobs', self._queue.qsize())
+                return
+        for thread in threads:
+            thread.join(remaining())
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_analysis_executor() -> AnalysisExecutor:
+    """Process-wide analysis executor configured from settings"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                # atexit runs handlers in reverse order: creating the broadcast
+                # dispatcher first makes it flush after the pool has drained
+                get_broadcast_dispatcher()
+                _executor = AnalysisExecutor(
+                    workers=getattr(settings, 'AI_ANALYSIS_WORKERS', 4),
+                    queue_size=getattr(settings, 'AI_ANALYSIS_QUEUE_SIZE', 256),
+                    submit_timeout=getattr(settings, 'AI_ANALYSIS_SUBMIT_TIMEOUT', 0.5),
+                )
+                atexit.register(
+                    _executor.shutdown,
+                    timeout=getattr(settings, 'AI_ANALYSIS_SHUTDOWN_TIMEOUT', 30)
+                )
+    return _executor
@@ -0,0 +1,78 @@
+"""
+Tracking for asynchronous reanalyze jobs.
+
+Each reanalyze request gets an AnalysisJob document that moves through
+queued -> running -> completed/failed. A partial unique index on task_id
+over active jobs makes concurrent requests for the same task share one job.
+"""
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from mongoengine import NotUniqueError
+
+from .models import AnalysisJob
+
+
+def _stale_cutoff():
+    return datetime.utcnow() - timedelta(seconds=getattr(settings, 'AI_ANALYSIS_JOB_STALE_SECONDS', 300))
+
+
+def start_job(task_id: str, user_id: str):
+    """
+    Return (job, created). If an in-flight job already exists for the task it
+    is returned with created=False, so the caller must not queue new work.
+    """
+    for _ in range(2):
+        existing = AnalysisJob.objects(task_id=task_id, active=True).first()
+        if existing is not None:
+            if existing.created_at >= _stale_cutoff():
+                return existing, False
+            # Worker died or the process restarted; release the slot and retry
+            fail_job(existing.id, 'Job timed out')
+        
+        try:
+            job = AnalysisJob(task_id=task_id, user_id=user_id)
+            job.save(force_insert=True)
+            return job, True
+        except NotUniqueError:
+            # Lost the race to a concurrent request; use its job
+            continue
+    
+    return AnalysisJob.objects(task_id=task_id, active=True).first(), False
+
+
+def mark_running(job_id):
+    AnalysisJob.objects(id=job_id, active=True).update_one(
+        set__status='running',
+        set__started_at=datetime.utcnow()
+    )
+
+
+def complete_job(job_id, result: dict):
+    AnalysisJob.objects(id=job_id).update_one(
+        set__status='completed',
+        set__active=False,
+        set__result=result,
+        set__finished_at=datetime.utcnow()
+    )
+
+
+def fail_job(job_id, error: str):
+    AnalysisJob.objects(id=job_id).update_one(
+        set__status='failed',
+        set__active=False,
+        set__error=error,
+        set__finished_at=datetime.utcnow()
+    )
+
+
+def job_representation(job) -> dict:
+    return {
+        'job_id': str(job.id),
+        'task_id': job.task_id,
+        'status': job.status,
+        'result': job.result,
+        'error': job.error,
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+    }
@@ -0,0 +1,129 @@
+"""
+Monthly analytics computed inside MongoDB.
+
+analytics_pipeline() counts statuses, quadrants and tasks per day, and sums
+urgency/importance in a single $facet aggregation. Only the aggregates leave
+the database. Results are kept as counts and sums (not averages) so partial
+results can be merged before summarize() shapes the API response.
+"""
+import calendar
+from collections import defaultdict
+from datetime import datetime
+
+STATUSES = ('completed', 'pending', 'in_progress', 'cancelled')
+
+
+def month_bounds(year: int, month: int):
+    """First and last instant of a month, as naive UTC datetimes"""
+    first_day = datetime(year, month, 1)
+    last_day = datetime(year, month, calendar.monthrange(year, month)[1], 23, 59, 59)
+    return first_day, last_day
+
+
+def monthly_match(user_id: str, first_day, last_day) -> dict:
+    """
+    Raw filter for a user's monthly tasks in a month: due in the month, or
+    recurring with no end date or an end date on/after the month start.
+    """
+    return {
+        'user_id': user_id,
+        'task_type': 'monthly',
+        '$or': [
+            {'due_date': {'$gte': first_day, '$lte': last_day}},
+            {'is_recurring': True, '$or': [
+                {'recurrence_end_date': None},
+                {'recurrence_end_date': {'$gte': first_day}},
+            ]},
+        ],
+    }
+
+
+def analytics_pipeline(match: dict) -> list:
+    """Single-pass aggregation returning one document of facet counts"""
+    return [
+        {'$match': match},
+        {'$facet': {
+            'totals': [{'$group': {
+                '_id': None,
+                'total': {'$sum': 1},
+                'urgency_sum': {'$sum': {'$ifNull': ['$urgency', 2]}},
+                'importance_sum': {'$sum': {'$ifNull': ['$importance', 2]}},
+            }}],
+            'by_status': [{'$group': {
+                '_id': {'$ifNull': ['$status', 'pending']},
+                'count': {'$sum': 1},
+            }}],
+            'by_quadrant': [{'$group': {
+                '_id': '$priority_quadrant',
+                'count': {'$sum': 1},
+            }}],
+            'by_day': [{'$group': {
+                # Tasks are bucketed by due date, falling back to creation date
+                '_id': {'$dateToString': {
+                    'format': '%Y-%m-%d',
+                    'date': {'$ifNull': ['$due_date', '$created_at']},
+                }},
+                'count': {'$sum': 1},
+            }}],
+        }},
+    ]
+
+
+def facets_to_counts(facets: dict) -> dict:
+    """Flatten an analytics_pipeline() result into mergeable counters"""
+    totals = facets['totals'][0] if facets.get('totals') else {}
+    return {
+        'total': totals.get('total', 0),
+        'urgency_sum': totals.get('urgency_sum', 0),
+        'importance_sum': totals.get('importance_sum', 0),
+        'status': {row['_id']: row['count'] for row in facets.get('by_status', [])},
+        'quadrant': {row['_id']: row['count'] for row in facets.get('by_quadrant', [])},
+        'daily': {row['_id']: row['count'] for row in facets.get('by_day', []) if row['_id']},
+    }
+
+
+def merge_counts(*parts) -> dict:
+    """Add several counter dicts together"""
+    merged = {
+        'total': 0,
+        'urgency_sum': 0,
+        'importance_sum': 0,
+        'status': defaultdict(int),
+        'quadrant': defaultdict(int),
+        'daily': defaultdict(int),
+    }
+    for part in parts:
+        for key in ('total', 'urgency_sum', 'importance_sum'):
+            merged[key] += part.get(key, 0)
+        for key in ('status', 'quadrant', 'daily'):
+            for name, count in part.get(key, {}).items():
+                merged[key][name] += count
+    return merged
+
+
+def summarize(counts: dict, year: int, month: int) -> dict:
+    """Shape merged counters into the analytics API response"""
+    total_tasks = counts['total']
+    status_counts = {name: counts['status'].get(name, 0) for name in STATUSES}
+    completed_tasks = status_counts['completed']
+
+    completion_rate = (completed_tasks / total_tasks * 100) if total_tasks > 0 else 0
+    urgency_avg = counts['urgency_sum'] / total_tasks if total_tasks > 0 else 0
+    importance_avg = counts['importance_sum'] / total_tasks if total_tasks > 0 else 0
+
+    return {
+        'month': month,
+        'year': year,
+        'total_tasks': total_tasks,
+        'completed_tasks': completed_tasks,
+        'pending_tasks': status_counts['pending'],
+        'in_progress_tasks': status_counts['in_progress'],
+        'completion_rate': round(completion_rate, 2),
+        'priority_breakdown': {name: count for name, count in counts['quadrant'].items() if count},
+        'status_breakdown': status_counts,
+        'daily_counts': {day: count for day, count in sorted(counts['daily'].items()) if count},
+        'avg_urgency': round(urgency_avg, 2),
+        'avg_importance': round(importance_avg, 2),
+        'month_name': calendar.month_name[month],
+        'total_days_in_month': calendar.monthrange(year, month)[1]
+    }
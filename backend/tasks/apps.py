@@ -10,11 +10,15 @@ class TasksConfig(AppConfig):
         try:
             from django.conf import settings
             from mongoengine import connect
+            from .mongo_metrics import client_options
+            
+            # Pool sizing, timeouts, compression and pool metrics listener
+            options = client_options(settings.MONGODB_SETTINGS)
             
             # Check if using URI (MongoDB Atlas) or individual settings
             if 'host' in settings.MONGODB_SETTINGS and settings.MONGODB_SETTINGS['host'].startswith('mongodb'):
                 # URI-based connection (MongoDB Atlas)
-                connect(host=settings.MONGODB_SETTINGS['host'], alias='default')
+                connect(host=settings.MONGODB_SETTINGS['host'], alias='default', **options)
             else:
                 # Individual settings connection (local MongoDB)
                 connect(
@@ -23,7 +27,8 @@ class TasksConfig(AppConfig):
                     port=settings.MONGODB_SETTINGS.get('port', 27017),
                     username=settings.MONGODB_SETTINGS.get('username') or None,
                     password=settings.MONGODB_SETTINGS.get('password') or None,
-                    alias='default'
+                    alias='default',
+                    **options
                 )
             
             print("MongoDB connection initialized on startup")
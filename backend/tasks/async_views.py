@@ -0,0 +1,474 @@
+"""
+Async variants of the task API, served under /api/async/tasks/.
+
+These are native Django async views for the ASGI server (config/asgi.py
+under uvicorn workers). MongoDB is accessed through PyMongo's
+AsyncMongoClient and AI analysis through AsyncOpenAI, so a request waiting
+on either holds no thread and one process can multiplex thousands of
+requests and WebSockets.
+
+Only the hot paths are served here: list/create, detail, daily_tasks,
+monthly_tasks and analytics. Their response shapes match TaskViewSet, and
+listings get the same ETag / 304 handling and task list cache
+(async_listing). Reanalyze, analysis jobs, bulk operations, occurrences
+and health_check exist only on the sync API under /api/tasks/, which
+remains the primary, complete surface. Validation, representation,
+pagination, rollups, completion toggles and broadcasts reuse the same
+helpers as the sync API. AI analysis of new tasks runs as an asyncio task
+on the request's event loop instead of on the analysis thread pool.
+"""
+import asyncio
+import functools
+import json
+import logging
+from datetime import datetime
+from types import SimpleNamespace
+
+from asgiref.sync import sync_to_async
+from bson import ObjectId
+from bson.errors import InvalidId
+from django.conf import settings
+from django.http import HttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from mongoengine.errors import ValidationError as MongoValidationError
+from pymongo import AsyncMongoClient, ReturnDocument
+from rest_framework.exceptions import AuthenticationFailed, ValidationError as DRFValidationError
+
+from .ai_service import analyze_task_async
+from .analytics import month_bounds, monthly_match, analytics_pipeline, facets_to_counts, merge_counts, summarize
+from .broadcast import broadcast_task_update
+from .bulk import storage_value, stored_document
+from .completions import apply_completion, completion_update, parse_completion_date
+from .etags import CACHE_CONTROL, _clock_bucket, etag_matches, task_list_etag
+from .list_cache import get_task_list_cache, tasks_changed
+from .models import Task, TaskMonthlyStats
+from .mongo_metrics import analytics_read_preference, client_options
+from .pagination import TaskCursorPagination, ORDERING, mongo_sort
+from .priority_calculator import calculate_priority_quadrant, calculate_priority_score
+from .renderers import ORJSONRenderer
+from .rollups import build_rollup_updates, rebuild_month, stats_id, stats_counts, recurring_match
+from .serializers import TaskSerializer, document_to_representation, parse_fields_param, projection_fields
+from .views import local_day_bounds
+from users.authentication import ClaimsJWTAuthentication, revocation_is_shared
+
+logger = logging.getLogger(__name__)
+
+_renderer = ORJSONRenderer()
+_jwt_authentication = ClaimsJWTAuthentication()
+
+# Fields the rollups need when a task is deleted
+ROLLUP_FIELDS = ('user_id', 'urgency', 'importance', 'priority_quadrant', 'status', 'task_type', 'is_recurring', 'due_date')
+
+
+class _LoopState:
+    """Async client and background work bound to one event loop"""
+
+    def __init__(self, loop):
+        self.loop = loop
+        mongodb = settings.MONGODB_SETTINGS
+        options = client_options(mongodb, name='async')
+        if mongodb.get('host', '').startswith('mongodb'):
+            self.client = AsyncMongoClient(mongodb['host'], **options)
+            self.db = self.client.get_default_database(default=mongodb.get('db', 'agathees_db'))
+        else:
+            self.client = AsyncMongoClient(
+                host=mongodb.get('host', 'localhost'),
+                port=mongodb.get('port', 27017),
+                username=mongodb.get('username') or None,
+                password=mongodb.get('password') or None,
+                **options
+            )
+            self.db = self.client[mongodb.get('db', 'agathees_db')]
+        self.tasks = self.db[Task._get_collection_name()]
+        self.stats = self.db[TaskMonthlyStats._get_collection_name()]
+        self.analysis_slots = asyncio.Semaphore(getattr(settings, 'AI_ANALYSIS_WORKERS', 4))
+        self.background = set()
+
+
+_loop_state = None
+
+
+def _state() -> _LoopState:
+    """
+    State for the running loop. Clients cannot be shared across event loops;
+    uvicorn runs one loop per process, so this is created once per worker.
+    """
+    global _loop_state
+    loop = asyncio.get_running_loop()
+    if _loop_state is None or _loop_state.loop is not loop:
+        _loop_state = _LoopState(loop)
+    return _loop_state
+
+
+def _json_response(data, status=200, headers=None) -> HttpResponse:
+    response = HttpResponse(
+        _renderer.render(data) if data is not None else b'',
+        status=status,
+        content_type='application/json'
+    )
+    for name, value in (headers or {}).items():
+        response[name] = value
+    return response
+
+
+def _error(message, status):
+    return _json_response({'error': message}, status=status)
+
+
+def _parse_body(request):
+    if not request.body:
+        return {}
+    try:
+        return json.loads(request.body)
+    except ValueError:
+        raise DRFValidationError({'detail': 'Malformed JSON body'})
+
+
+def _object_id(value):
+    try:
+        return ObjectId(value)
+    except (InvalidId, TypeError):
+        return None
+
+
+def _projection(fields=None, extra=()):
+    return {('_id' if field == 'id' else field): 1 for field in projection_fields(fields, extra)}
+
+
+def async_task_view(methods):
+    """
+    Wrap an async view with JWT authentication, an allowed-methods check and
+    the sync API's error shapes. The view is called as view(request, user, ...).
+    """
+    def decorator(view):
+        @csrf_exempt
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in methods:
+                return _json_response(
+                    {'detail': f'Method "{request.method}" not allowed.'}, status=405,
+                    headers={'Allow': ', '.join(methods)}
+                )
+            try:
+                # Claims only; the revocation check is a cache lookup, kept off the loop.
+                # Without a shared cache it reads the user row, so it needs Django's thread
+                authenticated = await sync_to_async(
+                    _jwt_authentication.authenticate, thread_sensitive=not revocation_is_shared()
+                )(request)
+            except AuthenticationFailed as e:
+                return _json_response({'detail': str(e.detail)}, status=401)
+            if authenticated is None:
+                return _json_response({'detail': 'Authentication credentials were not provided.'}, status=401)
+
+            user = authenticated[0]
+            try:
+                return await view(request, user, *args, **kwargs)
+            except DRFValidationError as e:
+                return _json_response(e.detail, status=400)
+            except Exception as e:
+                logger.exception('Async task view failed')
+                return _error(str(e), 500)
+        return wrapper
+    return decorator
+
+
+async def _apply_rollups(state, operations):
+    """apply_rollup_updates through the async client"""
+    if not operations:
+        return
+    try:
+        await state.stats.bulk_write(operations, ordered=False)
+    except Exception as e:
+        logger.warning('Monthly stats update failed: %s', e)
+
+
+async def _task_written(state, user_id, before, after):
+    """Rollups and list cache invalidation after a task write"""
+    await _apply_rollups(state, build_rollup_updates(before, after))
+    await sync_to_async(tasks_changed, thread_sensitive=False)(user_id)
+
+
+def _priority_changes(changes: dict, current: dict) -> dict:
+    """Recompute priority when urgency or importance is part of the changes"""
+    if 'urgency' in changes or 'importance' in changes:
+        urgency = changes.get('urgency', current.get('urgency', 2))
+        importance = changes.get('importance', current.get('importance', 2))
+        quadrant = calculate_priority_quadrant(urgency, importance)
+        changes['priority_quadrant'] = quadrant
+        changes['priority_score'] = calculate_priority_score(urgency, importance, quadrant)
+    return changes
+
+
+async def run_ai_analysis_async(task_id, description: str, user_id: str):
+    """Async counterpart of views.run_ai_analysis"""
+    state = _state()
+    try:
+        async with state.analysis_slots:
+            ai_result = await analyze_task_async(description)
+
+        changes = _priority_changes({
+            'urgency': ai_result['urgency'],
+            'importance': ai_result['importance'],
+        }, {})
+        changes['updated_at'] = datetime.utcnow()
+        before = await state.tasks.find_one_and_update(
+            {'_id': task_id, 'user_id': user_id},
+            {'$set': changes},
+            return_document=ReturnDocument.BEFORE
+        )
+        if before is None:
+            # Deleted while being analyzed
+            return
+        after = {**before, **changes}
+        await _task_written(state, user_id, before, after)
+        broadcast_task_update(
+            user_id, 'updated', document_to_representation(after),
+            before=document_to_representation(before)
+        )
+        print(f"AI analysis completed for task {task_id}")
+    except Exception as e:
+        print(f"Background AI analysis failed: {str(e)}")
+
+
+def _spawn(state, coroutine):
+    """Run a coroutine in the background, keeping a reference until it finishes"""
+    task = asyncio.get_running_loop().create_task(coroutine)
+    state.background.add(task)
+    task.add_done_callback(state.background.discard)
+
+
+def async_listing(view=None, *, clock=False, cache=True):
+    """
+    ETag / If-None-Match handling and the task list cache for async GET
+    listings, as etags.conditional_listing and list_cache.cached_listing
+    do for the sync views. Cached entries hold the rendered body. Goes
+    under async_task_view; other methods pass straight through.
+    """
+    if view is None:
+        return functools.partial(async_listing, clock=clock, cache=cache)
+
+    @functools.wraps(view)
+    async def wrapper(request, user, *args, **kwargs):
+        if request.method != 'GET':
+            return await view(request, user, *args, **kwargs)
+
+        user_id = str(user.id)
+        variant = _renderer.format
+        if clock:
+            variant = f'{variant}|{_clock_bucket()}'
+        full_path = request.get_full_path()
+        try:
+            # Computed before the listing is read, as in conditional_listing
+            etag = await sync_to_async(task_list_etag, thread_sensitive=False)(user_id, full_path, variant)
+        except Exception:
+            # Let the view report the database problem itself
+            etag = None
+        if etag is not None and etag_matches(request, etag):
+            return _json_response(None, status=304, headers={'ETag': etag, 'Cache-Control': CACHE_CONTROL})
+
+        list_cache = get_task_list_cache()
+        key, body = (None, None)
+        if cache:
+            key, body = await sync_to_async(list_cache.get, thread_sensitive=False)(
+                user_id, f'{full_path}|{variant}'
+            )
+        if body is not None:
+            response = HttpResponse(body, content_type='application/json')
+        else:
+            response = await view(request, user, *args, **kwargs)
+            if key is not None and response.status_code == 200:
+                await sync_to_async(list_cache.set, thread_sensitive=False)(key, response.content)
+
+        if etag is not None and response.status_code == 200:
+            response['ETag'] = etag
+            response['Cache-Control'] = CACHE_CONTROL
+        return response
+    return wrapper
+
+
+@async_task_view(['GET', 'POST'])
+@async_listing
+async def task_list(request, user):
+    """GET: cursor-paginated listing (?all=true, ?fields=); POST: create a task"""
+    state = _state()
+    user_id = str(user.id)
+
+    if request.method == 'POST':
+        serializer = TaskSerializer(data=_parse_body(request), context={'request': SimpleNamespace(user=user)})
+        serializer.is_valid(raise_exception=True)
+        task = serializer.build_task(dict(serializer.validated_data))
+        try:
+            task.validate()
+        except MongoValidationError as e:
+            raise DRFValidationError({'detail': str(e)})
+
+        doc = stored_document(task)
+        await state.tasks.insert_one(doc)
+        await _task_written(state, user_id, None, doc)
+        representation = document_to_representation(doc)
+        broadcast_task_update(user_id, 'created', representation)
+
+        if doc.get('description'):
+            _spawn(state, run_ai_analysis_async(doc['_id'], doc['description'], user_id))
+        return _json_response(representation, status=201)
+
+    fields = parse_fields_param(request.GET.get('fields'))
+    if request.GET.get('all', '').lower() in ('1', 'true'):
+        docs = await state.tasks.find({'user_id': user_id}, _projection(fields)).sort(mongo_sort(ORDERING)).to_list()
+        return _json_response([document_to_representation(doc, fields) for doc in docs])
+
+    # Cursors are built from the sort key, so it is always loaded
+    paginator = TaskCursorPagination(request)
+    raw, sort, limit = paginator.page_query()
+    docs = await state.tasks.find(
+        {'user_id': user_id, **raw},
+        _projection(fields, extra=('priority_score', 'created_at'))
+    ).sort(sort).limit(limit).to_list()
+    docs = paginator.take_page(docs)
+    return _json_response(paginator.get_paginated_data(
+        [document_to_representation(doc, fields) for doc in docs]
+    ))
+
+
+@async_task_view(['GET', 'PUT', 'PATCH', 'DELETE'])
+async def task_detail(request, user, pk):
+    """Retrieve, update (including recurring completion toggles) or delete one task"""
+    state = _state()
+    user_id = str(user.id)
+    task_id = _object_id(pk)
+    if task_id is None:
+        return _error('Task not found', 404)
+
+    if request.method == 'GET':
+        doc = await state.tasks.find_one({'_id': task_id, 'user_id': user_id})
+        if doc is None:
+            return _error('Task not found', 404)
+        return _json_response(document_to_representation(doc))
+
+    if request.method == 'DELETE':
+        before = await state.tasks.find_one_and_delete(
+            {'_id': task_id, 'user_id': user_id}, projection=list(ROLLUP_FIELDS)
+        )
+        if before is None:
+            return _error('Task not found', 404)
+        await _task_written(state, user_id, before, None)
+        broadcast_task_update(user_id, 'deleted', {'id': str(task_id)})
+        return _json_response(None, status=204)
+
+    data = _parse_body(request)
+    now = datetime.utcnow()
+
+    # Recurring task daily completion: one atomic toggle
+    completion_date = data.get('completion_date')
+    current_status = data.get('status')
+    if completion_date and current_status in ('completed', 'pending', 'in_progress'):
+        try:
+            day = parse_completion_date(completion_date)
+        except ValueError as e:
+            return _error(str(e), 400)
+        completed = current_status == 'completed'
+        before = await state.tasks.find_one_and_update(
+            {'_id': task_id, 'user_id': user_id, 'is_recurring': True},
+            completion_update(day, completed, now),
+            return_document=ReturnDocument.BEFORE
+        )
+        if before is not None:
+            after = apply_completion(before, day, completed, now)
+            await _task_written(state, user_id, before, after)
+            representation = document_to_representation(after)
+            broadcast_task_update(user_id, 'updated', representation, before=document_to_representation(before))
+            return _json_response(representation)
+        # Not a recurring task: handle as a regular update
+
+    serializer = TaskSerializer(data=data, partial=request.method == 'PATCH')
+    serializer.is_valid(raise_exception=True)
+    changes = {key: storage_value(value) for key, value in serializer.validated_data.items()}
+
+    # The priority depends on both ratings; read the current ones if only one changes
+    current = {}
+    if ('urgency' in changes) != ('importance' in changes):
+        current = await state.tasks.find_one(
+            {'_id': task_id, 'user_id': user_id}, {'urgency': 1, 'importance': 1}
+        )
+        if current is None:
+            return _error('Task not found', 404)
+    changes = _priority_changes(changes, current)
+    changes['updated_at'] = now
+
+    before = await state.tasks.find_one_and_update(
+        {'_id': task_id, 'user_id': user_id},
+        {'$set': changes},
+        return_document=ReturnDocument.BEFORE
+    )
+    if before is None:
+        return _error('Task not found', 404)
+    after = {**before, **changes}
+    await _task_written(state, user_id, before, after)
+    representation = document_to_representation(after)
+    broadcast_task_update(user_id, 'updated', representation, before=document_to_representation(before))
+    return _json_response(representation)
+
+
+@async_task_view(['GET'])
+@async_listing(clock=True)
+async def daily_tasks(request, user):
+    """Daily-only tasks due on the user's local day (?tz=, ?date=, ?fields=)"""
+    fields = parse_fields_param(request.GET.get('fields'))
+    try:
+        day_start, day_end = local_day_bounds(request.GET.get('tz'), request.GET.get('date'))
+    except ValueError as e:
+        return _error(str(e), 400)
+
+    docs = await _state().tasks.find({
+        'user_id': str(user.id),
+        'task_type': 'daily',
+        'due_date': {'$gte': day_start, '$lt': day_end},
+    }, _projection(fields)).to_list()
+    return _json_response([document_to_representation(doc, fields) for doc in docs])
+
+
+@async_task_view(['GET'])
+@async_listing(clock=True)
+async def monthly_tasks(request, user):
+    """Monthly tasks due in ?year=&month=, plus recurring tasks active in it (?fields=)"""
+    fields = parse_fields_param(request.GET.get('fields'))
+    year = int(request.GET.get('year', datetime.now().year))
+    month = int(request.GET.get('month', datetime.now().month))
+
+    first_day, last_day = month_bounds(year, month)
+    docs = await _state().tasks.find(
+        monthly_match(str(user.id), first_day, last_day), _projection(fields)
+    ).sort('due_date', 1).limit(500).to_list()
+    return _json_response([document_to_representation(doc, fields) for doc in docs])
+
+
+@async_task_view(['GET'])
+@async_listing(clock=True, cache=False)
+async def analytics(request, user):
+    """Monthly analytics: the rollup document plus live aggregation of recurring tasks"""
+    state = _state()
+    user_id = str(user.id)
+    year = int(request.GET.get('year', datetime.now().year))
+    month = int(request.GET.get('month', datetime.now().month))
+
+    first_day, last_day = month_bounds(year, month)
+    read_preference = analytics_read_preference()
+    stats_collection = state.stats.with_options(read_preference=read_preference)
+    tasks_collection = state.tasks.with_options(read_preference=read_preference)
+
+    stats, facets = await asyncio.gather(
+        stats_collection.find_one({'_id': stats_id(user_id, year, month)}),
+        _aggregate_one(tasks_collection, analytics_pipeline(recurring_match(user_id, first_day, last_day))),
+    )
+    if stats is None:
+        stats = await sync_to_async(rebuild_month, thread_sensitive=False)(user_id, year, month)
+    counts = merge_counts(stats_counts(stats), facets_to_counts(facets or {}))
+    return _json_response(summarize(counts, year, month))
+
+
+async def _aggregate_one(collection, pipeline):
+    """First document of an aggregation, or None"""
+    cursor = await collection.aggregate(pipeline)
+    async for doc in cursor:
+        return doc
+    return None
@@ -0,0 +1,240 @@
+"""
+Process-wide WebSocket broadcast dispatcher.
+
+Views and background workers hand messages to publish(), which only
+enqueues them. A single background thread runs one asyncio event loop that
+drains the queue in batches and sends each batch to the channel layer
+concurrently. This replaces one thread and one event loop per broadcast.
+The queue is bounded; when it is full new messages are dropped and
+counted, because real-time updates are best effort.
+
+Messages to the same group are sent in publish order; different groups are
+sent concurrently. An optional prepare hook runs once per batch in a
+worker thread before sending (used to assign event sequence numbers).
+"""
+import asyncio
+import atexit
+import logging
+import threading
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class BroadcastDispatcher:
+    """Single background event loop forwarding messages to channel groups"""
+
+    def __init__(self, queue_size=10000, batch_size=100, prepare=None, name='ws-broadcast'):
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.prepare = prepare
+        self.name = name
+        self._loop = None
+        self._queue = None
+        self._thread = None
+        self._started = threading.Event()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            'published': 0,
+            'sent': 0,
+            'dropped': 0,
+            'failed': 0,
+            'batches': 0,
+            'latency_ms_total': 0.0,
+            'latency_ms_max': 0.0,
+        }
+
+    def _count(self, name, amount=1):
+        with self._stats_lock:
+            self._stats[name] += amount
+
+    def _start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+        self._started.wait()
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._started.set()
+        self._loop.run_until_complete(self._consume())
+        self._loop.close()
+
+    def publish(self, group: str, message: dict) -> bool:
+        """
+        Queue a group_send from any thread without blocking.
+        Returns False if the message was dropped.
+        """
+        if self._closed:
+            self._count('dropped')
+            return False
+        self._start()
+        self._count('published')
+        try:
+            self._loop.call_soon_threadsafe(self._enqueue, (group, message, time.monotonic()))
+        except RuntimeError:
+            # Loop already stopped (interpreter shutting down)
+            self._count('dropped')
+            return False
+        return True
+
+    def _enqueue(self, item):
+        try:
+            self._queue.put_nowait(item)
+        except asyncio.QueueFull:
+            self._count('dropped')
+
+    async def _consume(self):
+        from channels.layers import get_channel_layer
+
+        channel_layer = get_channel_layer()
+        while True:
+            item = await self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            stop = False
+            while len(batch) < self.batch_size and not self._queue.empty():
+                next_item = self._queue.get_nowait()
+                if next_item is None:
+                    stop = True
+                    break
+                batch.append(next_item)
+
+            await self._send_batch(channel_layer, batch)
+            if stop:
+                return
+
+    async def _send_batch(self, channel_layer, batch):
+        self._count('batches')
+        if channel_layer is None:
+            # No CHANNEL_LAYERS configured; real-time updates are disabled
+            self._count('dropped', len(batch))
+            return
+
+        if self.prepare is not None:
+            try:
+                await asyncio.get_running_loop().run_in_executor(
+                    None, self.prepare, [(group, message) for group, message, _ in batch]
+                )
+            except Exception as e:
+                # Still deliver; clients resync when they see unsequenced events
+                logger.warning('Broadcast prepare hook failed: %s', e)
+
+        by_group = {}
+        for item in batch:
+            by_group.setdefault(item[0], []).append(item)
+        await asyncio.gather(*(
+            self._send_group(channel_layer, items) for items in by_group.values()
+        ))
+
+    async def _send_group(self, channel_layer, items):
+        for group, message, enqueued_at in items:
+            try:
+                await channel_layer.group_send(group, message)
+            except Exception as e:
+                self._count('failed')
+                logger.debug('WebSocket broadcast failed: %s', e)
+                continue
+            latency_ms = (time.monotonic() - enqueued_at) * 1000
+            with self._stats_lock:
+                self._stats['sent'] += 1
+                self._stats['latency_ms_total'] += latency_ms
+                self._stats['latency_ms_max'] = max(self._stats['latency_ms_max'], latency_ms)
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        return {
+            'queue_depth': self._queue.qsize() if self._queue is not None else 0,
+            'published': stats['published'],
+            'sent': stats['sent'],
+            'dropped': stats['dropped'],
+            'failed': stats['failed'],
+            'batches': stats['batches'],
+            'avg_latency_ms': round(stats['latency_ms_total'] / stats['sent'], 2) if stats['sent'] else 0,
+            'max_latency_ms': round(stats['latency_ms_max'], 2),
+        }
+
+    def shutdown(self, timeout=None):
+        """Flush queued messages and stop the loop"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+        if thread is None:
+            return
+
+        def stop():
+            # Wait for space rather than dropping the stop marker
+            asyncio.ensure_future(self._queue.put(None))
+
+        self._loop.call_soon_threadsafe(stop)
+        thread.join(timeout)
+
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_broadcast_dispatcher() -> BroadcastDispatcher:
+    """Process-wide dispatcher configured from settings"""
+    global _dispatcher
+    if _dispatcher is None:
+        with _dispatcher_lock:
+            if _dispatcher is None:
+                from .events import assign_sequences
+                
+                _dispatcher = BroadcastDispatcher(
+                    queue_size=getattr(settings, 'WS_BROADCAST_QUEUE_SIZE', 10000),
+                    batch_size=getattr(settings, 'WS_BROADCAST_BATCH_SIZE', 100),
+                    prepare=assign_sequences,
+                )
+                atexit.register(
+                    _dispatcher.shutdown,
+                    timeout=getattr(settings, 'WS_BROADCAST_SHUTDOWN_TIMEOUT', 5)
+                )
+    return _dispatcher
+
+
+def broadcast_task_update(user_id: str, action: str, task_dict: dict, before: dict = None) -> bool:
+    """
+    Send a task_update event to all of a user's sockets (non-blocking).
+    For updates, pass the task's representation before the change as
+    `before` to send only the changed fields.
+    """
+    message = {
+        'type': 'task_update',
+        'user_id': user_id,
+        'action': action,
+        'task': task_dict,
+        'delta': False,
+    }
+    if action == 'updated' and before is not None:
+        from .events import task_delta
+        
+        message['task'] = task_delta(before, task_dict)
+        message['delta'] = True
+    return get_broadcast_dispatcher().publish(f'user_{user_id}', message)
+
+
+def broadcast_task_bulk(user_id: str, action: str, tasks: list, delta: bool = False) -> bool:
+    """Send one sequenced event covering many tasks (bulk create/update/delete)"""
+    if not tasks:
+        return True
+    return get_broadcast_dispatcher().publish(f'user_{user_id}', {
+        'type': 'task_bulk',
+        'user_id': user_id,
+        'action': action,
+        'tasks': tasks,
+        'delta': delta,
+    })
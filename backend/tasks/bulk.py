@@ -0,0 +1,195 @@
+"""
+Bulk task operations.
+
+Each operation validates every item with TaskSerializer and writes all
+valid items with one insert_many / bulk_write / delete_many. It returns
+one result per input item, so partial failures are reported item by item
+instead of failing the whole request.
+"""
+from datetime import datetime, timezone
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from mongoengine.errors import ValidationError as MongoValidationError
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from .models import Task
+from .priority_calculator import calculate_priority_quadrant, calculate_priority_score
+from .serializers import TaskSerializer, document_to_representation
+
+
+def storage_value(value):
+    """Store datetimes as naive UTC with millisecond precision, the way MongoDB returns them"""
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value.replace(microsecond=value.microsecond // 1000 * 1000)
+    return value
+
+
+def stored_document(task) -> dict:
+    """
+    Raw document for a new Task, with values as a read from MongoDB would
+    return them, so document_to_representation renders it exactly like
+    the stored task
+    """
+    return {key: storage_value(value) for key, value in task.to_mongo().to_dict().items()}
+
+
+def _write_error_indexes(error: BulkWriteError) -> dict:
+    return {
+        write_error['index']: write_error.get('errmsg', 'Write failed')
+        for write_error in error.details.get('writeErrors', [])
+    }
+
+
+def _parse_object_id(value):
+    try:
+        return ObjectId(str(value))
+    except (InvalidId, TypeError):
+        return None
+
+
+def bulk_create_tasks(items: list, context: dict):
+    """
+    Validate and insert many tasks at once.
+    Returns (results, created_docs) where created_docs are the raw inserted documents.
+    """
+    results = [None] * len(items)
+    documents = []
+    positions = []  # index into items for each document
+
+    for index, item in enumerate(items):
+        serializer = TaskSerializer(data=item, context=context)
+        if not serializer.is_valid():
+            results[index] = {'index': index, 'status': 'error', 'errors': serializer.errors}
+            continue
+        task = serializer.build_task(dict(serializer.validated_data))
+        try:
+            task.validate()
+        except MongoValidationError as e:
+            results[index] = {'index': index, 'status': 'error', 'errors': str(e)}
+            continue
+        documents.append(stored_document(task))
+        positions.append(index)
+
+    failed = {}
+    if documents:
+        try:
+            Task._get_collection().insert_many(documents, ordered=False)
+        except BulkWriteError as e:
+            failed = _write_error_indexes(e)
+
+    created = []
+    for offset, (document, index) in enumerate(zip(documents, positions)):
+        if offset in failed:
+            results[index] = {'index': index, 'status': 'error', 'errors': failed[offset]}
+            continue
+        created.append(document)
+        results[index] = {
+            'index': index,
+            'status': 'created',
+            'task': document_to_representation(document),
+        }
+    return results, created
+
+
+def bulk_update_tasks(items: list, user_id: str, context: dict):
+    """
+    Apply partial updates ({"id": ..., <fields>}) to many of a user's tasks.
+    Returns (results, changes) where changes is a list of (before, after) raw documents.
+    """
+    results = [None] * len(items)
+    object_ids = {}
+    for index, item in enumerate(items):
+        object_id = _parse_object_id(item.get('id')) if isinstance(item, dict) else None
+        if object_id is None:
+            results[index] = {'index': index, 'status': 'error', 'errors': 'A valid task id is required'}
+        else:
+            object_ids[index] = object_id
+
+    existing = {
+        doc['_id']: doc
+        for doc in Task.objects(id__in=list(object_ids.values()), user_id=user_id).as_pymongo()
+    }
+
+    operations = []
+    pending = []  # (index, before, after) for each operation
+    now = datetime.utcnow()
+    for index, object_id in object_ids.items():
+        before = existing.get(object_id)
+        if before is None:
+            results[index] = {'index': index, 'status': 'error', 'errors': 'Task not found'}
+            continue
+
+        data = {key: value for key, value in items[index].items() if key != 'id'}
+        serializer = TaskSerializer(data=data, partial=True, context=context)
+        if not serializer.is_valid():
+            results[index] = {'index': index, 'status': 'error', 'errors': serializer.errors}
+            continue
+
+        changes = {key: storage_value(value) for key, value in serializer.validated_data.items()}
+        if 'urgency' in changes or 'importance' in changes:
+            urgency = changes.get('urgency', before.get('urgency', 2))
+            importance = changes.get('importance', before.get('importance', 2))
+            quadrant = calculate_priority_quadrant(urgency, importance)
+            changes['priority_quadrant'] = quadrant
+            changes['priority_score'] = calculate_priority_score(urgency, importance, quadrant)
+        changes['updated_at'] = now
+
+        operations.append(UpdateOne({'_id': object_id, 'user_id': user_id}, {'$set': changes}))
+        pending.append((index, before, {**before, **changes}))
+
+    failed = {}
+    if operations:
+        try:
+            Task._get_collection().bulk_write(operations, ordered=False)
+        except BulkWriteError as e:
+            failed = _write_error_indexes(e)
+
+    updated = []
+    for offset, (index, before, after) in enumerate(pending):
+        if offset in failed:
+            results[index] = {'index': index, 'status': 'error', 'errors': failed[offset]}
+            continue
+        updated.append((before, after))
+        results[index] = {
+            'index': index,
+            'status': 'updated',
+            'task': document_to_representation(after),
+        }
+    return results, updated
+
+
+def bulk_delete_tasks(ids: list, user_id: str):
+    """
+    Delete many of a user's tasks.
+    Returns (results, deleted_docs) where deleted_docs are the removed raw documents.
+    """
+    results = [None] * len(ids)
+    object_ids = {}
+    for index, value in enumerate(ids):
+        object_id = _parse_object_id(value)
+        if object_id is None:
+            results[index] = {'index': index, 'id': value, 'status': 'error', 'errors': 'Invalid task id'}
+        else:
+            object_ids[index] = object_id
+
+    # Rollup fields are needed to remove the tasks from monthly analytics
+    existing = {
+        doc['_id']: doc
+        for doc in Task.objects(id__in=list(object_ids.values()), user_id=user_id).only(
+            'id', 'user_id', 'urgency', 'importance', 'priority_quadrant',
+            'status', 'task_type', 'is_recurring', 'due_date'
+        ).as_pymongo()
+    }
+    if existing:
+        Task._get_collection().delete_many({'_id': {'$in': list(existing)}, 'user_id': user_id})
+
+    for index, object_id in object_ids.items():
+        if object_id in existing:
+            results[index] = {'index': index, 'id': str(object_id), 'status': 'deleted'}
+        else:
+            results[index] = {'index': index, 'id': str(object_id), 'status': 'error', 'errors': 'Task not found'}
+    return results, list(existing.values())
@@ -0,0 +1,99 @@
+"""
+Compact completion tracking for recurring tasks.
+
+Completed days are stored as one integer per month in completion_bitmap
+('YYYY-MM' -> bits, bit d-1 set for day d), so a task recurring daily for
+years costs 12 small ints per year instead of a growing list of strings.
+
+Toggles are a single atomic find_one_and_update using $bit, so concurrent
+toggles never overwrite each other and cost the same however long the
+series is. Each toggle also $pulls the day from the legacy completed_dates
+list, migrating old data as it is touched; compact_completions migrates
+the rest. Readers merge both via completed_dates().
+"""
+import calendar
+from datetime import date, datetime
+
+from pymongo import ReturnDocument
+
+from .models import Task
+
+
+def parse_completion_date(value) -> date:
+    """date from a YYYY-MM-DD string; ValueError if invalid"""
+    try:
+        return date.fromisoformat(str(value))
+    except ValueError:
+        raise ValueError(f'Invalid completion_date: {value}')
+
+
+def month_key(day: date) -> str:
+    return f'{day.year:04d}-{day.month:02d}'
+
+
+def day_bit(day: date) -> int:
+    return 1 << (day.day - 1)
+
+
+def bitmap_dates(bitmap: dict) -> list:
+    """ISO dates whose bits are set in a completion bitmap"""
+    dates = []
+    for key, bits in (bitmap or {}).items():
+        if not bits:
+            continue
+        year, month = (int(part) for part in key.split('-'))
+        for day in range(1, calendar.monthrange(year, month)[1] + 1):
+            if bits >> (day - 1) & 1:
+                dates.append(f'{key}-{day:02d}')
+    return dates
+
+
+def completed_dates(doc) -> list:
+    """Sorted completed dates of a raw task document or Task, bitmap and legacy list combined"""
+    if isinstance(doc, dict):
+        bitmap, legacy = doc.get('completion_bitmap'), doc.get('completed_dates')
+    else:
+        bitmap, legacy = doc.completion_bitmap, doc.completed_dates
+    return sorted(set(bitmap_dates(bitmap)) | set(legacy or []))
+
+
+def completion_update(day: date, completed: bool, now=None) -> dict:
+    """Atomic update setting or clearing one day's completion bit"""
+    bit = day_bit(day)
+    operation = {'or': bit} if completed else {'and': ~bit}
+    return {
+        '$bit': {f'completion_bitmap.{month_key(day)}': operation},
+        '$pull': {'completed_dates': day.isoformat()},
+        '$set': {'updated_at': now or datetime.utcnow()},
+    }
+
+
+def apply_completion(doc: dict, day: date, completed: bool, now: datetime) -> dict:
+    """The document completion_update() produces from doc, computed locally"""
+    key = month_key(day)
+    bitmap = dict(doc.get('completion_bitmap') or {})
+    bits = bitmap.get(key, 0)
+    bitmap[key] = bits | day_bit(day) if completed else bits & ~day_bit(day)
+    return {
+        **doc,
+        'completion_bitmap': bitmap,
+        'completed_dates': [value for value in (doc.get('completed_dates') or []) if value != day.isoformat()],
+        'updated_at': now,
+    }
+
+
+def toggle_completion(task_id, user_id: str, day: date, completed: bool):
+    """
+    Mark a recurring task completed (or not) on a day in one round trip.
+    Returns (before, after) raw documents, or None when the user has no such
+    recurring task.
+    """
+    now = datetime.utcnow()
+    before = Task._get_collection().find_one_and_update(
+        {'_id': task_id, 'user_id': user_id, 'is_recurring': True},
+        completion_update(day, completed, now),
+        return_document=ReturnDocument.BEFORE
+    )
+    if before is None:
+        return None
+    return before, apply_completion(before, day, completed, now)
@@ -1,11 +1,55 @@
+import asyncio
 import json
+from collections import OrderedDict, deque
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
+from django.conf import settings
 from django.contrib.auth.models import User
+from .events import event_frame, events_since, expand_frame
+
+# How many recently delivered sequence numbers each socket remembers, so
+# events arriving both live and through a resume replay are sent once
+RECENT_SEQ_WINDOW = 1000
+
+
+def merge_frames(existing, new):
+    """
+    Combine two task_update frames for the same task into one, or None when
+    they cancel out (created then deleted within the window).
+    """
+    if new['action'] == 'deleted':
+        return None if existing['action'] == 'created' else new
+    if existing['action'] == 'deleted':
+        return new
+    if new.get('delta'):
+        # Fold the changed fields into what is already pending
+        merged = dict(existing)
+        merged['task'] = {**existing['task'], **new['task']}
+        merged['seq'] = new.get('seq')
+    else:
+        merged = dict(new)
+    if existing['action'] == 'created':
+        # The client has not seen the task yet; keep it a full creation
+        merged['action'] = 'created'
+        merged['delta'] = False
+    return merged
 
 
 class TaskConsumer(AsyncWebsocketConsumer):
-    """WebSocket consumer for real-time task updates"""
+    """
+    WebSocket consumer for real-time task updates.
+    
+    Protocol: task_update frames carry a per-user "seq"; updates set
+    "delta": true and include only the changed fields. After reconnecting,
+    a client sends {"type": "resume", "last_seq": n} and receives the
+    missed frames, or {"type": "resync", "seq": current} if they are no
+    longer buffered and it must refetch its task list.
+    
+    Updates arriving within WS_COALESCE_WINDOW_MS are merged per task and
+    sent as one {"type": "task_batch", "seq": latest, "events": [...]}
+    frame; a window left with a single event is sent as a plain
+    task_update carrying the window's latest seq.
+    """
     
     async def connect(self):
         """Handle WebSocket connection"""
@@ -17,6 +61,12 @@ class TaskConsumer(AsyncWebsocketConsumer):
         
         self.user_id = str(self.user.id)
         self.group_name = f'user_{self.user_id}'
+        self.recent_seqs = set()
+        self.recent_seq_order = deque()
+        self.coalesce_window = getattr(settings, 'WS_COALESCE_WINDOW_MS', 50) / 1000
+        self.pending = OrderedDict()  # task id -> merged frame
+        self.pending_seq = None
+        self.flush_handle = None
         
         # Join user's group
         await self.channel_layer.group_add(
@@ -28,6 +78,9 @@ class TaskConsumer(AsyncWebsocketConsumer):
     
     async def disconnect(self, close_code):
         """Handle WebSocket disconnection"""
+        if getattr(self, 'flush_handle', None) is not None:
+            self.flush_handle.cancel()
+            self.flush_handle = None
         if hasattr(self, 'group_name'):
             await self.channel_layer.group_discard(
                 self.group_name,
@@ -45,14 +98,102 @@ class TaskConsumer(AsyncWebsocketConsumer):
                 await self.send(text_data=json.dumps({
                     'type': 'pong'
                 }))
+            elif message_type == 'resume':
+                await self.resume(data.get('last_seq'))
         except json.JSONDecodeError:
             pass
     
+    def _mark_sent(self, seq) -> bool:
+        """Remember a delivered sequence number; False if it was already sent"""
+        if seq is None:
+            return True
+        if seq in self.recent_seqs:
+            return False
+        self.recent_seqs.add(seq)
+        self.recent_seq_order.append(seq)
+        if len(self.recent_seq_order) > RECENT_SEQ_WINDOW:
+            self.recent_seqs.discard(self.recent_seq_order.popleft())
+        return True
+    
+    async def resume(self, last_seq):
+        """Replay events after last_seq, or ask the client to resync"""
+        try:
+            last_seq = int(last_seq) if last_seq is not None else None
+        except (TypeError, ValueError):
+            last_seq = None
+        
+        frames, current_seq, complete = await database_sync_to_async(events_since)(self.user_id, last_seq)
+        if not complete:
+            await self.send(text_data=json.dumps({
+                'type': 'resync',
+                'seq': current_seq
+            }))
+            return
+        
+        # Replayed events go out together with anything already pending
+        for frame in frames:
+            if self._mark_sent(frame.get('seq')):
+                for task_frame in expand_frame(frame):
+                    self._queue_frame(task_frame)
+        await self.flush_pending()
+    
+    def _queue_frame(self, frame):
+        task_id = frame.get('task', {}).get('id')
+        seq = frame.get('seq')
+        if seq is not None:
+            self.pending_seq = seq if self.pending_seq is None else max(self.pending_seq, seq)
+        
+        existing = self.pending.pop(task_id, None)
+        merged = frame if existing is None else merge_frames(existing, frame)
+        if merged is not None:
+            # Re-insert so the batch lists tasks in order of their latest event
+            self.pending[task_id] = merged
+    
+    async def flush_pending(self):
+        """Send everything queued in the current window"""
+        if self.flush_handle is not None:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+        frames = list(self.pending.values())
+        seq = self.pending_seq
+        self.pending.clear()
+        self.pending_seq = None
+        
+        if len(frames) == 1:
+            # Events that cancelled out still advance the client's sequence
+            frame = frames[0] if seq is None else {**frames[0], 'seq': seq}
+            await self.send(text_data=json.dumps(frame))
+        elif frames or seq is not None:
+            # Events that cancelled out still advance the client's sequence
+            await self.send(text_data=json.dumps({
+                'type': 'task_batch',
+                'seq': seq,
+                'events': frames
+            }))
+    
+    def _schedule_flush(self):
+        if self.flush_handle is None:
+            loop = asyncio.get_running_loop()
+            self.flush_handle = loop.call_later(
+                self.coalesce_window,
+                lambda: asyncio.ensure_future(self.flush_pending())
+            )
+    
     async def task_update(self, event):
-        """Send task update to WebSocket"""
-        await self.send(text_data=json.dumps({
-            'type': 'task_update',
-            'action': event['action'],
-            'task': event['task']
-        }))
-
+        """Send task update to WebSocket, coalescing bursts within the window"""
+        if not self._mark_sent(event.get('seq')):
+            return
+        frame = event_frame(event)
+        if self.coalesce_window <= 0:
+            await self.send(text_data=json.dumps(frame))
+            return
+        self._queue_frame(frame)
+        self._schedule_flush()
+    
+    async def task_bulk(self, event):
+        """Send a bulk operation's tasks as one batch frame"""
+        if not self._mark_sent(event.get('seq')):
+            return
+        for frame in expand_frame(event_frame(event)):
+            self._queue_frame(frame)
+        await self.flush_pending()
@@ -0,0 +1,79 @@
+"""
+Strong ETags for a user's task listings.
+
+The tag is derived from the user's task list version (list_cache), plus
+the request path and query string. Every task write bumps the version
+through tasks_changed, so an unchanged tag means the listing is unchanged
+and the view can answer 304 without querying or serializing. Reading the
+version is a single point lookup, however many tasks the user has.
+"""
+import functools
+import hashlib
+from datetime import datetime
+
+from rest_framework import status
+from rest_framework.response import Response
+
+from .list_cache import get_task_list_cache
+
+# Browsers may store listings but must revalidate them with If-None-Match
+CACHE_CONTROL = 'private, no-cache'
+
+
+def task_list_etag(user_id: str, full_path: str, variant: str = '') -> str:
+    version = get_task_list_cache().version(user_id)
+    payload = f"{user_id}|{version}|{full_path}|{variant}"
+    return '"%s"' % hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def etag_matches(request, etag: str) -> bool:
+    """True if the request's If-None-Match header lists this ETag"""
+    header = request.META.get('HTTP_IF_NONE_MATCH')
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    return etag in (tag.strip() for tag in header.split(','))
+
+
+def _clock_bucket():
+    """Current UTC time truncated to 15 minutes (every UTC offset is a multiple of it)"""
+    now = datetime.utcnow()
+    return now.replace(minute=now.minute - now.minute % 15, second=0, microsecond=0).isoformat()
+
+
+def conditional_listing(view_method=None, *, clock=False):
+    """
+    Decorate a TaskViewSet listing method with ETag / If-None-Match handling.
+    The ETag is computed before the listing is read, so a write racing the
+    read can only make the client refetch, never keep stale data.
+    
+    Use clock=True for endpoints that default to "today" or "this month", so
+    their ETags also roll over when the date does.
+    """
+    if view_method is None:
+        return functools.partial(conditional_listing, clock=clock)
+    
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        variant = getattr(request.accepted_renderer, 'format', '')
+        if clock:
+            variant = f'{variant}|{_clock_bucket()}'
+        try:
+            etag = task_list_etag(str(request.user.id), request.get_full_path(), variant)
+        except Exception:
+            # Let the view report the database problem itself
+            return view_method(self, request, *args, **kwargs)
+        
+        if etag_matches(request, etag):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={
+                'ETag': etag,
+                'Cache-Control': CACHE_CONTROL,
+            })
+        
+        response = view_method(self, request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            response['ETag'] = etag
+            response['Cache-Control'] = CACHE_CONTROL
+        return response
+    return wrapper
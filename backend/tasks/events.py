@@ -0,0 +1,145 @@
+"""
+Sequenced task events for the WebSocket protocol.
+
+Every task_update a user receives carries a per-user, monotonically
+increasing sequence number. Updates carry only the fields that changed.
+Sent events are kept in a bounded replay buffer (the task_events
+collection, trimmed to WS_REPLAY_BUFFER_SIZE per user and expired by TTL).
+A reconnecting socket can send {"type": "resume", "last_seq": n} and
+receive just what it missed. It is told to resync only when the buffer no
+longer reaches back to n.
+"""
+import logging
+from collections import defaultdict
+from datetime import datetime
+
+from django.conf import settings
+from pymongo import ReturnDocument
+
+from .models import TaskEvent, TaskEventCounter
+
+logger = logging.getLogger(__name__)
+
+
+def replay_buffer_size() -> int:
+    return getattr(settings, 'WS_REPLAY_BUFFER_SIZE', 500)
+
+
+def task_delta(before: dict, after: dict) -> dict:
+    """Fields of a task representation that changed, always including id"""
+    changes = {'id': after['id']}
+    for field, value in after.items():
+        if before.get(field) != value:
+            changes[field] = value
+    return changes
+
+
+def event_frame(message: dict) -> dict:
+    """Client-facing frame for a channel-layer task event message"""
+    frame = {
+        'type': message['type'],
+        'seq': message.get('seq'),
+        'action': message['action'],
+    }
+    if 'task' in message:
+        frame['task'] = message['task']
+        frame['delta'] = message.get('delta', False)
+    if 'tasks' in message:
+        # Bulk operations: one sequenced event covering many tasks
+        frame['tasks'] = message['tasks']
+        frame['delta'] = message.get('delta', False)
+    return frame
+
+
+def expand_frame(frame: dict) -> list:
+    """Split a bulk (task_bulk) frame into per-task task_update frames"""
+    if 'tasks' not in frame:
+        return [frame]
+    return [
+        {
+            'type': 'task_update',
+            'seq': frame.get('seq'),
+            'action': frame['action'],
+            'task': task,
+            'delta': frame.get('delta', False),
+        }
+        for task in frame['tasks']
+    ]
+
+
+def assign_sequences(messages: list):
+    """
+    Give each (group, message) a per-user sequence number and store it in the
+    replay buffer. Runs off the event loop, once per dispatcher batch: one
+    $inc reserves a contiguous range per user and one insert_many stores them.
+    """
+    by_user = defaultdict(list)
+    for _, message in messages:
+        if message.get('user_id'):
+            by_user[message['user_id']].append(message)
+
+    counters = TaskEventCounter._get_collection()
+    events = []
+    trim = []
+    buffer_size = replay_buffer_size()
+    now = datetime.utcnow()
+
+    for user_id, user_messages in by_user.items():
+        counter = counters.find_one_and_update(
+            {'_id': user_id},
+            {'$inc': {'seq': len(user_messages)}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        last_seq = counter['seq']
+        first_seq = last_seq - len(user_messages) + 1
+        for seq, message in enumerate(user_messages, start=first_seq):
+            message['seq'] = seq
+            events.append({
+                'user_id': user_id,
+                'seq': seq,
+                'action': message['action'],
+                'payload': event_frame(message),
+                'created_at': now,
+            })
+        # Trim roughly every tenth of the buffer to keep deletes infrequent
+        step = max(1, buffer_size // 10)
+        if last_seq > buffer_size and (first_seq - 1) // step != last_seq // step:
+            trim.append((user_id, last_seq - buffer_size))
+
+    if events:
+        TaskEvent._get_collection().insert_many(events, ordered=False)
+    for user_id, cutoff in trim:
+        TaskEvent._get_collection().delete_many({'user_id': user_id, 'seq': {'$lte': cutoff}})
+
+
+def current_sequence(user_id: str) -> int:
+    counter = TaskEventCounter._get_collection().find_one({'_id': user_id})
+    return counter['seq'] if counter else 0
+
+
+def events_since(user_id: str, last_seq):
+    """
+    Return (frames, current_seq, complete). complete is False when the events
+    after last_seq are no longer all in the replay buffer, in which case the
+    client has to refetch its task list.
+    """
+    current = current_sequence(user_id)
+    if last_seq is None or last_seq > current:
+        return [], current, False
+    if last_seq == current:
+        return [], current, True
+    if current - last_seq > replay_buffer_size():
+        return [], current, False
+
+    docs = list(TaskEvent._get_collection().find(
+        {'user_id': user_id, 'seq': {'$gt': last_seq}},
+        {'payload': 1, 'seq': 1}
+    ).sort('seq', 1))
+
+    # Expired or trimmed events leave gaps; so can events whose sequence was
+    # reserved but not yet written, which are delivered live shortly after
+    expected = range(last_seq + 1, last_seq + 1 + len(docs))
+    if not docs or docs[0]['seq'] != last_seq + 1 or [doc['seq'] for doc in docs] != list(expected):
+        return [], current, False
+    return [doc['payload'] for doc in docs], current, True
@@ -0,0 +1,254 @@
+"""
+Read-through cache of task listing responses.
+
+Entries are keyed by user, the user's task list version, the request path
+and query string, and the renderer format. Every write path bumps the
+user's version, so older entries are never read again and simply age out.
+Invalidation never has to find or delete them.
+
+Backends, chosen with TASK_LIST_CACHE_BACKEND:
+- 'local' (default): response data in an in-process LRU; versions in the
+  task_list_versions collection, so a write in one worker invalidates
+  every worker. A hit costs one point read by _id and no serialization.
+- 'django': data and versions in a Django cache alias (e.g. Redis) shared
+  by all workers; a hit never touches MongoDB.
+- 'none': response caching disabled. Versions are still kept in MongoDB,
+  since the listing ETags (etags.py) are derived from them.
+"""
+import functools
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from pymongo import UpdateOne
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import TaskListVersion
+
+logger = logging.getLogger(__name__)
+
+
+class ListCache:
+    """Shared key building and metrics; subclasses store versions and entries"""
+
+    def __init__(self, ttl=300):
+        self.ttl = ttl
+        self._stats_lock = threading.Lock()
+        self._counters = {'hits': 0, 'misses': 0, 'stores': 0, 'invalidations': 0, 'errors': 0}
+
+    def _count(self, name, amount=1):
+        with self._stats_lock:
+            self._counters[name] += amount
+
+    def version(self, user_id: str) -> int:
+        raise NotImplementedError
+
+    def _bump(self, user_ids: list):
+        raise NotImplementedError
+
+    def _load(self, key: str):
+        raise NotImplementedError
+
+    def _store(self, key: str, data):
+        raise NotImplementedError
+
+    def bump(self, *user_ids):
+        """Invalidate the given users' cached listings (call after every task write)"""
+        user_ids = [str(user_id) for user_id in dict.fromkeys(user_ids) if user_id]
+        if not user_ids:
+            return
+        try:
+            self._bump(user_ids)
+            self._count('invalidations', len(user_ids))
+        except Exception as e:
+            # Entries still expire after the TTL
+            logger.warning('Task list cache invalidation failed: %s', e)
+            self._count('errors')
+
+    def get(self, user_id: str, variant: str):
+        """Return (key, cached data or None); key is None if the cache is unavailable"""
+        try:
+            key = f'tasks:list:{user_id}:{self.version(user_id)}:{variant}'
+            data = self._load(key)
+        except Exception as e:
+            logger.warning('Task list cache lookup failed: %s', e)
+            self._count('errors')
+            return None, None
+        self._count('hits' if data is not None else 'misses')
+        return key, data
+
+    def set(self, key: str, data):
+        try:
+            self._store(key, data)
+            self._count('stores')
+        except Exception as e:
+            logger.warning('Task list cache store failed: %s', e)
+            self._count('errors')
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {'backend': self.name, **self._counters}
+
+
+class LocalListCache(ListCache):
+    """In-process LRU of response data with versions kept in MongoDB"""
+
+    name = 'local'
+
+    def __init__(self, max_entries=1000, ttl=300):
+        super().__init__(ttl)
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def version(self, user_id):
+        doc = TaskListVersion._get_collection().find_one({'_id': user_id}, {'version': 1})
+        return doc['version'] if doc else 0
+
+    def _bump(self, user_ids):
+        TaskListVersion._get_collection().bulk_write([
+            UpdateOne({'_id': user_id}, {'$inc': {'version': 1}}, upsert=True)
+            for user_id in user_ids
+        ], ordered=False)
+
+    def _load(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            data, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return data
+
+    def _store(self, key, data):
+        with self._lock:
+            self._entries[key] = (data, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        stats = super().stats()
+        with self._lock:
+            stats['entries'] = len(self._entries)
+        return stats
+
+
+class DjangoListCache(ListCache):
+    """Response data and versions in a shared Django cache alias"""
+
+    name = 'django'
+
+    def __init__(self, alias='default', ttl=300):
+        super().__init__(ttl)
+        self.alias = alias
+
+    @property
+    def cache(self):
+        from django.core.cache import caches
+
+        return caches[self.alias]
+
+    def _version_key(self, user_id):
+        return f'tasks:list-version:{user_id}'
+
+    def version(self, user_id):
+        cache = self.cache
+        version = cache.get(self._version_key(user_id))
+        if version is None:
+            # Start evicted or new counters from the clock, so they never
+            # fall back onto versions whose entries may still be cached
+            cache.add(self._version_key(user_id), time.time_ns() // 1000, None)
+            version = cache.get(self._version_key(user_id), 0)
+        return version
+
+    def _bump(self, user_ids):
+        cache = self.cache
+        for user_id in user_ids:
+            try:
+                cache.incr(self._version_key(user_id))
+            except ValueError:
+                # No counter yet: nothing can be cached under it
+                cache.add(self._version_key(user_id), time.time_ns() // 1000, None)
+
+    def _load(self, key):
+        return self.cache.get(key)
+
+    def _store(self, key, data):
+        self.cache.set(key, data, self.ttl)
+
+
+class NullListCache(LocalListCache):
+    """Response caching disabled; versions are still kept for ETags"""
+
+    name = 'none'
+
+    def __init__(self):
+        super().__init__(max_entries=0)
+
+    def get(self, user_id, variant):
+        return None, None
+
+    def set(self, key, data):
+        pass
+
+
+_list_cache = None
+_list_cache_lock = threading.Lock()
+
+
+def get_task_list_cache() -> ListCache:
+    """Process-wide task list cache configured from settings"""
+    global _list_cache
+    if _list_cache is None:
+        with _list_cache_lock:
+            if _list_cache is None:
+                backend = getattr(settings, 'TASK_LIST_CACHE_BACKEND', 'local')
+                ttl = getattr(settings, 'TASK_LIST_CACHE_TTL', 300)
+                if backend == 'django':
+                    _list_cache = DjangoListCache(getattr(settings, 'TASK_LIST_CACHE_ALIAS', 'default'), ttl)
+                elif backend == 'local':
+                    _list_cache = LocalListCache(getattr(settings, 'TASK_LIST_CACHE_SIZE', 1000), ttl)
+                else:
+                    _list_cache = NullListCache()
+    return _list_cache
+
+
+def tasks_changed(*user_ids):
+    """Invalidate cached task listings after a write"""
+    get_task_list_cache().bump(*user_ids)
+
+
+def cached_listing(view_method=None, *, clock=False):
+    """
+    Decorate a TaskViewSet listing method with the read-through cache.
+    Only non-empty 200 responses are stored (list answers [] on database
+    errors). Use clock=True for endpoints that default
+    to "today" or "this month", like etags.conditional_listing.
+    """
+    if view_method is None:
+        return functools.partial(cached_listing, clock=clock)
+
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        from .etags import _clock_bucket
+
+        cache = get_task_list_cache()
+        variant = f"{request.get_full_path()}|{getattr(request.accepted_renderer, 'format', '')}"
+        if clock:
+            variant = f'{variant}|{_clock_bucket()}'
+        key, data = cache.get(str(request.user.id), variant)
+        if data is not None:
+            return Response(data)
+
+        response = view_method(self, request, *args, **kwargs)
+        if key is not None and response.status_code == status.HTTP_200_OK and response.data:
+            cache.set(key, response.data)
+        return response
+    return wrapper
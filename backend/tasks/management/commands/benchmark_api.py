@@ -0,0 +1,337 @@
+import hashlib
+import io
+import json
+import random
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from unittest import mock
+from urllib.parse import urlsplit, urlunsplit
+
+import numpy as np
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from mongoengine import connect, disconnect
+from mongoengine.base.common import _document_registry
+from mongoengine.connection import get_db
+from rest_framework.test import APIRequestFactory, force_authenticate
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+from tasks import list_cache
+from tasks.analysis_executor import get_analysis_executor
+from tasks.mongo_metrics import client_options
+from tasks.priority_calculator import calculate_priority_quadrant, calculate_priority_score
+from tasks.views import TaskViewSet
+
+ENDPOINTS = ('list', 'create', 'update', 'monthly_tasks', 'analytics', 'daily_tasks')
+INSERT_BATCH_SIZE = 5000
+STATUSES = ('pending', 'pending', 'in_progress', 'completed', 'cancelled')
+
+
+def percentile_summary(durations, errors, elapsed) -> dict:
+    """Latency percentiles (ms) and throughput for one endpoint"""
+    values = np.asarray(durations) * 1000
+    p50, p95, p99 = np.percentile(values, [50, 95, 99]) if len(values) else (0, 0, 0)
+    return {
+        'requests': len(values),
+        'errors': errors,
+        'p50_ms': round(float(p50), 3),
+        'p95_ms': round(float(p95), 3),
+        'p99_ms': round(float(p99), 3),
+        'mean_ms': round(float(values.mean()), 3) if len(values) else 0,
+        'max_ms': round(float(values.max()), 3) if len(values) else 0,
+        'throughput_rps': round(len(values) / elapsed, 2) if elapsed else 0,
+    }
+
+
+def fake_analysis(latency):
+    """
+    Stand-ins for the AI analysis functions: sleep for `latency` seconds per
+    call and derive a stable rating from the description.
+    """
+    def rate(description):
+        digest = hashlib.sha256((description or '').encode()).digest()
+        return {
+            'urgency': digest[0] % 4 + 1,
+            'importance': digest[1] % 4 + 1,
+            'context': 'benchmark',
+        }
+
+    def analyze_task(description):
+        time.sleep(latency)
+        return rate(description)
+
+    def analyze_tasks(descriptions):
+        time.sleep(latency)
+        return [rate(description) for description in descriptions]
+
+    return analyze_task, analyze_tasks
+
+
+def synthetic_task(rng, user_id, now, daily_ratio, recurring_ratio):
+    """One tasks collection document with a realistic spread of fields"""
+    urgency, importance = rng.randint(1, 4), rng.randint(1, 4)
+    quadrant = calculate_priority_quadrant(urgency, importance)
+    created_at = now - timedelta(seconds=rng.randint(0, 365 * 24 * 3600))
+    doc = {
+        'title': f'Task {rng.getrandbits(32):08x}',
+        'description': rng.choice((
+            'Prepare the quarterly report', 'Call the supplier about the invoice',
+            'Review pull requests', 'Book flights for the conference',
+            'Renew the domain name', 'Clean up the shared drive',
+        )),
+        'user_id': user_id,
+        'urgency': urgency,
+        'importance': importance,
+        'priority_quadrant': quadrant,
+        'priority_score': calculate_priority_score(urgency, importance, quadrant),
+        'status': rng.choice(STATUSES),
+        'created_at': created_at,
+        'updated_at': created_at,
+        'task_type': 'monthly',
+        'is_recurring': False,
+        'recurrence_pattern': None,
+        'recurrence_days': [],
+        'recurrence_end_date': None,
+        'due_date': None,
+        'due_time': None,
+        'parent_task_id': None,
+        'completed_dates': [],
+        'completion_bitmap': {},
+    }
+    roll = rng.random()
+    if roll < recurring_ratio:
+        pattern = rng.choice(('daily', 'weekly', 'monthly'))
+        doc.update({
+            'is_recurring': True,
+            'recurrence_pattern': pattern,
+            'recurrence_days': (
+                sorted(rng.sample(range(7), rng.randint(1, 3))) if pattern == 'weekly'
+                else sorted(rng.sample(range(1, 29), rng.randint(1, 3))) if pattern == 'monthly'
+                else []
+            ),
+            'due_date': now - timedelta(days=rng.randint(0, 180)),
+            'recurrence_end_date': rng.choice((None, now + timedelta(days=rng.randint(1, 365)))),
+            'due_time': f'{rng.randint(6, 20):02d}:00',
+        })
+    elif roll < recurring_ratio + daily_ratio:
+        doc.update({
+            'task_type': 'daily',
+            'due_date': now + timedelta(days=rng.randint(-30, 30), minutes=rng.randint(0, 24 * 60)),
+        })
+    elif rng.random() < 0.9:
+        doc['due_date'] = now + timedelta(days=rng.randint(-180, 180), minutes=rng.randint(0, 24 * 60))
+    return doc
+
+
+class Command(BaseCommand):
+    help = ('Benchmark the task API against synthetic data in a separate MongoDB database '
+            'and print latency percentiles and throughput as JSON')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000],
+                            help='Tasks per user to benchmark; each size is seeded from scratch')
+        parser.add_argument('--users', type=int, default=1,
+                            help='Users seeded with the same number of tasks (requests use the first)')
+        parser.add_argument('--daily-ratio', type=float, default=0.3, help='Share of daily tasks')
+        parser.add_argument('--recurring-ratio', type=float, default=0.1, help='Share of recurring tasks')
+        parser.add_argument('--requests', type=int, default=200, help='Requests per endpoint')
+        parser.add_argument('--warmup', type=int, default=10, help='Untimed requests per endpoint')
+        parser.add_argument('--concurrency', type=int, default=1, help='Requests in flight per endpoint')
+        parser.add_argument('--endpoints', nargs='+', choices=ENDPOINTS, default=list(ENDPOINTS))
+        parser.add_argument('--ai-latency-ms', type=float, default=500,
+                            help='Latency injected into each fake AI analysis call')
+        parser.add_argument('--list-cache', action='store_true',
+                            help='Keep the task list cache on (off by default, so reads hit MongoDB)')
+        parser.add_argument('--database', default=None,
+                            help='Benchmark database (default: <MONGODB_DB_NAME>_benchmark); it is dropped')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--keep-data', action='store_true', help='Leave the last dataset in place')
+        parser.add_argument('--output', default=None, help='Write the JSON report here instead of stdout')
+
+    def handle(self, *args, **options):
+        mongodb = settings.MONGODB_SETTINGS
+        uri_database = urlsplit(mongodb['host']).path.strip('/') if str(mongodb.get('host', '')).startswith('mongodb') else ''
+        configured = uri_database or mongodb.get('db') or 'agathees_db'
+        database = options['database'] or f'{configured}_benchmark'
+        if database == configured:
+            raise CommandError('Refusing to benchmark against the application database')
+        if options['daily_ratio'] + options['recurring_ratio'] > 1:
+            raise CommandError('--daily-ratio and --recurring-ratio add up to more than 1')
+
+        self._connect(database)
+        if not options['list_cache']:
+            list_cache._list_cache = list_cache.NullListCache()
+
+        analyze_task, analyze_tasks = fake_analysis(options['ai_latency_ms'] / 1000)
+        report = {
+            'meta': {
+                'commit': self._commit(),
+                'started_at': datetime.utcnow().isoformat() + 'Z',
+                'database': database,
+                'python': sys.version.split()[0],
+                **{key: options[key] for key in (
+                    'users', 'daily_ratio', 'recurring_ratio', 'requests', 'warmup',
+                    'concurrency', 'ai_latency_ms', 'list_cache', 'seed',
+                )},
+            },
+            'results': [],
+        }
+        with mock.patch('tasks.ai_service.analyze_task', analyze_task), \
+                mock.patch('tasks.views.analyze_task_coalesced', analyze_task), \
+                mock.patch('tasks.views.analyze_tasks', analyze_tasks):
+            try:
+                for size in options['sizes']:
+                    report['results'].append(self._run_size(size, options))
+            finally:
+                # Queued analyses must finish while the fake is still patched
+                # in and before their database is dropped
+                get_analysis_executor().drain()
+                if not options['keep_data']:
+                    get_db().client.drop_database(database)
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + '\n')
+            self.stderr.write(self.style.SUCCESS(f'Wrote {options["output"]}'))
+        else:
+            self.stdout.write(output)
+
+    def _connect(self, database):
+        """Point the default mongoengine alias at the benchmark database"""
+        mongodb = settings.MONGODB_SETTINGS
+        options = client_options(mongodb)
+        disconnect('default')
+        if str(mongodb.get('host', '')).startswith('mongodb'):
+            # A database in the URI path would take precedence over db=
+            scheme, netloc, _, query, fragment = urlsplit(mongodb['host'])
+            connect(db=database, host=urlunsplit((scheme, netloc, '/', query, fragment)),
+                    alias='default', **options)
+        else:
+            connect(
+                db=database,
+                host=mongodb.get('host', 'localhost'),
+                port=mongodb.get('port', 27017),
+                username=mongodb.get('username') or None,
+                password=mongodb.get('password') or None,
+                alias='default',
+                **options
+            )
+        # Documents cache their collection handle from the previous connection
+        for document in _document_registry.values():
+            document._collection = None
+
+    def _commit(self):
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True, cwd=settings.BASE_DIR
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    def _seed(self, size, options):
+        db = get_db()
+        db.client.drop_database(db.name)
+        rng = random.Random(f"{options['seed']}:{size}")
+        now = datetime.utcnow().replace(microsecond=0)
+        collection = db['tasks']
+        user_ids = [f'bench-{index}' for index in range(options['users'])]
+
+        started = time.perf_counter()
+        for user_id in user_ids:
+            batch = []
+            for _ in range(size):
+                batch.append(synthetic_task(rng, user_id, now, options['daily_ratio'], options['recurring_ratio']))
+                if len(batch) >= INSERT_BATCH_SIZE:
+                    collection.insert_many(batch, ordered=False)
+                    batch = []
+            if batch:
+                collection.insert_many(batch, ordered=False)
+        # Same indexes and analytics rollups as production
+        call_command('sync_task_indexes', stdout=io.StringIO())
+        call_command('rebuild_monthly_stats', stdout=io.StringIO())
+        seed_seconds = time.perf_counter() - started
+
+        task_ids = [str(doc['_id']) for doc in collection.find({'user_id': user_ids[0]}, {'_id': 1})]
+        return user_ids[0], task_ids, seed_seconds
+
+    def _run_size(self, size, options):
+        self.stderr.write(f'Seeding {options["users"]} x {size} tasks...')
+        user_id, task_ids, seed_seconds = self._seed(size, options)
+        user = TokenUser({api_settings.USER_ID_CLAIM: user_id})
+        host = next((h for h in settings.ALLOWED_HOSTS if h not in ('', '*') and not h.startswith('.')), 'localhost')
+        factory = APIRequestFactory(SERVER_NAME=host)
+        rng = random.Random(options['seed'])
+        now = datetime.now()
+
+        list_view = TaskViewSet.as_view({'get': 'list', 'post': 'create'})
+        detail_view = TaskViewSet.as_view({'patch': 'partial_update'})
+        month = {'year': now.year, 'month': now.month}
+
+        def call(view, request, **kwargs):
+            force_authenticate(request, user=user)
+            response = view(request, **kwargs)
+            response.render()
+            return response
+
+        requests = {
+            'list': lambda i: call(list_view, factory.get('/api/tasks/')),
+            'create': lambda i: call(list_view, factory.post('/api/tasks/', {
+                'title': f'Benchmark task {i}',
+                'description': f'Benchmark task number {i}',
+                'task_type': 'monthly',
+                'due_date': (now + timedelta(days=i % 28)).isoformat(),
+            }, format='json')),
+            'update': lambda i: call(detail_view, factory.patch(
+                f'/api/tasks/{task_ids[i % len(task_ids)]}/',
+                {'status': ('pending', 'in_progress', 'completed')[i % 3]}, format='json'
+            ), pk=task_ids[i % len(task_ids)]),
+            'monthly_tasks': lambda i: call(
+                TaskViewSet.as_view({'get': 'monthly_tasks'}), factory.get('/api/tasks/monthly_tasks/', month)
+            ),
+            'analytics': lambda i: call(
+                TaskViewSet.as_view({'get': 'analytics'}), factory.get('/api/tasks/analytics/', month)
+            ),
+            'daily_tasks': lambda i: call(
+                TaskViewSet.as_view({'get': 'daily_tasks'}), factory.get('/api/tasks/daily_tasks/')
+            ),
+        }
+        # Spread updates over the whole collection rather than its first pages
+        rng.shuffle(task_ids)
+
+        endpoints = {}
+        for name in options['endpoints']:
+            self.stderr.write(f'  {name}')
+            endpoints[name] = self._measure(requests[name], options)
+        return {'tasks_per_user': size, 'seed_seconds': round(seed_seconds, 3), 'endpoints': endpoints}
+
+    def _measure(self, make_request, options):
+        for i in range(options['warmup']):
+            make_request(i)
+
+        def timed(i):
+            started = time.perf_counter()
+            response = make_request(options['warmup'] + i)
+            return time.perf_counter() - started, response.status_code >= 400
+
+        started = time.perf_counter()
+        if options['concurrency'] > 1:
+            with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+                samples = list(pool.map(timed, range(options['requests'])))
+        else:
+            samples = [timed(i) for i in range(options['requests'])]
+        elapsed = time.perf_counter() - started
+        # Background analyses queued by create would otherwise compete with
+        # the next endpoint's timings and outlive the seeded database
+        get_analysis_executor().drain()
+
+        return percentile_summary(
+            [duration for duration, _ in samples],
+            sum(1 for _, failed in samples if failed),
+            elapsed,
+        )
@@ -0,0 +1,73 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from pymongo import UpdateOne
+
+from tasks.completions import day_bit, month_key, parse_completion_date
+from tasks.models import Task
+
+BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = 'Move legacy completed_dates lists into per-month completion bitmaps'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', dest='user_id', default=None, help='Only compact this user\'s tasks')
+        parser.add_argument('--dry-run', action='store_true', help='Report what would change without writing')
+
+    def handle(self, *args, **options):
+        query = {'completed_dates__0__exists': True}
+        if options['user_id']:
+            query['user_id'] = options['user_id']
+
+        collection = Task._get_collection()
+        operations = []
+        tasks = dates = skipped = raced = 0
+
+        def flush(operations):
+            nonlocal raced
+            result = collection.bulk_write(operations, ordered=False)
+            raced += len(operations) - result.matched_count
+
+        for doc in Task.objects(**query).only('completed_dates').as_pymongo():
+            bitmap = defaultdict(int)
+            moved = []
+            for value in doc.get('completed_dates') or []:
+                try:
+                    day = parse_completion_date(value)
+                except ValueError:
+                    # Leave unparseable entries in the legacy list
+                    skipped += 1
+                    continue
+                bitmap[month_key(day)] |= day_bit(day)
+                moved.append(value)
+            if not moved:
+                continue
+
+            tasks += 1
+            dates += len(moved)
+            if options['dry_run']:
+                continue
+            # $bit or merges with any bits toggled since the document was read.
+            # A toggle that un-completed a legacy date pulled it from the list;
+            # the $all filter then skips the task rather than OR the bit back in
+            operations.append(UpdateOne({'_id': doc['_id'], 'completed_dates': {'$all': moved}}, {
+                '$bit': {f'completion_bitmap.{key}': {'or': bits} for key, bits in bitmap.items()},
+                '$pull': {'completed_dates': {'$in': moved}},
+            }))
+            if len(operations) >= BATCH_SIZE:
+                flush(operations)
+                operations = []
+
+        if operations:
+            flush(operations)
+
+        prefix = 'Would compact' if options['dry_run'] else 'Compacted'
+        self.stdout.write(self.style.SUCCESS(
+            f'{prefix} {dates} completion dates on {tasks} tasks ({skipped} unparseable entries left)'
+        ))
+        if raced:
+            self.stdout.write(self.style.WARNING(
+                f'{raced} tasks changed while compacting and were skipped; run the command again'
+            ))
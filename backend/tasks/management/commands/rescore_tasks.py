@@ -0,0 +1,87 @@
+from datetime import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from pymongo import UpdateOne
+
+from tasks.list_cache import tasks_changed
+from tasks.models import Task
+from tasks.priority_calculator import calculate_priority_quadrant, calculate_priority_score
+from tasks.priority_model import get_priority_model
+from tasks.rollups import apply_rollup_updates, build_rollup_updates
+
+
+class Command(BaseCommand):
+    help = 'Rescore tasks offline with the local priority classifier'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', dest='user_id', default=None, help='Only rescore this user\'s tasks')
+        parser.add_argument('--min-confidence', type=float, default=None,
+                            help='Skip predictions below this confidence '
+                                 '(defaults to PRIORITY_MODEL_MIN_CONFIDENCE)')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true', help='Report changes without writing them')
+
+    def handle(self, *args, **options):
+        model = get_priority_model()
+        if model is None:
+            raise CommandError('No trained priority model found; run train_priority_model first')
+
+        min_confidence = options['min_confidence']
+        if min_confidence is None:
+            min_confidence = settings.PRIORITY_MODEL_MIN_CONFIDENCE
+
+        query = {'description__nin': [None, '']}
+        if options['user_id']:
+            query['user_id'] = options['user_id']
+        # Rollup fields are needed to move monthly analytics counters along with the ratings
+        docs = Task.objects(**query).only(
+            'id', 'user_id', 'description', 'urgency', 'importance', 'priority_quadrant',
+            'status', 'task_type', 'is_recurring', 'due_date'
+        ).as_pymongo()
+
+        collection = Task._get_collection()
+        scanned = changed = 0
+        batch = []
+        changed_users = set()
+
+        def flush(batch):
+            nonlocal changed
+            predictions = model.predict([doc['description'] for doc in batch])
+            operations = []
+            rollup_operations = []
+            for doc, prediction in zip(batch, predictions):
+                if prediction['confidence'] < min_confidence:
+                    continue
+                urgency, importance = prediction['urgency'], prediction['importance']
+                if urgency == doc.get('urgency') and importance == doc.get('importance'):
+                    continue
+                quadrant = calculate_priority_quadrant(urgency, importance)
+                changes = {
+                    'urgency': urgency,
+                    'importance': importance,
+                    'priority_quadrant': quadrant,
+                    'priority_score': calculate_priority_score(urgency, importance, quadrant),
+                    'updated_at': datetime.utcnow(),
+                }
+                operations.append(UpdateOne({'_id': doc['_id']}, {'$set': changes}))
+                changed_users.add(doc['user_id'])
+                rollup_operations.extend(build_rollup_updates(doc, {**doc, **changes}))
+            changed += len(operations)
+            if operations and not options['dry_run']:
+                collection.bulk_write(operations, ordered=False)
+                apply_rollup_updates(rollup_operations)
+
+        for doc in docs:
+            scanned += 1
+            batch.append(doc)
+            if len(batch) >= options['batch_size']:
+                flush(batch)
+                batch = []
+        if batch:
+            flush(batch)
+        if not options['dry_run']:
+            tasks_changed(*changed_users)
+
+        verb = 'Would update' if options['dry_run'] else 'Updated'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {changed} of {scanned} tasks'))
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+
+from tasks.models import Task
+
+# Single-field indexes from the original schema; every query now leads with
+# user_id, so these are either unused or covered by a compound index prefix.
+LEGACY_INDEXES = ('user_id_1', 'priority_score_1', 'created_at_1', 'due_date_1', 'is_recurring_1',
+                  # ETags now come from the task list version instead of scanning this
+                  'user_updated')
+
+
+class Command(BaseCommand):
+    help = 'Build the compound Task indexes online and drop the redundant single-field ones'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Show what would change without touching indexes')
+        parser.add_argument('--keep-legacy', action='store_true', help='Build new indexes but keep the old single-field ones')
+
+    def handle(self, *args, **options):
+        collection = Task._get_collection()
+        existing = collection.index_information()
+        dry_run = options['dry_run']
+
+        # Build new indexes before dropping old ones so queries always have an index
+        for spec in Task._meta['index_specs']:
+            spec = dict(spec)
+            fields = spec.pop('fields')
+            spec.pop('cls', None)
+            name = spec.get('name')
+            if name in existing:
+                self.stdout.write(f'Index {name} already exists')
+                continue
+            self.stdout.write(f'Building index {name} on {fields}...')
+            if not dry_run:
+                # background=True keeps pre-4.2 servers from locking the collection;
+                # newer servers build online regardless
+                collection.create_index(fields, background=True, **spec)
+
+        if options['keep_legacy']:
+            return
+
+        for name in LEGACY_INDEXES:
+            if name in existing:
+                self.stdout.write(f'Dropping unused index {name}')
+                if not dry_run:
+                    collection.drop_index(name)
+
+        self.stdout.write(self.style.SUCCESS('Task indexes are in sync'))
@@ -0,0 +1,65 @@
+import random
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks.models import Task
+from tasks.priority_model import PriorityModel
+
+
+class Command(BaseCommand):
+    help = 'Train the local urgency/importance classifier from stored task ratings'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default=None, help='Model path (defaults to PRIORITY_MODEL_PATH)')
+        parser.add_argument('--epochs', type=int, default=20)
+        parser.add_argument('--learning-rate', type=float, default=2.0)
+        parser.add_argument('--min-samples', type=int, default=200,
+                            help='Refuse to train on fewer labelled tasks than this')
+        parser.add_argument('--holdout', type=float, default=0.1,
+                            help='Fraction of samples held out to report accuracy')
+        parser.add_argument('--include-defaults', action='store_true',
+                            help='Also train on tasks still at the default 2/2 rating, '
+                                 'which are usually unanalyzed rather than genuinely rated')
+
+    def handle(self, *args, **options):
+        output = options['output'] or settings.PRIORITY_MODEL_PATH
+
+        # Raw documents: no need to hydrate Task objects for training data
+        docs = Task.objects(description__nin=[None, '']).only(
+            'description', 'urgency', 'importance'
+        ).as_pymongo()
+
+        samples = []
+        for doc in docs:
+            urgency = doc.get('urgency', 2)
+            importance = doc.get('importance', 2)
+            if not options['include_defaults'] and urgency == 2 and importance == 2:
+                continue
+            samples.append((doc['description'], urgency, importance))
+
+        if len(samples) < options['min_samples']:
+            raise CommandError(
+                f"Only {len(samples)} labelled tasks found; need at least {options['min_samples']}"
+            )
+
+        random.Random(0).shuffle(samples)
+        n_holdout = int(len(samples) * options['holdout'])
+        holdout, training = samples[:n_holdout], samples[n_holdout:]
+
+        self.stdout.write(f'Training on {len(training)} tasks ({len(holdout)} held out)...')
+        descriptions, urgency, importance = zip(*training)
+        model = PriorityModel().fit(
+            descriptions, urgency, importance,
+            epochs=options['epochs'],
+            learning_rate=options['learning_rate'],
+        )
+
+        if holdout:
+            accuracy = model.accuracy(*zip(*holdout))
+            self.stdout.write(
+                f"Holdout accuracy: urgency {accuracy['urgency']:.1%}, importance {accuracy['importance']:.1%}"
+            )
+
+        model.save(output)
+        self.stdout.write(self.style.SUCCESS(f'Saved priority model to {output}'))
@@ -1,4 +1,4 @@
-from mongoengine import Document, StringField, IntField, DateTimeField, ReferenceField, BooleanField, ListField
+from mongoengine import Document, StringField, IntField, DateTimeField, ReferenceField, BooleanField, ListField, DictField
 from datetime import datetime
 from mongoengine import connect, disconnect
 from django.conf import settings
@@ -33,11 +33,23 @@ class Task(Document):
     due_date = DateTimeField(default=None)  # Due date for the task
     due_time = StringField(default=None)  # Due time in HH:MM format
     parent_task_id = StringField(default=None)  # For generated instances of recurring tasks
-    completed_dates = ListField(StringField(), default=list)  # ISO dates (YYYY-MM-DD) for completion logic in recurring tasks
+    completed_dates = ListField(StringField(), default=list)  # Legacy ISO dates (YYYY-MM-DD); migrated into completion_bitmap
+    completion_bitmap = DictField()  # 'YYYY-MM' -> int, bit (day - 1) set when the task was completed that day
     
     meta = {
         'collection': 'tasks',
-        'indexes': ['user_id', 'priority_score', 'created_at', 'due_date', 'is_recurring'],
+        # Compound indexes match the real query shapes: every query is scoped to
+        # user_id first, then sorts or ranges over the remaining fields.
+        # Built by `manage.py sync_task_indexes` rather than on first use.
+        'indexes': [
+            # list: keyset pagination over (-priority_score, -created_at, -_id)
+            {'fields': ['user_id', '-priority_score', '-created_at', '-id'], 'name': 'user_priority_created'},
+            # daily_tasks / monthly_tasks / analytics: due_date ranges per task type
+            {'fields': ['user_id', 'task_type', 'due_date'], 'name': 'user_type_due'},
+            # monthly_tasks / analytics: recurring tasks still active in a month
+            {'fields': ['user_id', 'task_type', 'is_recurring', 'recurrence_end_date'], 'name': 'user_type_recurring_end'},
+        ],
+        'auto_create_index': False,
         'ordering': ['-priority_score', '-created_at']
     }
     
@@ -48,3 +60,103 @@ class Task(Document):
     
     def __str__(self):
         return self.title
+
+
+class AnalysisCacheEntry(Document):
+    """Persisted AI analysis result keyed by a hash of the normalized description"""
+    key = StringField(required=True, unique=True)  # sha256(prompt version + normalized description)
+    urgency = IntField(required=True, min_value=1, max_value=4)
+    importance = IntField(required=True, min_value=1, max_value=4)
+    context = StringField(default='')
+    created_at = DateTimeField(default=datetime.utcnow)
+    
+    meta = {
+        'collection': 'analysis_cache',
+        'indexes': [
+            # TTL index: MongoDB removes entries once they are older than the configured lifetime
+            {'fields': ['created_at'], 'expireAfterSeconds': getattr(settings, 'AI_ANALYSIS_CACHE_TTL', 30 * 24 * 3600)},
+        ]
+    }
+
+
+class AnalysisJob(Document):
+    """Status of an asynchronous reanalyze request"""
+    task_id = StringField(required=True)
+    user_id = StringField(required=True)
+    status = StringField(default='queued', choices=['queued', 'running', 'completed', 'failed'])
+    active = BooleanField(default=True)  # True while queued/running; enforces one in-flight job per task
+    result = DictField(default=None)
+    error = StringField(default=None)
+    created_at = DateTimeField(default=datetime.utcnow)
+    started_at = DateTimeField(default=None)
+    finished_at = DateTimeField(default=None)
+    
+    meta = {
+        'collection': 'analysis_jobs',
+        'indexes': [
+            # At most one in-flight job per task (single-flight across processes)
+            {'fields': ['task_id'], 'unique': True, 'partialFilterExpression': {'active': True}},
+            # Job records are only needed for polling shortly after the request
+            {'fields': ['created_at'], 'expireAfterSeconds': 24 * 3600},
+        ]
+    }
+
+
+class TaskMonthlyStats(Document):
+    """
+    Incrementally maintained analytics rollup for one user's month.
+    Covers non-recurring monthly tasks bucketed by due date; counters are
+    updated with atomic $inc deltas on every task write (see rollups.py).
+    """
+    id = StringField(primary_key=True)  # "<user_id>:<YYYY>-<MM>"
+    user_id = StringField(required=True)
+    year = IntField(required=True)
+    month = IntField(required=True)
+    total = IntField(default=0)
+    urgency_sum = IntField(default=0)
+    importance_sum = IntField(default=0)
+    status = DictField()  # status -> count
+    quadrant = DictField()  # priority quadrant -> count
+    daily = DictField()  # YYYY-MM-DD -> count
+    updated_at = DateTimeField(default=datetime.utcnow)
+    
+    meta = {
+        'collection': 'task_monthly_stats',
+        'indexes': [
+            {'fields': ['user_id', 'year', 'month'], 'unique': True},
+        ]
+    }
+
+
+class TaskEventCounter(Document):
+    """Per-user monotonically increasing WebSocket event sequence"""
+    id = StringField(primary_key=True)  # user_id
+    seq = IntField(default=0)
+    
+    meta = {'collection': 'task_event_counters'}
+
+
+class TaskEvent(Document):
+    """Replay buffer entry: a sequenced task event as it was sent to sockets"""
+    user_id = StringField(required=True)
+    seq = IntField(required=True)
+    action = StringField(required=True)
+    payload = DictField()  # the task_update frame without its 'type'
+    created_at = DateTimeField(default=datetime.utcnow)
+    
+    meta = {
+        'collection': 'task_events',
+        'indexes': [
+            {'fields': ['user_id', 'seq'], 'unique': True},
+            # Old events expire even for users who never write again
+            {'fields': ['created_at'], 'expireAfterSeconds': getattr(settings, 'WS_REPLAY_TTL', 24 * 3600)},
+        ]
+    }
+
+
+class TaskListVersion(Document):
+    """Per-user task list version, bumped on every write (see list_cache.py)"""
+    id = StringField(primary_key=True)  # user_id
+    version = IntField(default=0)
+    
+    meta = {'collection': 'task_list_versions'}
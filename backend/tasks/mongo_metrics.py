@@ -0,0 +1,164 @@
+"""
+MongoDB connection pool metrics and client options.
+
+PoolMetrics is a pymongo ConnectionPoolListener. client_options() gives
+each client its own instance, registered under a name: 'sync' for the
+mongoengine connection made in TasksConfig.ready, 'async' for the
+AsyncMongoClient of the async views. It counts checkouts, how long they
+waited for a free connection, and checkouts that failed because the pool
+stayed exhausted past waitQueueTimeoutMS. A high max_checked_out close to
+maxPoolSize, or any exhausted checkouts, means that pool is too small for
+its concurrency. health_check reports each pool separately.
+"""
+import threading
+
+from pymongo import ReadPreference, monitoring
+
+# MONGODB_SETTINGS keys passed straight through to MongoClient
+CLIENT_OPTION_KEYS = (
+    'maxPoolSize', 'minPoolSize', 'maxIdleTimeMS', 'waitQueueTimeoutMS',
+    'connectTimeoutMS', 'socketTimeoutMS', 'serverSelectionTimeoutMS',
+    'compressors', 'appname',
+)
+
+READ_PREFERENCES = {
+    'primary': ReadPreference.PRIMARY,
+    'primaryPreferred': ReadPreference.PRIMARY_PREFERRED,
+    'secondary': ReadPreference.SECONDARY,
+    'secondaryPreferred': ReadPreference.SECONDARY_PREFERRED,
+    'nearest': ReadPreference.NEAREST,
+}
+
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    """Thread-safe counters fed by pymongo connection pool events"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {
+            'connections_created': 0,
+            'connections_closed': 0,
+            'checkouts': 0,
+            'checkout_failures': 0,
+            'pool_exhausted': 0,
+            'pool_cleared': 0,
+            'checked_out': 0,
+            'max_checked_out': 0,
+            'wait_ms_total': 0.0,
+            'wait_ms_max': 0.0,
+        }
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._stats[name] += amount
+
+    def _record_wait(self, event):
+        # duration (seconds) is reported by pymongo 4.7+
+        duration = getattr(event, 'duration', None)
+        if duration is None:
+            return
+        wait_ms = duration * 1000
+        self._stats['wait_ms_total'] += wait_ms
+        self._stats['wait_ms_max'] = max(self._stats['wait_ms_max'], wait_ms)
+
+    def connection_created(self, event):
+        self._count('connections_created')
+
+    def connection_closed(self, event):
+        self._count('connections_closed')
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            stats = self._stats
+            stats['checkouts'] += 1
+            stats['checked_out'] += 1
+            stats['max_checked_out'] = max(stats['max_checked_out'], stats['checked_out'])
+            self._record_wait(event)
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self._stats['checkout_failures'] += 1
+            if event.reason == monitoring.ConnectionCheckOutFailedReason.TIMEOUT:
+                self._stats['pool_exhausted'] += 1
+            self._record_wait(event)
+
+    def connection_checked_in(self, event):
+        self._count('checked_out', -1)
+
+    def pool_cleared(self, event):
+        self._count('pool_cleared')
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+        waits = stats['checkouts'] + stats['checkout_failures']
+        return {
+            'connections_open': stats['connections_created'] - stats['connections_closed'],
+            'connections_created': stats['connections_created'],
+            'checked_out': stats['checked_out'],
+            'max_checked_out': stats['max_checked_out'],
+            'checkouts': stats['checkouts'],
+            'checkout_failures': stats['checkout_failures'],
+            'pool_exhausted': stats['pool_exhausted'],
+            'pool_cleared': stats['pool_cleared'],
+            'avg_wait_ms': round(stats['wait_ms_total'] / waits, 3) if waits else 0,
+            'max_wait_ms': round(stats['wait_ms_max'], 3),
+        }
+
+
+_pool_metrics = {}
+_pool_metrics_lock = threading.Lock()
+
+
+def client_options(mongodb_settings: dict, name: str = 'sync') -> dict:
+    """
+    MongoClient keyword arguments from MONGODB_SETTINGS, skipping unset
+    values, with a fresh PoolMetrics listener registered under `name`.
+    A client created again under the same name (e.g. after a reconnect)
+    replaces the previous one's metrics.
+    """
+    options = {
+        key: mongodb_settings[key]
+        for key in CLIENT_OPTION_KEYS
+        if mongodb_settings.get(key) not in (None, '')
+    }
+    metrics = PoolMetrics()
+    with _pool_metrics_lock:
+        _pool_metrics[name] = metrics
+    options['event_listeners'] = [metrics]
+    return options
+
+
+def pool_stats() -> dict:
+    """{client name: pool metrics} for every registered client"""
+    with _pool_metrics_lock:
+        pools = dict(_pool_metrics)
+    return {name: metrics.stats() for name, metrics in pools.items()}
+
+
+def analytics_read_preference():
+    """Read preference for analytics queries (MONGODB_SETTINGS['analytics_read_preference'])"""
+    from django.conf import settings
+
+    name = settings.MONGODB_SETTINGS.get('analytics_read_preference') or 'primary'
+    return READ_PREFERENCES.get(name, ReadPreference.PRIMARY)
+
+
+def analytics_collection(document):
+    """A Document's collection with the analytics read preference applied"""
+    return document._get_collection().with_options(read_preference=analytics_read_preference())
@@ -0,0 +1,169 @@
+"""
+Keyset (cursor) pagination for task listings.
+
+Tasks are ordered by (-priority_score, -created_at, -_id). A cursor encodes
+the sort key of the boundary task, and the next page is fetched with a
+range filter on that key instead of skip/limit, so every page is an index
+seek no matter how deep the client has scrolled.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from django.conf import settings
+from rest_framework.exceptions import ValidationError
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+MAX_PAGE_SIZE = 200
+
+# Sort used for listings; the trailing _id makes every position unique
+ORDERING = ('-priority_score', '-created_at', '-id')
+
+
+def _sort_key(item):
+    """(priority_score, created_at, _id) of a Task object or raw document"""
+    if isinstance(item, dict):
+        return item.get('priority_score', 0), item.get('created_at'), item['_id']
+    return item.priority_score, item.created_at, item.id
+
+
+def encode_cursor(item, direction: str) -> str:
+    score, created_at, object_id = _sort_key(item)
+    payload = {
+        'p': score,
+        'c': created_at.isoformat() if created_at else None,
+        'i': str(object_id),
+        'd': direction,
+    }
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> dict:
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return {
+            'priority_score': int(payload['p']),
+            'created_at': datetime.fromisoformat(payload['c']) if payload['c'] else None,
+            '_id': ObjectId(payload['i']),
+            'direction': 'previous' if payload['d'] == 'p' else 'next',
+        }
+    except (ValueError, KeyError, TypeError, InvalidId, binascii.Error):
+        raise ValidationError({'cursor': 'Invalid cursor'})
+
+
+def cursor_filter(position: dict) -> dict:
+    """
+    Raw MongoDB filter selecting tasks strictly after (direction 'next') or
+    strictly before (direction 'previous') the cursor position.
+    """
+    op = '$lt' if position['direction'] == 'next' else '$gt'
+    score = position['priority_score']
+    created_at = position['created_at']
+    object_id = position['_id']
+    return {'$or': [
+        {'priority_score': {op: score}},
+        {'priority_score': score, 'created_at': {op: created_at}},
+        {'priority_score': score, 'created_at': created_at, '_id': {op: object_id}},
+    ]}
+
+
+def page_ordering(direction: str):
+    """Sort for fetching a page; 'previous' pages are read backwards then reversed"""
+    if direction == 'next':
+        return ORDERING
+    return tuple(field.lstrip('-') for field in ORDERING)
+
+
+def mongo_sort(ordering) -> list:
+    """mongoengine-style ordering as a raw driver sort specification"""
+    sort = []
+    for field in ordering:
+        name = field.lstrip('-')
+        sort.append(('_id' if name == 'id' else name, -1 if field.startswith('-') else 1))
+    return sort
+
+
+class TaskCursorPagination:
+    """Cursor pagination returning DRF's {next, previous, results} shape"""
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+
+    def __init__(self, request):
+        self.request = request
+        # DRF requests have query_params; plain Django requests (async API) GET
+        self.query_params = getattr(request, 'query_params', request.GET)
+        self.position = None
+        cursor = self.query_params.get(self.cursor_query_param)
+        if cursor:
+            self.position = decode_cursor(cursor)
+        self.page_size = self._get_page_size()
+
+    def _get_page_size(self):
+        default = getattr(settings, 'REST_FRAMEWORK', {}).get('PAGE_SIZE') or 20
+        try:
+            size = int(self.query_params.get(self.page_size_query_param, default))
+        except ValueError:
+            size = default
+        return max(1, min(size, MAX_PAGE_SIZE))
+
+    @property
+    def direction(self):
+        return self.position['direction'] if self.position else 'next'
+
+    def paginate(self, queryset):
+        """
+        Fetch one page from a mongoengine queryset (objects or as_pymongo()).
+        Returns the page items in listing order.
+        """
+        if self.position:
+            queryset = queryset.filter(__raw__=cursor_filter(self.position))
+        items = list(queryset.order_by(*page_ordering(self.direction)).limit(self.page_size + 1))
+        return self.take_page(items)
+
+    def page_query(self):
+        """(raw filter, sort, limit) for fetching a page with the driver directly; pass the results to take_page()"""
+        raw = cursor_filter(self.position) if self.position else {}
+        return raw, mongo_sort(page_ordering(self.direction)), self.page_size + 1
+
+    def take_page(self, items):
+        """Trim a fetched page (page_size + 1 items) and put it in listing order"""
+        self.has_more = len(items) > self.page_size
+        items = items[:self.page_size]
+        if self.direction == 'previous':
+            items.reverse()
+        self.items = items
+        return items
+
+    def _link(self, item, direction):
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, encode_cursor(item, direction))
+
+    def get_links(self):
+        if not self.items:
+            previous_link = None
+            if self.position:
+                # Paged past the end; let the client go back to the first page
+                previous_link = remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+            return None, previous_link
+
+        if self.direction == 'next':
+            has_next, has_previous = self.has_more, self.position is not None
+        else:
+            has_next, has_previous = True, self.has_more
+
+        next_link = self._link(self.items[-1], 'n') if has_next else None
+        previous_link = self._link(self.items[0], 'p') if has_previous else None
+        return next_link, previous_link
+
+    def get_paginated_data(self, data):
+        next_link, previous_link = self.get_links()
+        return {
+            'next': next_link,
+            'previous': previous_link,
+            'results': data,
+        }
@@ -0,0 +1,203 @@
+"""
+Local urgency/importance classifier.
+
+Two softmax (multinomial logistic) regressions over hashed word and
+character n-grams, trained offline from the ratings already stored on
+Task documents (see the train_priority_model management command).
+Prediction is pure NumPy and vectorized over a batch of descriptions, so
+scoring takes microseconds per task and needs no network call.
+"""
+import os
+import re
+import threading
+import zlib
+
+import numpy as np
+from django.conf import settings
+
+N_CLASSES = 4  # ratings 1-4 map to class indexes 0-3
+DEFAULT_N_FEATURES = 2 ** 16
+
+_WORD_RE = re.compile(r"[a-z0-9']+")
+
+
+def _ngrams(text: str):
+    """Word unigrams/bigrams plus character trigrams of a normalized description"""
+    words = _WORD_RE.findall(text.lower())
+    grams = [f'w:{word}' for word in words]
+    grams.extend(f'b:{first} {second}' for first, second in zip(words, words[1:]))
+    for word in words:
+        padded = f' {word} '
+        grams.extend(f'c:{padded[i:i + 3]}' for i in range(len(padded) - 2))
+    return grams
+
+
+def featurize(descriptions, n_features=DEFAULT_N_FEATURES):
+    """
+    Hash descriptions into a sparse matrix in COO form.
+    Returns (rows, cols, values); each row is L2-normalized.
+    """
+    rows, cols, values = [], [], []
+    for row, description in enumerate(descriptions):
+        grams = _ngrams(description or '')
+        if not grams:
+            continue
+        weight = 1.0 / np.sqrt(len(grams))
+        for gram in grams:
+            # crc32 is stable across processes, unlike the builtin hash()
+            rows.append(row)
+            cols.append(zlib.crc32(gram.encode('utf-8')) % n_features)
+            values.append(weight)
+    return (
+        np.asarray(rows, dtype=np.int64),
+        np.asarray(cols, dtype=np.int64),
+        np.asarray(values, dtype=np.float32),
+    )
+
+
+def _softmax(scores):
+    scores = scores - scores.max(axis=1, keepdims=True)
+    np.exp(scores, out=scores)
+    scores /= scores.sum(axis=1, keepdims=True)
+    return scores
+
+
+class PriorityModel:
+    """Pair of hashed-feature logistic regressions for urgency and importance"""
+
+    def __init__(self, n_features=DEFAULT_N_FEATURES):
+        self.n_features = n_features
+        self.weights = {
+            'urgency': np.zeros((n_features, N_CLASSES), dtype=np.float32),
+            'importance': np.zeros((n_features, N_CLASSES), dtype=np.float32),
+        }
+        self.bias = {
+            'urgency': np.zeros(N_CLASSES, dtype=np.float32),
+            'importance': np.zeros(N_CLASSES, dtype=np.float32),
+        }
+
+    def _scores(self, head, features, n_rows):
+        rows, cols, values = features
+        scores = np.tile(self.bias[head], (n_rows, 1))
+        np.add.at(scores, rows, self.weights[head][cols] * values[:, None])
+        return scores
+
+    def predict_proba(self, descriptions):
+        """Return (urgency_probs, importance_probs), each of shape (n, 4)"""
+        features = featurize(descriptions, self.n_features)
+        n_rows = len(descriptions)
+        return (
+            _softmax(self._scores('urgency', features, n_rows)),
+            _softmax(self._scores('importance', features, n_rows)),
+        )
+
+    def predict(self, descriptions):
+        """
+        Predict ratings for many descriptions at once.
+        Returns a list of {'urgency', 'importance', 'confidence'} dicts where
+        confidence is the lower of the two heads' top-class probabilities.
+        """
+        if not descriptions:
+            return []
+        urgency_probs, importance_probs = self.predict_proba(descriptions)
+        urgency = urgency_probs.argmax(axis=1)
+        importance = importance_probs.argmax(axis=1)
+        confidence = np.minimum(urgency_probs.max(axis=1), importance_probs.max(axis=1))
+        return [
+            {'urgency': int(u) + 1, 'importance': int(i) + 1, 'confidence': float(c)}
+            for u, i, c in zip(urgency, importance, confidence)
+        ]
+
+    def fit(self, descriptions, urgency, importance, epochs=20, learning_rate=2.0,
+            l2=1e-5, batch_size=256, seed=0):
+        """Train both heads with mini-batch gradient descent on the softmax loss"""
+        rng = np.random.default_rng(seed)
+        labels = {
+            'urgency': np.asarray(urgency, dtype=np.int64) - 1,
+            'importance': np.asarray(importance, dtype=np.int64) - 1,
+        }
+        descriptions = list(descriptions)
+        n_samples = len(descriptions)
+
+        for epoch in range(epochs):
+            rate = learning_rate / (1 + epoch * 0.1)
+            order = rng.permutation(n_samples)
+            for start in range(0, n_samples, batch_size):
+                batch = order[start:start + batch_size]
+                features = featurize([descriptions[i] for i in batch], self.n_features)
+                rows, cols, values = features
+                for head in ('urgency', 'importance'):
+                    probs = _softmax(self._scores(head, features, len(batch)))
+                    probs[np.arange(len(batch)), labels[head][batch]] -= 1.0
+                    probs /= len(batch)
+                    grad = np.zeros_like(self.weights[head])
+                    np.add.at(grad, cols, probs[rows] * values[:, None])
+                    grad += l2 * self.weights[head]
+                    self.weights[head] -= rate * grad
+                    self.bias[head] -= rate * probs.sum(axis=0)
+        return self
+
+    def accuracy(self, descriptions, urgency, importance) -> dict:
+        """Per-head accuracy on a labelled sample"""
+        predictions = self.predict(list(descriptions))
+        if not predictions:
+            return {'urgency': 0.0, 'importance': 0.0}
+        return {
+            'urgency': float(np.mean([p['urgency'] == u for p, u in zip(predictions, urgency)])),
+            'importance': float(np.mean([p['importance'] == i for p, i in zip(predictions, importance)])),
+        }
+
+    def save(self, path):
+        # Write to a temp file first so readers never load a half-written model
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez_compressed(
+                f,
+                n_features=np.asarray(self.n_features),
+                urgency_weights=self.weights['urgency'],
+                urgency_bias=self.bias['urgency'],
+                importance_weights=self.weights['importance'],
+                importance_bias=self.bias['importance'],
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            model = cls(n_features=int(data['n_features']))
+            model.weights['urgency'] = data['urgency_weights']
+            model.bias['urgency'] = data['urgency_bias']
+            model.weights['importance'] = data['importance_weights']
+            model.bias['importance'] = data['importance_bias']
+        return model
+
+
+_model = None
+_model_mtime = None
+_model_lock = threading.Lock()
+
+
+def get_priority_model():
+    """
+    Return the trained model, reloading it when the file on disk changes.
+    Returns None when no model has been trained yet.
+    """
+    global _model, _model_mtime
+    path = getattr(settings, 'PRIORITY_MODEL_PATH', None)
+    if not path:
+        return None
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+
+    if mtime != _model_mtime:
+        with _model_lock:
+            if mtime != _model_mtime:
+                try:
+                    _model = PriorityModel.load(path)
+                except Exception as e:
+                    print(f"Failed to load priority model: {str(e)}")
+                    _model = None
+                _model_mtime = mtime
+    return _model
@@ -0,0 +1,191 @@
+"""
+Server-side expansion of recurring tasks into concrete dates.
+
+expand_month() expands every recurring task of a batch for one month at
+once. It builds a (tasks x days) boolean matrix with NumPy datetime64
+arithmetic: date range, weekday and day-of-month tests are each one
+broadcast operation instead of a loop per task per day.
+
+Expansions are cached per (series fields, time zone, month), where the
+series fields are the ones expansion reads: pattern, days, start and end.
+Editing any of them changes the key, so the task is re-expanded and stale
+entries age out of the LRU. Other writes, such as completion toggles,
+leave the key and the cached expansion alone. Tasks with identical
+series share an entry.
+
+Rules, matching what the frontend calendar assumes:
+- a series starts on the local date of due_date (created_at if unset) and
+  ends on the local date of recurrence_end_date, inclusive
+- daily (or no pattern): every day
+- weekly: recurrence_days weekdays (0=Monday), default the start weekday
+- monthly: recurrence_days days of month, default the start day; days past
+  the end of a short month fall on its last day
+"""
+import threading
+from collections import OrderedDict
+from datetime import date, timezone as dt_timezone
+
+import numpy as np
+from django.conf import settings
+
+# 1970-01-01, day 0 of datetime64[D], was a Thursday (Monday=0)
+_EPOCH_WEEKDAY = 3
+_NO_END = np.datetime64('9999-12-31', 'D')
+
+
+def local_date(value, tz=None):
+    """Calendar date of a stored (naive UTC) datetime in a time zone"""
+    if value is None:
+        return None
+    if tz is None:
+        return value.date()
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=dt_timezone.utc)
+    return value.astimezone(tz).date()
+
+
+def month_days(year: int, month: int) -> np.ndarray:
+    """All days of a month as datetime64[D]"""
+    first = np.datetime64(f'{year:04d}-{month:02d}', 'M')
+    return np.arange(first.astype('M8[D]'), (first + 1).astype('M8[D]'))
+
+
+def iter_months(start: date, end: date):
+    """(year, month) pairs covering start..end inclusive"""
+    year, month = start.year, start.month
+    while (year, month) <= (end.year, end.month):
+        yield year, month
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def series_spec(doc: dict, tz=None) -> dict:
+    """Expansion inputs for a raw recurring task document"""
+    start = local_date(doc.get('due_date') or doc.get('created_at'), tz)
+    end = local_date(doc.get('recurrence_end_date'), tz)
+    return {
+        'pattern': doc.get('recurrence_pattern') or 'daily',
+        'days': doc.get('recurrence_days') or [],
+        'start': np.datetime64(start, 'D') if start else _NO_END,
+        'end': np.datetime64(end, 'D') if end else _NO_END,
+    }
+
+
+def series_key(doc: dict) -> tuple:
+    """Cache key part covering every field series_spec() reads"""
+    return (
+        doc.get('recurrence_pattern') or 'daily',
+        tuple(doc.get('recurrence_days') or ()),
+        doc.get('due_date') or doc.get('created_at'),
+        doc.get('recurrence_end_date'),
+    )
+
+
+def expand_month(specs: list, year: int, month: int) -> list:
+    """Occurrence dates (datetime64[D] arrays) of each spec within one month"""
+    if not specs:
+        return []
+    days = month_days(year, month)
+    n_days = len(days)
+    weekdays = (days.astype(np.int64) + _EPOCH_WEEKDAY) % 7
+    month_day = np.arange(1, n_days + 1)
+
+    starts = np.array([spec['start'] for spec in specs], dtype='M8[D]')
+    ends = np.array([spec['end'] for spec in specs], dtype='M8[D]')
+    daily = np.zeros(len(specs), dtype=bool)
+    weekly_table = np.zeros((len(specs), 7), dtype=bool)
+    monthly_table = np.zeros((len(specs), n_days + 1), dtype=bool)
+
+    for row, spec in enumerate(specs):
+        pattern = spec['pattern']
+        if pattern == 'weekly':
+            chosen = [d for d in spec['days'] if 0 <= d <= 6]
+            if not chosen and spec['start'] != _NO_END:
+                chosen = [int((spec['start'].astype(np.int64) + _EPOCH_WEEKDAY) % 7)]
+            weekly_table[row, chosen] = True
+        elif pattern == 'monthly':
+            chosen = [d for d in spec['days'] if 1 <= d <= 31]
+            if not chosen and spec['start'] != _NO_END:
+                chosen = [spec['start'].item().day]
+            monthly_table[row, [min(d, n_days) for d in chosen]] = True
+        else:
+            daily[row] = True
+
+    matches = (
+        daily[:, None]
+        | weekly_table[:, weekdays]
+        | monthly_table[:, month_day]
+    )
+    matches &= (days[None, :] >= starts[:, None]) & (days[None, :] <= ends[:, None])
+    return [days[row] for row in matches]
+
+
+class RecurrenceCache:
+    """LRU of per-task, per-month expansions (tuples of ISO date strings)"""
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {'hits': 0, 'misses': 0}
+
+    def get_many(self, keys):
+        """Cached values for the keys present, as {key: value}"""
+        found = {}
+        with self._lock:
+            for key in keys:
+                value = self._entries.get(key)
+                if value is not None:
+                    self._entries.move_to_end(key)
+                    found[key] = value
+            self._counters['hits'] += len(found)
+            self._counters['misses'] += len(keys) - len(found)
+        return found
+
+    def set_many(self, values: dict):
+        with self._lock:
+            for key, value in values.items():
+                self._entries[key] = value
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'entries': len(self._entries), **self._counters}
+
+
+recurrence_cache = RecurrenceCache(
+    max_entries=getattr(settings, 'RECURRENCE_CACHE_SIZE', 10000)
+)
+
+
+def expand_occurrences(docs: list, start: date, end: date, tz=None, tz_name='') -> dict:
+    """
+    Occurrence dates (ISO strings) of recurring task documents between start
+    and end inclusive, as {task_id: [dates]}. Each month's uncached tasks
+    are expanded together in one expand_month() call.
+    """
+    first, last = start.isoformat(), end.isoformat()
+    occurrences = {str(doc['_id']): [] for doc in docs}
+
+    for year, month in iter_months(start, end):
+        keys = {
+            str(doc['_id']): (series_key(doc), tz_name, year, month)
+            for doc in docs
+        }
+        cached = recurrence_cache.get_many(list(keys.values()))
+        missing = [doc for doc in docs if keys[str(doc['_id'])] not in cached]
+        if missing:
+            expanded = expand_month([series_spec(doc, tz) for doc in missing], year, month)
+            fresh = {
+                keys[str(doc['_id'])]: tuple(str(day) for day in dates)
+                for doc, dates in zip(missing, expanded)
+            }
+            recurrence_cache.set_many(fresh)
+            cached.update(fresh)
+
+        for task_id, key in keys.items():
+            occurrences[task_id].extend(
+                day for day in cached[key] if first <= day <= last
+            )
+    return occurrences
@@ -0,0 +1,29 @@
+"""
+orjson-backed JSON renderer for the tasks API.
+
+Falls back to DRF's JSONRenderer when orjson is not installed.
+"""
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+
+class ORJSONRenderer(JSONRenderer):
+    """Render JSON with orjson, which is several times faster than json.dumps"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+        # Non-string keys occur in breakdowns (e.g. a None quadrant); the DRF
+        # encoder covers types orjson does not know (Decimal, lazy strings, ...)
+        return orjson.dumps(
+            data,
+            default=JSONEncoder().default,
+            option=orjson.OPT_NON_STR_KEYS
+        )
@@ -0,0 +1,220 @@
+"""
+Incremental monthly analytics rollups.
+
+Every task write computes the task's contribution to its month before and
+after the change and applies the difference to the task_monthly_stats
+document with a single atomic $inc upsert. Only non-recurring monthly tasks
+with a due date are rolled up. Recurring tasks span an open-ended range of
+months, so analytics still aggregates those live; there are few of them.
+"""
+import logging
+from collections import defaultdict
+from datetime import datetime, timezone
+
+from pymongo import UpdateOne
+
+from .models import Task, TaskMonthlyStats
+
+logger = logging.getLogger(__name__)
+
+
+def stats_id(user_id: str, year: int, month: int) -> str:
+    return f'{user_id}:{year:04d}-{month:02d}'
+
+
+def task_document(task) -> dict:
+    """Raw field dict for a Task object (raw dicts are passed through)"""
+    if task is None or isinstance(task, dict):
+        return task
+    return task.to_mongo().to_dict()
+
+
+def contribution(doc):
+    """
+    Return ((user_id, year, month), counters) for a raw task document,
+    or None when the task does not belong in a monthly rollup.
+    """
+    if not doc:
+        return None
+    if doc.get('task_type') != 'monthly' or doc.get('is_recurring'):
+        return None
+    due_date = doc.get('due_date')
+    if due_date is None:
+        return None
+    if due_date.tzinfo is not None:
+        # Unsaved documents may still hold the aware value from the request
+        due_date = due_date.astimezone(timezone.utc).replace(tzinfo=None)
+
+    counters = {
+        'total': 1,
+        'urgency_sum': doc.get('urgency', 2),
+        'importance_sum': doc.get('importance', 2),
+        f"status.{doc.get('status', 'pending')}": 1,
+        f"daily.{due_date.strftime('%Y-%m-%d')}": 1,
+    }
+    if doc.get('priority_quadrant'):
+        counters[f"quadrant.{doc['priority_quadrant']}"] = 1
+    return (doc['user_id'], due_date.year, due_date.month), counters
+
+
+def build_rollup_updates(before, after) -> list:
+    """UpdateOne operations moving a task's contribution from before to after"""
+    deltas = defaultdict(lambda: defaultdict(int))
+    for doc, sign in ((task_document(before), -1), (task_document(after), 1)):
+        result = contribution(doc)
+        if result is None:
+            continue
+        key, counters = result
+        for field, value in counters.items():
+            deltas[key][field] += sign * value
+
+    now = datetime.utcnow()
+    operations = []
+    for (user_id, year, month), counters in deltas.items():
+        counters = {field: value for field, value in counters.items() if value}
+        if not counters:
+            continue
+        operations.append(UpdateOne(
+            {'_id': stats_id(user_id, year, month)},
+            {
+                '$inc': counters,
+                '$set': {'user_id': user_id, 'year': year, 'month': month, 'updated_at': now},
+            },
+            upsert=True
+        ))
+    return operations
+
+
+def apply_rollup_updates(operations):
+    """Write rollup deltas; failures are logged (rebuild_monthly_stats repairs drift)"""
+    if not operations:
+        return
+    try:
+        TaskMonthlyStats._get_collection().bulk_write(operations, ordered=False)
+    except Exception as e:
+        logger.warning('Monthly stats update failed: %s', e)
+
+
+def record_task_change(before, after):
+    """Apply the rollup delta for one task write (either side may be None)"""
+    apply_rollup_updates(build_rollup_updates(before, after))
+
+
+# Task fields contribution() reads
+ROLLUP_PROJECTION = {
+    field: 1 for field in (
+        'user_id', 'urgency', 'importance', 'priority_quadrant', 'status',
+        'task_type', 'is_recurring', 'due_date',
+    )
+}
+
+
+def rollup_filter(user_id=None, month_start=None, month_end=None) -> dict:
+    """Raw filter for the tasks that are rolled up, optionally for one user and due date range"""
+    query = {'task_type': 'monthly', 'is_recurring': {'$ne': True}, 'due_date': {'$ne': None}}
+    if user_id:
+        query['user_id'] = user_id
+    if month_start is not None:
+        query['due_date'] = {'$gte': month_start, '$lt': month_end}
+    return query
+
+
+def build_rollups(docs) -> list:
+    """Complete task_monthly_stats documents summed from raw task documents"""
+    rollups = defaultdict(lambda: {
+        'total': 0, 'urgency_sum': 0, 'importance_sum': 0,
+        'status': defaultdict(int), 'quadrant': defaultdict(int), 'daily': defaultdict(int),
+    })
+    for doc in docs:
+        result = contribution(doc)
+        if result is None:
+            continue
+        key, counters = result
+        rollup = rollups[key]
+        for field, value in counters.items():
+            if '.' in field:
+                group, name = field.split('.', 1)
+                rollup[group][name] += value
+            else:
+                rollup[field] += value
+
+    now = datetime.utcnow()
+    return [
+        {
+            '_id': stats_id(user_id, year, month),
+            'user_id': user_id,
+            'year': year,
+            'month': month,
+            'total': rollup['total'],
+            'urgency_sum': rollup['urgency_sum'],
+            'importance_sum': rollup['importance_sum'],
+            'status': dict(rollup['status']),
+            'quadrant': dict(rollup['quadrant']),
+            'daily': dict(rollup['daily']),
+            'updated_at': now,
+        }
+        for (user_id, year, month), rollup in rollups.items()
+    ]
+
+
+def write_rollups(documents, batch_size=1000):
+    """
+    Overwrite rollup documents in place with $set upserts. Each month
+    switches atomically from its old counters to the new ones, so readers
+    never see it missing or zeroed.
+    """
+    collection = TaskMonthlyStats._get_collection()
+    for start in range(0, len(documents), batch_size):
+        collection.bulk_write([
+            UpdateOne(
+                {'_id': document['_id']},
+                {'$set': {field: value for field, value in document.items() if field != '_id'}},
+                upsert=True
+            )
+            for document in documents[start:start + batch_size]
+        ], ordered=False)
+
+
+def rebuild_month(user_id: str, year: int, month: int):
+    """
+    Roll up one user's month from its tasks and return the stats document,
+    or None when no task contributes to it. Analytics calls this when a
+    month's rollup is missing, e.g. for data written before rollups existed.
+    """
+    month_start = datetime(year, month, 1)
+    month_end = datetime(year + month // 12, month % 12 + 1, 1)
+    query = rollup_filter(user_id, month_start, month_end)
+    collection = Task._get_collection()
+    # Usually nothing is due that month: one index probe answers that
+    if collection.find_one(query, {'_id': 1}) is None:
+        return None
+    documents = build_rollups(collection.find(query, ROLLUP_PROJECTION))
+    write_rollups(documents)
+    return documents[0] if documents else None
+
+
+def stats_counts(stats: dict) -> dict:
+    """Counters from a raw task_monthly_stats document, in analytics.merge_counts form"""
+    stats = stats or {}
+    return {
+        'total': stats.get('total', 0),
+        'urgency_sum': stats.get('urgency_sum', 0),
+        'importance_sum': stats.get('importance_sum', 0),
+        'status': stats.get('status', {}),
+        'quadrant': stats.get('quadrant', {}),
+        'daily': stats.get('daily', {}),
+    }
+
+
+def recurring_match(user_id: str, first_day, last_day) -> dict:
+    """The recurring half of analytics.monthly_match, aggregated live"""
+    return {
+        'user_id': user_id,
+        'task_type': 'monthly',
+        'is_recurring': True,
+        '$or': [
+            {'due_date': {'$gte': first_day, '$lte': last_day}},
+            {'recurrence_end_date': None},
+            {'recurrence_end_date': {'$gte': first_day}},
+        ],
+    }
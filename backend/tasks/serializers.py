@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from .models import Task
+from .completions import completed_dates
 
 
 class TaskSerializer(serializers.Serializer):
@@ -41,8 +42,8 @@ class TaskSerializer(serializers.Serializer):
     due_time = serializers.CharField(max_length=5, required=False, allow_null=True)  # HH:MM
     parent_task_id = serializers.CharField(required=False, allow_null=True)
     
-    def create(self, validated_data):
-        """Create a new task"""
+    def build_task(self, validated_data):
+        """Build an unsaved Task for the requesting user with its priority calculated"""
         user_id = self.context['request'].user.id
         validated_data['user_id'] = str(user_id)
         
@@ -62,7 +63,11 @@ class TaskSerializer(serializers.Serializer):
         validated_data['priority_quadrant'] = quadrant
         validated_data['priority_score'] = priority_score
         
-        task = Task(**validated_data)
+        return Task(**validated_data)
+    
+    def create(self, validated_data):
+        """Create a new task"""
+        task = self.build_task(validated_data)
         task.save()
         return task
     
@@ -115,7 +120,82 @@ class TaskSerializer(serializers.Serializer):
             'due_time': instance.due_time,
             'due_time': instance.due_time,
             'parent_task_id': str(instance.parent_task_id) if instance.parent_task_id else None,
-            'completed_dates': instance.completed_dates or [],
+            'completed_dates': completed_dates(instance),
         }
         return data
 
+
+
+# Fields returned by the task API, in response order, with their Task model field
+REPRESENTATION_FIELDS = (
+    'id', 'title', 'description', 'urgency', 'importance', 'priority_quadrant',
+    'priority_score', 'status', 'created_at', 'updated_at', 'is_recurring',
+    'recurrence_pattern', 'recurrence_days', 'recurrence_end_date', 'due_date',
+    'due_time', 'parent_task_id', 'completed_dates',
+)
+
+
+def parse_fields_param(value):
+    """
+    Parse a ?fields=a,b,c sparse fieldset. Returns None for "all fields".
+    'id' is always included so clients can key the results.
+    """
+    if not value:
+        return None
+    fields = [field.strip() for field in value.split(',') if field.strip()]
+    unknown = [field for field in fields if field not in REPRESENTATION_FIELDS]
+    if unknown:
+        raise serializers.ValidationError({'fields': f"Unknown fields: {', '.join(unknown)}"})
+    if 'id' not in fields:
+        fields.insert(0, 'id')
+    return [field for field in REPRESENTATION_FIELDS if field in fields]
+
+
+def _isoformat(value):
+    return value.isoformat() if value else None
+
+
+# Builds each output field from a raw MongoDB document, mirroring
+# TaskSerializer.to_representation (including the model defaults)
+_DOCUMENT_FIELD_BUILDERS = {
+    'id': lambda doc: str(doc['_id']),
+    'title': lambda doc: doc.get('title'),
+    'description': lambda doc: doc.get('description') or '',
+    'urgency': lambda doc: doc.get('urgency', 2),
+    'importance': lambda doc: doc.get('importance', 2),
+    'priority_quadrant': lambda doc: doc.get('priority_quadrant'),
+    'priority_score': lambda doc: doc.get('priority_score', 0),
+    'status': lambda doc: doc.get('status', 'pending'),
+    'created_at': lambda doc: _isoformat(doc.get('created_at')),
+    'updated_at': lambda doc: _isoformat(doc.get('updated_at')),
+    'is_recurring': lambda doc: doc.get('is_recurring', False),
+    'recurrence_pattern': lambda doc: doc.get('recurrence_pattern'),
+    'recurrence_days': lambda doc: doc.get('recurrence_days') or [],
+    'recurrence_end_date': lambda doc: _isoformat(doc.get('recurrence_end_date')),
+    'due_date': lambda doc: _isoformat(doc.get('due_date')),
+    'due_time': lambda doc: doc.get('due_time'),
+    'parent_task_id': lambda doc: str(doc['parent_task_id']) if doc.get('parent_task_id') else None,
+    'completed_dates': completed_dates,
+}
+
+# Output fields built from more than their own model field
+_FIELD_SOURCES = {
+    'completed_dates': ('completed_dates', 'completion_bitmap'),
+}
+
+
+def document_to_representation(doc, fields=None) -> dict:
+    """
+    Represent a raw task document (from .as_pymongo()) without hydrating a
+    Task object. Produces the same output as TaskSerializer.to_representation,
+    limited to `fields` when given.
+    """
+    return {field: _DOCUMENT_FIELD_BUILDERS[field](doc) for field in (fields or REPRESENTATION_FIELDS)}
+
+
+def projection_fields(fields=None, extra=()):
+    """Task model fields to load for the given output fields"""
+    sources = []
+    for field in list(fields or REPRESENTATION_FIELDS) + list(extra):
+        sources.extend(_FIELD_SOURCES.get(field, (field,)))
+    return list(dict.fromkeys(sources))
@@ -1,3 +1,255 @@
-from django.test import TestCase
+import json
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
 
-# Create your tests here.
+import numpy as np
+from bson import ObjectId
+from django.test import SimpleTestCase
+from rest_framework.exceptions import ValidationError
+
+from .completions import (
+    apply_completion, bitmap_dates, completed_dates, completion_update, day_bit, month_key,
+)
+from .consumers import TaskConsumer, merge_frames
+from .pagination import cursor_filter, decode_cursor, encode_cursor, page_ordering
+from .recurrence import expand_month, series_spec
+
+
+def _matches(doc, query):
+    """Evaluate the subset of MongoDB filters cursor_filter() produces"""
+    if '$or' in query:
+        return any(_matches(doc, branch) for branch in query['$or'])
+    for field, condition in query.items():
+        value = doc[field]
+        if isinstance(condition, dict):
+            if '$lt' in condition and not value < condition['$lt']:
+                return False
+            if '$gt' in condition and not value > condition['$gt']:
+                return False
+        elif value != condition:
+            return False
+    return True
+
+
+class CursorPaginationTests(SimpleTestCase):
+    def setUp(self):
+        created = datetime(2024, 5, 1, 12, 0, 0)
+        ids = sorted(ObjectId() for _ in range(4))
+        # Equal scores and creation times; only _id breaks the tie
+        self.docs = [
+            {'_id': ids[0], 'priority_score': 9, 'created_at': created},
+            {'_id': ids[1], 'priority_score': 5, 'created_at': created},
+            {'_id': ids[2], 'priority_score': 5, 'created_at': created},
+            {'_id': ids[3], 'priority_score': 5, 'created_at': created - timedelta(hours=1)},
+        ]
+        self.ordered = sorted(
+            self.docs,
+            key=lambda doc: (doc['priority_score'], doc['created_at'], doc['_id']),
+            reverse=True,
+        )
+
+    def test_round_trip(self):
+        doc = self.docs[1]
+        position = decode_cursor(encode_cursor(doc, 'n'))
+        self.assertEqual(position, {
+            'priority_score': 5,
+            'created_at': doc['created_at'],
+            '_id': doc['_id'],
+            'direction': 'next',
+        })
+        self.assertEqual(decode_cursor(encode_cursor(doc, 'p'))['direction'], 'previous')
+
+    def test_round_trip_without_created_at(self):
+        doc = {'_id': ObjectId(), 'priority_score': 0, 'created_at': None}
+        self.assertIsNone(decode_cursor(encode_cursor(doc, 'n'))['created_at'])
+
+    def test_invalid_cursor(self):
+        for cursor in ('not-a-cursor', '', 'eyJwIjoxfQ'):
+            with self.assertRaises(ValidationError):
+                decode_cursor(cursor)
+
+    def test_next_page_breaks_ties_on_id(self):
+        for index, boundary in enumerate(self.ordered):
+            position = decode_cursor(encode_cursor(boundary, 'n'))
+            after = [doc for doc in self.ordered if _matches(doc, cursor_filter(position))]
+            self.assertEqual(after, self.ordered[index + 1:])
+
+    def test_previous_page_breaks_ties_on_id(self):
+        for index, boundary in enumerate(self.ordered):
+            position = decode_cursor(encode_cursor(boundary, 'p'))
+            before = [doc for doc in self.ordered if _matches(doc, cursor_filter(position))]
+            self.assertEqual(before, self.ordered[:index])
+
+    def test_previous_pages_read_backwards(self):
+        self.assertEqual(page_ordering('next'), ('-priority_score', '-created_at', '-id'))
+        self.assertEqual(page_ordering('previous'), ('priority_score', 'created_at', 'id'))
+
+
+class MergeFramesTests(SimpleTestCase):
+    def frame(self, action, seq, delta=False, **task):
+        return {'type': 'task_update', 'action': action, 'seq': seq, 'delta': delta, 'task': {'id': 't1', **task}}
+
+    def test_delta_folds_fields_and_takes_latest_seq(self):
+        merged = merge_frames(
+            self.frame('updated', 3, delta=True, title='a'),
+            self.frame('updated', 4, delta=True, status='done'),
+        )
+        self.assertEqual(merged['seq'], 4)
+        self.assertEqual(merged['task'], {'id': 't1', 'title': 'a', 'status': 'done'})
+        self.assertTrue(merged['delta'])
+
+    def test_full_update_replaces_pending(self):
+        new = self.frame('updated', 6, title='b')
+        self.assertEqual(merge_frames(self.frame('updated', 5, delta=True, title='a'), new), new)
+
+    def test_update_after_create_stays_a_creation(self):
+        merged = merge_frames(
+            self.frame('created', 1, title='a', status='todo'),
+            self.frame('updated', 2, delta=True, status='done'),
+        )
+        self.assertEqual(merged['action'], 'created')
+        self.assertFalse(merged['delta'])
+        self.assertEqual(merged['seq'], 2)
+        self.assertEqual(merged['task'], {'id': 't1', 'title': 'a', 'status': 'done'})
+
+    def test_create_then_delete_cancels_out(self):
+        self.assertIsNone(merge_frames(self.frame('created', 1), self.frame('deleted', 2)))
+
+    def test_delete_wins_over_update(self):
+        deleted = self.frame('deleted', 8)
+        self.assertEqual(merge_frames(self.frame('updated', 7, delta=True), deleted), deleted)
+
+    def test_recreate_after_delete(self):
+        created = self.frame('created', 10, title='c')
+        self.assertEqual(merge_frames(self.frame('deleted', 9), created), created)
+
+
+class CoalescedFlushTests(SimpleTestCase):
+    def consumer(self):
+        consumer = TaskConsumer.__new__(TaskConsumer)
+        consumer.pending = OrderedDict()
+        consumer.pending_seq = None
+        consumer.flush_handle = None
+        consumer.sent = []
+
+        async def send(text_data):
+            consumer.sent.append(json.loads(text_data))
+
+        consumer.send = send
+        return consumer
+
+    def frame(self, task_id, action, seq):
+        return {'type': 'task_update', 'action': action, 'seq': seq, 'delta': False, 'task': {'id': task_id}}
+
+    async def test_lone_frame_carries_window_seq(self):
+        consumer = self.consumer()
+        consumer._queue_frame(self.frame('a', 'created', 1))
+        consumer._queue_frame(self.frame('b', 'created', 2))
+        consumer._queue_frame(self.frame('b', 'deleted', 3))
+        await consumer.flush_pending()
+        self.assertEqual(consumer.sent, [{**self.frame('a', 'created', 1), 'seq': 3}])
+
+    async def test_batch_carries_latest_seq(self):
+        consumer = self.consumer()
+        consumer._queue_frame(self.frame('a', 'updated', 4))
+        consumer._queue_frame(self.frame('b', 'updated', 5))
+        await consumer.flush_pending()
+        self.assertEqual(len(consumer.sent), 1)
+        self.assertEqual(consumer.sent[0]['type'], 'task_batch')
+        self.assertEqual(consumer.sent[0]['seq'], 5)
+        self.assertEqual([frame['task']['id'] for frame in consumer.sent[0]['events']], ['a', 'b'])
+
+    async def test_cancelled_window_still_advances_seq(self):
+        consumer = self.consumer()
+        consumer._queue_frame(self.frame('a', 'created', 6))
+        consumer._queue_frame(self.frame('a', 'deleted', 7))
+        await consumer.flush_pending()
+        self.assertEqual(consumer.sent, [{'type': 'task_batch', 'seq': 7, 'events': []}])
+
+
+class ExpandMonthTests(SimpleTestCase):
+    def expand(self, doc, year, month):
+        return [str(day) for day in expand_month([series_spec(doc)], year, month)[0]]
+
+    def test_monthly_day_past_month_end_falls_on_last_day(self):
+        doc = {'recurrence_pattern': 'monthly', 'recurrence_days': [31], 'due_date': datetime(2024, 1, 31)}
+        self.assertEqual(self.expand(doc, 2024, 2), ['2024-02-29'])
+        self.assertEqual(self.expand(doc, 2023, 2), [])  # before the series starts
+        self.assertEqual(self.expand(doc, 2024, 4), ['2024-04-30'])
+        self.assertEqual(self.expand(doc, 2024, 5), ['2024-05-31'])
+
+    def test_monthly_defaults_to_start_day(self):
+        doc = {'recurrence_pattern': 'monthly', 'due_date': datetime(2025, 1, 30)}
+        self.assertEqual(self.expand(doc, 2025, 2), ['2025-02-28'])
+
+    def test_clamped_day_is_not_duplicated(self):
+        doc = {'recurrence_pattern': 'monthly', 'recurrence_days': [29, 30, 31], 'due_date': datetime(2025, 1, 1)}
+        self.assertEqual(self.expand(doc, 2025, 2), ['2025-02-28'])
+
+    def test_series_bounds_are_inclusive(self):
+        doc = {
+            'recurrence_pattern': 'daily',
+            'due_date': datetime(2024, 3, 30, 9),
+            'recurrence_end_date': datetime(2024, 4, 2, 9),
+        }
+        self.assertEqual(self.expand(doc, 2024, 3), ['2024-03-30', '2024-03-31'])
+        self.assertEqual(self.expand(doc, 2024, 4), ['2024-04-01', '2024-04-02'])
+
+    def test_weekly_days(self):
+        # 2024-07-01 was a Monday
+        doc = {'recurrence_pattern': 'weekly', 'recurrence_days': [0, 4], 'due_date': datetime(2024, 7, 1)}
+        self.assertEqual(
+            self.expand(doc, 2024, 7),
+            ['2024-07-01', '2024-07-05', '2024-07-08', '2024-07-12', '2024-07-15',
+             '2024-07-19', '2024-07-22', '2024-07-26', '2024-07-29'],
+        )
+
+    def test_batch_rows_are_independent(self):
+        specs = [
+            series_spec({'recurrence_pattern': 'monthly', 'recurrence_days': [31], 'due_date': datetime(2024, 1, 1)}),
+            series_spec({'recurrence_pattern': 'daily', 'due_date': datetime(2024, 2, 28)}),
+        ]
+        first, second = expand_month(specs, 2024, 2)
+        np.testing.assert_array_equal(first, np.array(['2024-02-29'], dtype='M8[D]'))
+        np.testing.assert_array_equal(second, np.array(['2024-02-28', '2024-02-29'], dtype='M8[D]'))
+
+
+class CompletionBitmapTests(SimpleTestCase):
+    def test_day_bits(self):
+        self.assertEqual(month_key(date(2024, 3, 5)), '2024-03')
+        self.assertEqual(day_bit(date(2024, 3, 1)), 1)
+        self.assertEqual(day_bit(date(2024, 3, 31)), 1 << 30)
+
+    def test_bitmap_dates(self):
+        bitmap = {'2024-02': day_bit(date(2024, 2, 1)) | day_bit(date(2024, 2, 29)), '2024-03': 0}
+        self.assertEqual(sorted(bitmap_dates(bitmap)), ['2024-02-01', '2024-02-29'])
+        self.assertEqual(bitmap_dates(None), [])
+
+    def test_completion_update_sets_and_clears_bit(self):
+        day = date(2024, 6, 3)
+        now = datetime(2024, 6, 3, 10)
+        completed = completion_update(day, True, now)
+        self.assertEqual(completed['$bit'], {'completion_bitmap.2024-06': {'or': 4}})
+        self.assertEqual(completed['$pull'], {'completed_dates': '2024-06-03'})
+        self.assertEqual(completed['$set'], {'updated_at': now})
+        cleared = completion_update(day, False, now)
+        self.assertEqual(cleared['$bit'], {'completion_bitmap.2024-06': {'and': ~4}})
+
+    def test_apply_completion_sets_and_clears(self):
+        now = datetime(2024, 6, 3, 10)
+        doc = {'completion_bitmap': {'2024-06': 1}, 'completed_dates': ['2024-06-03', '2024-05-30']}
+        done = apply_completion(doc, date(2024, 6, 3), True, now)
+        self.assertEqual(done['completion_bitmap'], {'2024-06': 5})
+        self.assertEqual(done['completed_dates'], ['2024-05-30'])
+        self.assertEqual(completed_dates(done), ['2024-05-30', '2024-06-01', '2024-06-03'])
+
+        undone = apply_completion(done, date(2024, 6, 3), False, now)
+        self.assertEqual(undone['completion_bitmap'], {'2024-06': 1})
+        self.assertEqual(completed_dates(undone), ['2024-05-30', '2024-06-01'])
+        # The input document is left untouched
+        self.assertEqual(doc['completion_bitmap'], {'2024-06': 1})
+
+    def test_clearing_an_unset_bit_is_a_no_op(self):
+        undone = apply_completion({}, date(2024, 6, 10), False, datetime(2024, 6, 10))
+        self.assertEqual(undone['completion_bitmap'], {'2024-06': 0})
+        self.assertEqual(completed_dates(undone), [])
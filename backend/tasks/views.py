@@ -2,14 +2,163 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from .models import Task
-from .serializers import TaskSerializer
-from .ai_service import analyze_task
+from rest_framework.renderers import BrowsableAPIRenderer
+from rest_framework.exceptions import ValidationError as DRFValidationError
+from .models import Task, AnalysisJob, TaskMonthlyStats
+from .renderers import ORJSONRenderer
+from .etags import conditional_listing
+from .serializers import TaskSerializer, document_to_representation, parse_fields_param, projection_fields
+from .pagination import TaskCursorPagination, ORDERING
+from .analytics import month_bounds, monthly_match, analytics_pipeline, facets_to_counts, merge_counts, summarize
+from .rollups import record_task_change, rebuild_month, task_document, stats_id, stats_counts, recurring_match, build_rollup_updates, apply_rollup_updates
+from .ai_service import analyze_task_coalesced, analyze_tasks
+from .analysis_cache import analysis_cache
+from .analysis_executor import get_analysis_executor, AnalysisQueueFull
+from .broadcast import broadcast_task_update, broadcast_task_bulk, get_broadcast_dispatcher
+from .bulk import bulk_create_tasks, bulk_update_tasks, bulk_delete_tasks
+from .events import task_delta
+from . import analysis_jobs
+from .completions import parse_completion_date, toggle_completion, completed_dates
+from .mongo_metrics import analytics_collection, pool_stats
+from .list_cache import cached_listing, tasks_changed, get_task_list_cache
+from .ws_auth import get_admission_control
+from .recurrence import expand_occurrences, local_date, recurrence_cache
 from .priority_calculator import calculate_priority_quadrant, calculate_priority_score
-from datetime import datetime, timedelta
-from django.db.models import Q
-from collections import defaultdict
-import calendar
+from datetime import datetime, date, time, timedelta, timezone as dt_timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from django.conf import settings
+from mongoengine.errors import ValidationError
+from pymongo import UpdateOne, ReturnDocument
+from bson import ObjectId
+from bson.errors import InvalidId
+
+
+def resolve_timezone(tz_name=None):
+    """ZoneInfo for an IANA zone name (TIME_ZONE if empty); ValueError if unknown"""
+    try:
+        return ZoneInfo(tz_name or settings.TIME_ZONE)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValueError(f'Unknown time zone: {tz_name}')
+
+
+def parse_date_param(date_str):
+    """date from a YYYY-MM-DD query parameter; ValueError if invalid"""
+    try:
+        return date.fromisoformat(date_str)
+    except (TypeError, ValueError):
+        raise ValueError(f'Invalid date: {date_str}')
+
+
+def local_day_bounds(tz_name=None, date_str=None):
+    """
+    Return naive-UTC (start, end) datetimes for a local calendar day, matching
+    how due dates are stored. Raises ValueError for an unknown zone or date.
+    """
+    tz = resolve_timezone(tz_name)
+    day = parse_date_param(date_str) if date_str else datetime.now(tz).date()
+    
+    start = datetime.combine(day, time.min, tzinfo=tz)
+    end = datetime.combine(day + timedelta(days=1), time.min, tzinfo=tz)
+    return (
+        start.astimezone(dt_timezone.utc).replace(tzinfo=None),
+        end.astimezone(dt_timezone.utc).replace(tzinfo=None),
+    )
+
+
+def run_ai_analysis(task_id, description, user_id, job_id=None):
+    """Analyze a task in the background and push the new priority to the user"""
+    try:
+        if job_id:
+            analysis_jobs.mark_running(job_id)
+        
+        # Perform AI Analysis (Slow operation); concurrent workers share one batched request
+        ai_result = analyze_task_coalesced(description)
+        
+        # Fetch task fresh from DB
+        task = Task.objects.get(id=task_id)
+        before = task_document(task)
+        
+        task.urgency = ai_result['urgency']
+        task.importance = ai_result['importance']
+        
+        # Recalculate priority based on AI results
+        task.priority_quadrant = calculate_priority_quadrant(task.urgency, task.importance)
+        task.priority_score = calculate_priority_score(task.urgency, task.importance, task.priority_quadrant)
+        
+        task.save()
+        record_task_change(before, task)
+        tasks_changed(user_id)
+        
+        if job_id:
+            analysis_jobs.complete_job(job_id, {
+                'urgency': task.urgency,
+                'importance': task.importance,
+                'priority_quadrant': task.priority_quadrant,
+                'priority_score': task.priority_score,
+                'context': ai_result.get('context', ''),
+            })
+        
+        # Broadcast update so UI refreshes automatically
+        broadcast_task_update(
+            user_id, 'updated', TaskSerializer(task).data,
+            before=document_to_representation(before)
+        )
+        print(f"AI analysis completed for task {task_id}")
+        
+    except Exception as e:
+        print(f"Background AI analysis failed: {str(e)}")
+        if job_id:
+            try:
+                analysis_jobs.fail_job(job_id, str(e))
+            except Exception:
+                pass
+
+
+def run_bulk_ai_analysis(tasks, user_id):
+    """
+    Analyze many new tasks in one background job: batched AI requests,
+    one bulk_write and one WebSocket event for all of them.
+    `tasks` is a list of (task_id, description) pairs.
+    """
+    try:
+        results = analyze_tasks([description for _, description in tasks])
+        
+        task_ids = [task_id for task_id, _ in tasks]
+        before_docs = {str(doc['_id']): doc for doc in Task.objects(id__in=task_ids, user_id=user_id).as_pymongo()}
+        
+        operations = []
+        rollup_operations = []
+        deltas = []
+        now = datetime.utcnow()
+        for (task_id, _), ai_result in zip(tasks, results):
+            before = before_docs.get(task_id)
+            if before is None:
+                # Deleted while waiting for analysis
+                continue
+            urgency = ai_result['urgency']
+            importance = ai_result['importance']
+            quadrant = calculate_priority_quadrant(urgency, importance)
+            changes = {
+                'urgency': urgency,
+                'importance': importance,
+                'priority_quadrant': quadrant,
+                'priority_score': calculate_priority_score(urgency, importance, quadrant),
+                'updated_at': now,
+            }
+            after = {**before, **changes}
+            operations.append(UpdateOne({'_id': before['_id']}, {'$set': changes}))
+            rollup_operations.extend(build_rollup_updates(before, after))
+            deltas.append(task_delta(document_to_representation(before), document_to_representation(after)))
+        
+        if operations:
+            Task._get_collection().bulk_write(operations, ordered=False)
+        apply_rollup_updates(rollup_operations)
+        tasks_changed(user_id)
+        broadcast_task_bulk(user_id, 'updated', deltas, delta=True)
+        print(f"AI analysis completed for {len(operations)} bulk-created tasks")
+        
+    except Exception as e:
+        print(f"Background bulk AI analysis failed: {str(e)}")
 
 
 class TaskViewSet(viewsets.ModelViewSet):
@@ -19,21 +168,40 @@ class TaskViewSet(viewsets.ModelViewSet):
     """
     serializer_class = TaskSerializer
     permission_classes = [IsAuthenticated]
+    renderer_classes = [ORJSONRenderer, BrowsableAPIRenderer]
     
     def get_queryset(self):
         """Get tasks for the current user"""
         user_id = str(self.request.user.id)
-        return Task.objects(user_id=user_id).order_by('-priority_score', '-created_at')
+        return Task.objects(user_id=user_id).order_by(*ORDERING)
     
+    @conditional_listing
+    @cached_listing
     def list(self, request, *args, **kwargs):
-        """List all tasks for the current user"""
+        """
+        List tasks for the current user, one cursor page at a time.
+        Pass ?all=true to get the full unpaginated list instead, and
+        ?fields=a,b,c to return only some fields.
+        """
         try:
             user_id = str(request.user.id)
-            tasks_queryset = Task.objects(user_id=user_id).order_by('-priority_score', '-created_at')
-            # Convert MongoDB queryset to list
-            tasks_list = list(tasks_queryset)
-            serializer = self.get_serializer(tasks_list, many=True)
-            return Response(serializer.data)
+            fields = parse_fields_param(request.query_params.get('fields'))
+            
+            if request.query_params.get('all', '').lower() in ('1', 'true'):
+                docs = self._raw_tasks(Task.objects(user_id=user_id), fields).order_by(*ORDERING)
+                return Response([document_to_representation(doc, fields) for doc in docs])
+            
+            # Cursors are built from the sort key, so it is always loaded
+            paginator = TaskCursorPagination(request)
+            docs = paginator.paginate(self._raw_tasks(
+                Task.objects(user_id=user_id), fields,
+                extra=('priority_score', 'created_at')
+            ))
+            return Response(paginator.get_paginated_data(
+                [document_to_representation(doc, fields) for doc in docs]
+            ))
+        except DRFValidationError:
+            raise
         except Exception as e:
             import traceback
             print(f"Error listing tasks: {str(e)}")
@@ -64,6 +232,33 @@ class TaskViewSet(viewsets.ModelViewSet):
             from rest_framework.exceptions import NotFound
             raise NotFound('Task not found')
     
+    def _task_object_id(self):
+        """ObjectId of the pk in the URL, or None if it is not a valid id"""
+        try:
+            return ObjectId(self.kwargs.get('pk'))
+        except (InvalidId, TypeError):
+            return None
+    
+    @staticmethod
+    def _is_fast_update(update_data) -> bool:
+        """
+        True for partial updates that can be written without reading the task
+        first: status alone, or urgency and importance together (the priority
+        is derived from both), optionally with status.
+        """
+        keys = set(update_data)
+        if not keys or not keys <= {'status', 'urgency', 'importance'}:
+            return False
+        return ('urgency' in keys) == ('importance' in keys)
+    
+    def _raw_tasks(self, queryset, fields=None, extra=()):
+        """
+        Projected queryset yielding raw documents instead of Task objects.
+        Pair with document_to_representation to skip mongoengine hydration
+        and field-by-field serializer work on listing endpoints.
+        """
+        return queryset.only(*projection_fields(fields, extra)).as_pymongo()
+    
     def get_serializer_context(self):
         """Add request to serializer context"""
         context = super().get_serializer_context()
@@ -81,6 +276,8 @@ class TaskViewSet(viewsets.ModelViewSet):
             # 2. Calculating initial priority based on provided/default urgency & importance
             # 3. Saving to MongoDB
             task = serializer.save()
+            record_task_change(None, task)
+            tasks_changed(task.user_id)
             
             # Broadcast creation event immediately
             try:
@@ -88,59 +285,15 @@ class TaskViewSet(viewsets.ModelViewSet):
             except Exception as ws_error:
                 print(f"WebSocket broadcast failed: {str(ws_error)}")
             
-            # Start background AI analysis if description exists
+            # Queue background AI analysis if description exists
             if task.description:
-                import threading
-                
-                def run_ai_analysis(task_id, description, user_id):
-                    try:
-                        # Perform AI Analysis (Slow operation)
-                        ai_result = analyze_task(description)
-                        
-                        # Fetch task fresh from DB
-                        task = Task.objects.get(id=task_id)
-                        
-                        task.urgency = ai_result['urgency']
-                        task.importance = ai_result['importance']
-                        
-                        # Recalculate priority based on AI results
-                        task.priority_quadrant = calculate_priority_quadrant(task.urgency, task.importance)
-                        task.priority_score = calculate_priority_score(task.urgency, task.importance, task.priority_quadrant)
-                        
-                        task.save()
-                        
-                        # Broadcast update so UI refreshes automatically
-                        # We use channel layer directly to avoid viewset 'self' context issues in thread
-                        from channels.layers import get_channel_layer
-                        from asgiref.sync import async_to_sync
-                        from .serializers import TaskSerializer
-                        
-                        channel_layer = get_channel_layer()
-                        
-                        # Serialize the updated task
-                        serializer = TaskSerializer(task)
-                        task_dict = serializer.data
-                        
-                        async_to_sync(channel_layer.group_send)(
-                            f'user_{user_id}',
-                            {
-                                'type': 'task_update',
-                                'action': 'updated',
-                                'task': task_dict
-                            }
-                        )
-                        print(f"AI analysis completed for task {task_id}")
-                        
-                    except Exception as e:
-                        print(f"Background AI analysis failed: {str(e)}")
-
-                # Start the background thread
-                thread = threading.Thread(
-                    target=run_ai_analysis, 
-                    args=(str(task.id), task.description, str(request.user.id)),
-                    daemon=True
-                )
-                thread.start()
+                try:
+                    get_analysis_executor().submit(
+                        run_ai_analysis, str(task.id), task.description, str(request.user.id)
+                    )
+                except AnalysisQueueFull as queue_error:
+                    # Task keeps its default priority; user can reanalyze later
+                    print(f"AI analysis not queued: {str(queue_error)}")
             
             response_serializer = self.get_serializer(task)
             headers = self.get_success_headers(response_serializer.data)
@@ -169,51 +322,71 @@ class TaskViewSet(viewsets.ModelViewSet):
         """Update task and broadcast changes - optimized for speed"""
         try:
             partial = kwargs.pop('partial', False)
-            instance = self.get_object()
-            
-            # Handle recurring task daily completion
+            user_id = str(request.user.id)
             update_data = request.data
-            completion_date = update_data.get('completion_date')
             
-            if instance.is_recurring and completion_date:
-                current_status = update_data.get('status')
-                
-                if current_status == 'completed':
-                    # Add date to completed_dates if not present
-                    if completion_date not in instance.completed_dates:
-                        instance.completed_dates.append(completion_date)
-                elif current_status in ['pending', 'in_progress']:
-                    # Remove date if un-completing
-                    if completion_date in instance.completed_dates:
-                        instance.completed_dates.remove(completion_date)
-                
-                instance.save()
-                
-                # Broadcast update
+            # Recurring task daily completion: one atomic toggle, no load-modify-save
+            completion_date = update_data.get('completion_date')
+            current_status = update_data.get('status')
+            task_id = self._task_object_id()
+            if completion_date and task_id and current_status in ('completed', 'pending', 'in_progress'):
                 try:
-                    self._broadcast_task_update('updated', instance)
-                except:
-                    pass
+                    day = parse_completion_date(completion_date)
+                except ValueError as e:
+                    return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+                
+                changed = toggle_completion(task_id, user_id, day, current_status == 'completed')
+                if changed is not None:
+                    before, after = changed
+                    record_task_change(before, after)
+                    tasks_changed(user_id)
+                    representation = document_to_representation(after)
                     
-                response_serializer = self.get_serializer(instance)
-                return Response(response_serializer.data)
-
-            # Fast path: if only status is being updated, skip serializer validation overhead
-
-            if partial and len(update_data) == 1 and 'status' in update_data:
-                # Direct status update - fastest path
-                instance.status = update_data['status']
-                instance.save()
+                    # Broadcast update
+                    try:
+                        self._broadcast_task_update('updated', representation, before=before)
+                    except:
+                        pass
+                    
+                    return Response(representation)
+                # Not a recurring task: handle as a regular update
+            
+            # Fast path: status and/or priority changes are one atomic find_one_and_update
+            if partial and task_id and self._is_fast_update(update_data):
+                serializer = self.get_serializer(data=update_data, partial=True)
+                serializer.is_valid(raise_exception=True)
+                changes = dict(serializer.validated_data)
+                if 'urgency' in changes:
+                    quadrant = calculate_priority_quadrant(changes['urgency'], changes['importance'])
+                    changes['priority_quadrant'] = quadrant
+                    changes['priority_score'] = calculate_priority_score(
+                        changes['urgency'], changes['importance'], quadrant
+                    )
+                changes['updated_at'] = datetime.utcnow()
+                
+                before = Task._get_collection().find_one_and_update(
+                    {'_id': task_id, 'user_id': user_id},
+                    {'$set': changes},
+                    return_document=ReturnDocument.BEFORE
+                )
+                if before is None:
+                    return Response({'error': 'Task not found'}, status=status.HTTP_404_NOT_FOUND)
+                after = {**before, **changes}
+                record_task_change(before, after)
+                tasks_changed(user_id)
+                representation = document_to_representation(after)
                 
                 # Broadcast update (non-blocking)
                 try:
-                    self._broadcast_task_update('updated', instance)
+                    self._broadcast_task_update('updated', representation, before=before)
                 except:
                     pass
                 
-                response_serializer = self.get_serializer(instance)
-                return Response(response_serializer.data)
+                return Response(representation)
             
+            instance = self.get_object()
+            before = task_document(instance)
+
             # Full update with validation
             serializer = self.get_serializer(instance, data=request.data, partial=partial)
             serializer.is_valid(raise_exception=True)
@@ -231,16 +404,20 @@ class TaskViewSet(viewsets.ModelViewSet):
                 task_data['priority_score'] = priority_score
             
             task = serializer.save()
+            record_task_change(before, task)
+            tasks_changed(user_id)
             
             # Broadcast update (non-blocking)
             try:
-                self._broadcast_task_update('updated', task)
+                self._broadcast_task_update('updated', task, before=before)
             except:
                 pass
             
             response_serializer = self.get_serializer(task)
             return Response(response_serializer.data)
             
+        except DRFValidationError:
+            raise
         except Exception as e:
             import traceback
             print(f"Update error: {str(e)}")
@@ -255,12 +432,14 @@ class TaskViewSet(viewsets.ModelViewSet):
         instance = self.get_object()
         task_id = str(instance.id)
         instance.delete()
+        record_task_change(instance, None)
+        tasks_changed(instance.user_id)
         self._broadcast_task_update('deleted', {'id': task_id})
         return Response(status=status.HTTP_204_NO_CONTENT)
     
     @action(detail=True, methods=['post'])
     def reanalyze(self, request, pk=None):
-        """Re-analyze task using AI"""
+        """Queue AI re-analysis; returns 202 with a job id to poll"""
         try:
             task = Task.objects.get(id=pk, user_id=str(request.user.id))
         except Task.DoesNotExist:
@@ -275,124 +454,223 @@ class TaskViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Analyze with AI
-        ai_result = analyze_task(task.description)
-        task.urgency = ai_result['urgency']
-        task.importance = ai_result['importance']
+        user_id = str(request.user.id)
         
-        # Recalculate priority
-        quadrant = calculate_priority_quadrant(task.urgency, task.importance)
-        priority_score = calculate_priority_score(task.urgency, task.importance, quadrant)
+        # Single-flight: a second click while a job is in flight joins that job
+        job, created = analysis_jobs.start_job(str(task.id), user_id)
+        if created:
+            try:
+                get_analysis_executor().submit(
+                    run_ai_analysis, str(task.id), task.description, user_id, job_id=str(job.id)
+                )
+            except AnalysisQueueFull as e:
+                analysis_jobs.fail_job(job.id, str(e))
+                return Response(
+                    {'error': str(e)},
+                    status=status.HTTP_503_SERVICE_UNAVAILABLE
+                )
         
-        task.priority_quadrant = quadrant
-        task.priority_score = priority_score
-        task.save()
+        return Response(
+            analysis_jobs.job_representation(job),
+            status=status.HTTP_202_ACCEPTED
+        )
+    
+    @action(detail=False, methods=['get'], url_path=r'jobs/(?P<job_id>[^/.]+)')
+    def analysis_job(self, request, job_id=None):
+        """Get the status of a reanalyze job"""
+        try:
+            job = AnalysisJob.objects.get(id=job_id, user_id=str(request.user.id))
+        except (AnalysisJob.DoesNotExist, ValidationError):
+            return Response(
+                {'error': 'Job not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return Response(analysis_jobs.job_representation(job))
+    
+    def _bulk_items(self, data, key):
+        """
+        Items of a bulk request: a JSON list or {key: [...]}, at most
+        TASK_BULK_MAX_ITEMS long. Returns (items, error_response).
+        """
+        items = data.get(key) if isinstance(data, dict) else data
+        if not isinstance(items, list) or not items:
+            return None, Response(
+                {'error': f'Expected a non-empty list or {{"{key}": [...]}}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        max_items = getattr(settings, 'TASK_BULK_MAX_ITEMS', 500)
+        if len(items) > max_items:
+            return None, Response(
+                {'error': f'At most {max_items} items per request'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return items, None
+    
+    def _bulk_response(self, results, success_status):
+        """success_status when every item succeeded, 207 Multi-Status otherwise"""
+        failed = sum(1 for result in results if result['status'] == 'error')
+        return Response(
+            {'succeeded': len(results) - failed, 'failed': failed, 'results': results},
+            status=success_status if not failed else status.HTTP_207_MULTI_STATUS
+        )
+    
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk_create(self, request):
+        """
+        Create many tasks in one request with a single insert_many.
+        AI analysis for all of them runs as one batched background job.
+        """
+        items, error = self._bulk_items(request.data, 'tasks')
+        if error:
+            return error
         
-        # Broadcast update
-        self._broadcast_task_update('updated', task)
+        user_id = str(request.user.id)
+        results, created = bulk_create_tasks(items, self.get_serializer_context())
+        if created:
+            rollup_operations = []
+            for doc in created:
+                rollup_operations.extend(build_rollup_updates(None, doc))
+            apply_rollup_updates(rollup_operations)
+            tasks_changed(user_id)
+            
+            broadcast_task_bulk(user_id, 'created', [
+                result['task'] for result in results if result['status'] == 'created'
+            ])
+            
+            to_analyze = [(str(doc['_id']), doc['description']) for doc in created if doc.get('description')]
+            if to_analyze:
+                try:
+                    get_analysis_executor().submit(run_bulk_ai_analysis, to_analyze, user_id)
+                except AnalysisQueueFull as queue_error:
+                    # Tasks keep their default priority; users can reanalyze later
+                    print(f"Bulk AI analysis not queued: {str(queue_error)}")
         
-        serializer = self.get_serializer(task)
-        return Response(serializer.data)
+        return self._bulk_response(results, status.HTTP_201_CREATED)
     
-    def _broadcast_task_update(self, action: str, task_data):
-        """Broadcast task update via WebSocket (non-blocking)"""
-        # Run in background thread to avoid blocking the response
-        import threading
-        def broadcast():
-            try:
-                from channels.layers import get_channel_layer
-                from asgiref.sync import async_to_sync
-                
-                channel_layer = get_channel_layer()
-                user_id = str(self.request.user.id)
-                
-                # Serialize task if it's a Task object
-                if hasattr(task_data, 'id'):
-                    serializer = self.get_serializer(task_data)
-                    task_dict = serializer.data
-                else:
-                    task_dict = task_data
-                
-                # Broadcast to user's channel group
-                async_to_sync(channel_layer.group_send)(
-                    f'user_{user_id}',
-                    {
-                        'type': 'task_update',
-                        'action': action,
-                        'task': task_dict
-                    }
-                )
-            except Exception as e:
-                # WebSocket broadcast is optional, don't fail if it doesn't work
-                pass  # Silently fail to avoid blocking
+    @action(detail=False, methods=['patch'], url_path='bulk/update')
+    def bulk_update(self, request):
+        """Partially update many tasks ([{"id": ..., <fields>}]) with one bulk_write"""
+        items, error = self._bulk_items(request.data, 'tasks')
+        if error:
+            return error
         
-        # Start broadcast in background thread
-        thread = threading.Thread(target=broadcast, daemon=True)
-        thread.start()
+        user_id = str(request.user.id)
+        results, updated = bulk_update_tasks(items, user_id, self.get_serializer_context())
+        if updated:
+            rollup_operations = []
+            deltas = []
+            for before, after in updated:
+                rollup_operations.extend(build_rollup_updates(before, after))
+                deltas.append(task_delta(document_to_representation(before), document_to_representation(after)))
+            apply_rollup_updates(rollup_operations)
+            tasks_changed(user_id)
+            broadcast_task_bulk(user_id, 'updated', deltas, delta=True)
+        
+        return self._bulk_response(results, status.HTTP_200_OK)
+    
+    @action(detail=False, methods=['post'], url_path='bulk/delete')
+    def bulk_delete(self, request):
+        """Delete many tasks ({"ids": [...]}) with one delete_many"""
+        ids, error = self._bulk_items(request.data, 'ids')
+        if error:
+            return error
+        
+        user_id = str(request.user.id)
+        results, deleted = bulk_delete_tasks(ids, user_id)
+        if deleted:
+            rollup_operations = []
+            for doc in deleted:
+                rollup_operations.extend(build_rollup_updates(doc, None))
+            apply_rollup_updates(rollup_operations)
+            tasks_changed(user_id)
+            broadcast_task_bulk(user_id, 'deleted', [{'id': str(doc['_id'])} for doc in deleted])
+        
+        return self._bulk_response(results, status.HTTP_200_OK)
+    
+    def _broadcast_task_update(self, action: str, task_data, before=None):
+        """
+        Broadcast task update via WebSocket (non-blocking, via the shared dispatcher).
+        Pass the raw document from before an update to send only changed fields.
+        """
+        # Serialize task if it's a Task object
+        if hasattr(task_data, 'id'):
+            task_dict = self.get_serializer(task_data).data
+        else:
+            task_dict = task_data
+        broadcast_task_update(
+            str(self.request.user.id), action, task_dict,
+            before=document_to_representation(before) if before is not None else None
+        )
     
     @action(detail=False, methods=['get'])
+    @conditional_listing(clock=True)
+    @cached_listing(clock=True)
     def daily_tasks(self, request):
-        """Get daily-only tasks for today (tasks not in monthly tracking)"""
+        """
+        Get daily-only tasks due today (tasks not in monthly tracking).
+        "Today" is the user's local day: pass ?tz=<IANA zone> (defaults to
+        TIME_ZONE) and optionally ?date=YYYY-MM-DD for another day.
+        Supports ?fields=a,b,c sparse fieldsets.
+        """
         try:
             user_id = str(request.user.id)
-            today = datetime.now().date()
+            fields = parse_fields_param(request.query_params.get('fields'))
             
-            # Get tasks for today that are marked as 'daily' type
-            tasks = Task.objects(user_id=user_id, task_type='daily')
-            
-            daily_tasks = []
-            for task in tasks:
-                # Check if task is due today
-                if task.due_date and task.due_date.date() == today:
-                    daily_tasks.append(task)
-            
-            serializer = self.get_serializer(daily_tasks, many=True)
-            return Response(serializer.data)
+            try:
+                day_start, day_end = local_day_bounds(
+                    request.query_params.get('tz'),
+                    request.query_params.get('date')
+                )
+            except ValueError as e:
+                return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            
+            # Indexed range seek on (user_id, task_type, due_date): cost depends on
+            # today's tasks only, not on the user's whole daily-task history
+            daily_tasks = self._raw_tasks(Task.objects(
+                user_id=user_id,
+                task_type='daily',
+                due_date__gte=day_start,
+                due_date__lt=day_end
+            ), fields)
+            
+            return Response([document_to_representation(doc, fields) for doc in daily_tasks])
+        except DRFValidationError:
+            raise
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
     @action(detail=False, methods=['get'])
+    @conditional_listing(clock=True)
+    @cached_listing(clock=True)
     def monthly_tasks(self, request):
         """Get monthly tasks for a specific month (excludes daily-only tasks) - Optimized"""
         try:
             user_id = str(request.user.id)
+            fields = parse_fields_param(request.query_params.get('fields'))
             
             # Get month and year from query params (default to current month)
             year = int(request.query_params.get('year', datetime.now().year))
             month = int(request.query_params.get('month', datetime.now().month))
             
-            # Get first and last day of month
-            first_day = datetime(year, month, 1)
-            last_day = datetime(year, month, calendar.monthrange(year, month)[1], 23, 59, 59)
-            
-            from mongoengine.queryset.visitor import Q
-            
-            # Optimized Query:
-            # 1. User must match
-            # 2. Match EITHER:
-            #    a. Due date in this month
-            #    b. Is recurring AND (no end date OR end date >= month start)
-            # 3. Exclude daily-only tasks
-            
-            query = Q(user_id=user_id) & Q(task_type='monthly') & (
-                (Q(due_date__gte=first_day) & Q(due_date__lte=last_day)) |
-                (Q(is_recurring=True) & (Q(recurrence_end_date=None) | Q(recurrence_end_date__gte=first_day)))
-            )
-            
-            monthly_tasks = Task.objects(query).order_by('due_date')
+            # Match tasks due this month, plus recurring tasks still active in it
+            first_day, last_day = month_bounds(year, month)
+            monthly_tasks = self._raw_tasks(
+                Task.objects(__raw__=monthly_match(user_id, first_day, last_day)), fields
+            ).order_by('due_date')
             
             # Limit results to prevent massive payloads if something goes wrong
-            # MongoDB cursors are lazy, so we convert to list here with a safe limit
-            tasks_list = list(monthly_tasks[:500])
+            tasks_list = monthly_tasks.limit(500)
             
-            serializer = self.get_serializer(tasks_list, many=True)
-            return Response(serializer.data)
+            return Response([document_to_representation(doc, fields) for doc in tasks_list])
+        except DRFValidationError:
+            raise
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
     @action(detail=False, methods=['get'])
+    @conditional_listing(clock=True)
     def analytics(self, request):
-        """Get monthly analytics dashboard data - Optimized"""
+        """Get monthly analytics dashboard data from rollups and MongoDB aggregation"""
         try:
             user_id = str(request.user.id)
             
@@ -400,76 +678,104 @@ class TaskViewSet(viewsets.ModelViewSet):
             year = int(request.query_params.get('year', datetime.now().year))
             month = int(request.query_params.get('month', datetime.now().month))
             
-            # Get first and last day of month
-            first_day = datetime(year, month, 1)
-            last_day = datetime(year, month, calendar.monthrange(year, month)[1], 23, 59, 59)
-            
-            from mongoengine.queryset.visitor import Q
-            
-            # Same optimized query logic as monthly_tasks
-            query = Q(user_id=user_id) & Q(task_type='monthly') & (
-                (Q(due_date__gte=first_day) & Q(due_date__lte=last_day)) |
-                (Q(is_recurring=True) & (Q(recurrence_end_date=None) | Q(recurrence_end_date__gte=first_day)))
-            )
-            
-            # Execute query
-            month_tasks = list(Task.objects(query))
-            
-            # Further filter in memory only for complex recurrence logic (optional, but safe now that set is small)
-            # For strict correctness, we might filter recurring tasks that started AFTER this month
-            # But the query handles the bulk of the filtering
+            first_day, last_day = month_bounds(year, month)
             
-            # Calculate analytics
-            total_tasks = len(month_tasks)
-            completed_tasks = len([t for t in month_tasks if t.status == 'completed'])
-            pending_tasks = len([t for t in month_tasks if t.status == 'pending'])
-            in_progress_tasks = len([t for t in month_tasks if t.status == 'in_progress'])
+            # Non-recurring tasks come from the incrementally maintained rollup
+            # (one small document); recurring tasks span open-ended month ranges,
+            # so that small set is aggregated live with the same $facet pipeline
+            stats = analytics_collection(TaskMonthlyStats).find_one({'_id': stats_id(user_id, year, month)})
+            if stats is None:
+                stats = rebuild_month(user_id, year, month)
+            pipeline = analytics_pipeline(recurring_match(user_id, first_day, last_day))
+            facets = next(analytics_collection(Task).aggregate(pipeline), {})
             
-            completion_rate = (completed_tasks / total_tasks * 100) if total_tasks > 0 else 0
-            
-            # Priority breakdown
-            priority_counts = defaultdict(int)
-            for task in month_tasks:
-                priority_counts[task.priority_quadrant] += 1
-            
-            # Status breakdown
-            status_counts = {
-                'completed': completed_tasks,
-                'pending': pending_tasks,
-                'in_progress': in_progress_tasks,
-                'cancelled': len([t for t in month_tasks if t.status == 'cancelled'])
-            }
-            
-            # Daily task count
-            daily_counts = defaultdict(int)
-            for task in month_tasks:
-                if task.due_date:
-                    task_date = task.due_date.date()
-                    daily_counts[str(task_date)] += 1
-                elif task.created_at:
-                    task_date = task.created_at.date()
-                    daily_counts[str(task_date)] += 1
-            
-            # Urgency/Importance breakdown
-            urgency_avg = sum(t.urgency for t in month_tasks) / total_tasks if total_tasks > 0 else 0
-            importance_avg = sum(t.importance for t in month_tasks) / total_tasks if total_tasks > 0 else 0
+            counts = merge_counts(stats_counts(stats), facets_to_counts(facets))
+            return Response(summarize(counts, year, month))
+        except Exception as e:
+            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    @action(detail=False, methods=['get'])
+    @conditional_listing
+    def occurrences(self, request):
+        """
+        Concrete occurrences of the user's tasks between ?from= and ?to=
+        (YYYY-MM-DD, inclusive) in the user's ?tz= (defaults to TIME_ZONE).
+        Recurring tasks are expanded server-side and marked completed from
+        completed_dates; one-off tasks appear on their due date.
+        Supports ?fields=a,b,c for the task representations.
+        """
+        try:
+            user_id = str(request.user.id)
+            fields = parse_fields_param(request.query_params.get('fields'))
+            tz_name = request.query_params.get('tz') or settings.TIME_ZONE
+            try:
+                tz = resolve_timezone(tz_name)
+                range_start = parse_date_param(request.query_params.get('from'))
+                range_end = parse_date_param(request.query_params.get('to'))
+            except ValueError as e:
+                return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            
+            max_days = getattr(settings, 'RECURRENCE_MAX_RANGE_DAYS', 366)
+            if range_end < range_start:
+                return Response({'error': '"to" must not be before "from"'}, status=status.HTTP_400_BAD_REQUEST)
+            if (range_end - range_start).days + 1 > max_days:
+                return Response(
+                    {'error': f'Range is limited to {max_days} days'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
             
+            start_utc, _ = local_day_bounds(tz_name, range_start.isoformat())
+            _, end_utc = local_day_bounds(tz_name, range_end.isoformat())
+            docs = list(self._raw_tasks(
+                Task.objects(__raw__={
+                    'user_id': user_id,
+                    '$or': [
+                        {'is_recurring': {'$ne': True}, 'due_date': {'$gte': start_utc, '$lt': end_utc}},
+                        {'is_recurring': True, '$or': [
+                            {'recurrence_end_date': None},
+                            {'recurrence_end_date': {'$gte': start_utc}},
+                        ]},
+                    ],
+                }),
+                fields,
+                extra=('is_recurring', 'recurrence_pattern', 'recurrence_days', 'recurrence_end_date',
+                       'due_date', 'created_at', 'updated_at', 'completed_dates', 'status')
+            ).order_by(*ORDERING))
+            
+            recurring = [doc for doc in docs if doc.get('is_recurring')]
+            expanded = expand_occurrences(recurring, range_start, range_end, tz, tz_name)
+            
+            occurrences = []
+            for doc in docs:
+                task_id = str(doc['_id'])
+                if doc.get('is_recurring'):
+                    completed = set(completed_dates(doc))
+                    occurrences.extend(
+                        {'date': day, 'task_id': task_id, 'completed': day in completed}
+                        for day in expanded[task_id]
+                    )
+                else:
+                    occurrences.append({
+                        'date': local_date(doc['due_date'], tz).isoformat(),
+                        'task_id': task_id,
+                        'completed': doc.get('status') == 'completed',
+                    })
+            # Stable sort keeps priority order within a day
+            occurrences.sort(key=lambda occurrence: occurrence['date'])
+            
+            task_ids = {occurrence['task_id'] for occurrence in occurrences}
             return Response({
-                'month': month,
-                'year': year,
-                'total_tasks': total_tasks,
-                'completed_tasks': completed_tasks,
-                'pending_tasks': pending_tasks,
-                'in_progress_tasks': in_progress_tasks,
-                'completion_rate': round(completion_rate, 2),
-                'priority_breakdown': dict(priority_counts),
-                'status_breakdown': status_counts,
-                'daily_counts': dict(daily_counts),
-                'avg_urgency': round(urgency_avg, 2),
-                'avg_importance': round(importance_avg, 2),
-                'month_name': calendar.month_name[month],
-                'total_days_in_month': calendar.monthrange(year, month)[1]
+                'from': range_start.isoformat(),
+                'to': range_end.isoformat(),
+                'tz': tz_name,
+                'occurrences': occurrences,
+                'tasks': [
+                    document_to_representation(doc, fields)
+                    for doc in docs if str(doc['_id']) in task_ids
+                ],
             })
+        except DRFValidationError:
+            raise
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -491,6 +797,17 @@ class TaskViewSet(viewsets.ModelViewSet):
             
             status_data["status"] = "ok"
             status_data["mongodb_connected"] = True
+            status_data["analysis_queue"] = get_analysis_executor().stats()
+            status_data["analysis_cache"] = analysis_cache.stats()
+            status_data["broadcast"] = get_broadcast_dispatcher().stats()
+            status_data["recurrence_cache"] = recurrence_cache.stats()
+            status_data["task_list_cache"] = get_task_list_cache().stats()
+            status_data["websocket_admission"] = get_admission_control().stats()
+            # Per process: gunicorn workers x these pools
+            status_data["mongo_pool"] = {
+                'max_pool_size': settings.MONGODB_SETTINGS.get('maxPoolSize'),
+                'pools': pool_stats(),
+            }
             return Response(status_data)
         except Exception as e:
             import traceback
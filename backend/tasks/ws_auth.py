@@ -0,0 +1,244 @@
+"""
+WebSocket handshake authentication and admission control.
+
+JWTWebSocketMiddleware replaces channels' AuthMiddlewareStack, which reads
+the session and the User row on every connect. Clients connect with
+ws/tasks/?ticket=<ticket>, a short-lived ticket from POST
+/api/auth/ws-ticket/. Passing the access token itself (?token=) leaves it
+in proxy logs and is only accepted while WS_ALLOW_TOKEN_QUERY is on, for
+clients that predate tickets. Signature, expiry and token type are checked
+in memory, and scope['user'] becomes a simplejwt
+TokenUser built from the claims. The only lookup is the revocation check
+(users.authentication), which runs off the loop.
+
+Before any of that, AdmissionControl sheds load during reconnect storms:
+- a token bucket per client IP (see client_ip for proxies), checked
+  before the token is parsed, and one per user, checked after;
+- a cap on handshakes in flight (admitted but not yet accepted or closed);
+- a cap on open connections in the process.
+Rejected handshakes are closed before the consumer is created.
+
+Counters are plain attributes: the middleware only runs on the process's
+event loop.
+"""
+import logging
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from channels.db import database_sync_to_async
+from django.conf import settings
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken, Token
+
+from users.authentication import is_token_revoked, revocation_is_shared
+
+logger = logging.getLogger(__name__)
+
+# Close codes sent when a handshake is rejected (the client sees HTTP 403)
+CLOSE_UNAUTHORIZED = 4401
+CLOSE_RATE_LIMITED = 4429
+CLOSE_OVERLOADED = 1013  # try again later
+
+
+class WebSocketTicket(Token):
+    """Single-purpose token for opening a WebSocket; expires after WS_TICKET_LIFETIME seconds"""
+
+    token_type = 'ws_ticket'
+    lifetime = timedelta(seconds=getattr(settings, 'WS_TICKET_LIFETIME', 30))
+
+
+class TokenBucket:
+    """Per-key token buckets, bounded to the most recently used max_keys keys"""
+
+    def __init__(self, rate, burst, max_keys=100000):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()  # key -> (tokens, last refill)
+
+    def allow(self, key) -> bool:
+        if self.rate <= 0:
+            return True
+        now = time.monotonic()
+        tokens, updated = self._buckets.pop(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        self._buckets[key] = (tokens, now)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return allowed
+
+
+class AdmissionControl:
+    """Handshake and connection limits for one process"""
+
+    def __init__(self, max_connections, max_handshakes, ip_rate, ip_burst, user_rate, user_burst):
+        self.max_connections = max_connections
+        self.max_handshakes = max_handshakes
+        self.ip_buckets = TokenBucket(ip_rate, ip_burst)
+        self.user_buckets = TokenBucket(user_rate, user_burst)
+        self.connections = 0
+        self.handshakes = 0
+        self._counters = {
+            'admitted': 0,
+            'rejected_unauthorized': 0,
+            'rejected_rate_limited': 0,
+            'rejected_overloaded': 0,
+        }
+
+    def count(self, name):
+        self._counters[name] += 1
+
+    def overloaded(self) -> bool:
+        return (
+            (self.max_connections and self.connections >= self.max_connections)
+            or (self.max_handshakes and self.handshakes >= self.max_handshakes)
+        )
+
+    def stats(self) -> dict:
+        return {
+            'connections': self.connections,
+            'handshakes_in_flight': self.handshakes,
+            'max_connections': self.max_connections,
+            'max_handshakes': self.max_handshakes,
+            **self._counters,
+        }
+
+
+_admission = None
+
+
+def get_admission_control() -> AdmissionControl:
+    """Process-wide admission control configured from settings"""
+    global _admission
+    if _admission is None:
+        _admission = AdmissionControl(
+            max_connections=getattr(settings, 'WS_MAX_CONNECTIONS', 10000),
+            max_handshakes=getattr(settings, 'WS_MAX_PENDING_HANDSHAKES', 200),
+            ip_rate=getattr(settings, 'WS_CONNECT_RATE_PER_IP', 5),
+            ip_burst=getattr(settings, 'WS_CONNECT_BURST_PER_IP', 20),
+            user_rate=getattr(settings, 'WS_CONNECT_RATE_PER_USER', 1),
+            user_burst=getattr(settings, 'WS_CONNECT_BURST_PER_USER', 5),
+        )
+    return _admission
+
+
+def validate_credentials(query_string: bytes):
+    """
+    The verified token from ?ticket= (or ?token= with WS_ALLOW_TOKEN_QUERY),
+    or None. Only the signature, expiry and token type are checked; no I/O.
+    """
+    params = parse_qs(query_string.decode('latin-1'))
+    credentials = [('ticket', WebSocketTicket)]
+    if getattr(settings, 'WS_ALLOW_TOKEN_QUERY', False):
+        credentials.append(('token', AccessToken))
+    for name, token_class in credentials:
+        raw = params.get(name)
+        if not raw:
+            continue
+        try:
+            token = token_class(raw[0])
+        except TokenError:
+            return None
+        if api_settings.USER_ID_CLAIM not in token:
+            return None
+        return token
+    return None
+
+
+def client_ip(scope) -> str:
+    """
+    The handshake's client address. Behind a proxy, scope['client'] is the
+    proxy itself, so the address is read from WS_CLIENT_IP_HEADER instead:
+    each of the WS_TRUSTED_PROXY_COUNT proxies appends the address it saw,
+    and entries left of those are client-supplied.
+    """
+    header = getattr(settings, 'WS_CLIENT_IP_HEADER', '')
+    if header:
+        name = header.lower().encode('latin-1')
+        values = [value.decode('latin-1') for key, value in scope.get('headers', ()) if key == name]
+        hops = [hop.strip() for value in values for hop in value.split(',') if hop.strip()]
+        trusted = max(1, getattr(settings, 'WS_TRUSTED_PROXY_COUNT', 1))
+        if len(hops) >= trusted:
+            return hops[-trusted]
+    return (scope.get('client') or ('unknown',))[0]
+
+
+async def _reject(receive, send, code):
+    # Answer the connect event with a close, which denies the handshake
+    message = await receive()
+    if message['type'] == 'websocket.connect':
+        await send({'type': 'websocket.close', 'code': code})
+
+
+class JWTWebSocketMiddleware:
+    """Channels middleware authenticating WebSockets from JWT claims"""
+
+    def __init__(self, inner):
+        self.inner = inner
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'websocket':
+            return await self.inner(scope, receive, send)
+
+        admission = get_admission_control()
+        if admission.overloaded():
+            admission.count('rejected_overloaded')
+            return await _reject(receive, send, CLOSE_OVERLOADED)
+        if not admission.ip_buckets.allow(client_ip(scope)):
+            admission.count('rejected_rate_limited')
+            return await _reject(receive, send, CLOSE_RATE_LIMITED)
+
+        token = validate_credentials(scope.get('query_string', b''))
+        if token is None:
+            admission.count('rejected_unauthorized')
+            return await _reject(receive, send, CLOSE_UNAUTHORIZED)
+        user = TokenUser(token)
+        if not admission.user_buckets.allow(str(user.id)):
+            admission.count('rejected_rate_limited')
+            return await _reject(receive, send, CLOSE_RATE_LIMITED)
+
+        # The handshake slot is held until the consumer accepts or closes
+        admission.handshakes += 1
+        handshake_open = True
+
+        def end_handshake():
+            nonlocal handshake_open
+            if handshake_open:
+                handshake_open = False
+                admission.handshakes -= 1
+
+        async def tracked_send(message):
+            if message['type'] in ('websocket.accept', 'websocket.close'):
+                end_handshake()
+            await send(message)
+
+        admission.connections += 1
+        try:
+            try:
+                if revocation_is_shared():
+                    revoked = await sync_to_async(is_token_revoked, thread_sensitive=False)(token)
+                else:
+                    # Falls back to a user row lookup, which needs Django's connection handling
+                    revoked = await database_sync_to_async(is_token_revoked)(token)
+            except Exception as e:
+                # The signature is valid; an unreachable cache should not lock everyone out
+                logger.warning('WebSocket revocation check failed: %s', e)
+                revoked = False
+            if revoked:
+                admission.count('rejected_unauthorized')
+                return await _reject(receive, tracked_send, CLOSE_UNAUTHORIZED)
+
+            admission.count('admitted')
+            scope = dict(scope, user=user)
+            return await self.inner(scope, receive, tracked_send)
+        finally:
+            end_handshake()
+            admission.connections -= 1
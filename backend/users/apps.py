@@ -1,5 +1,20 @@
+import logging
+
 from django.apps import AppConfig
 
+logger = logging.getLogger(__name__)
+
 
 class UsersConfig(AppConfig):
     name = 'users'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .authentication import revocation_is_shared
+
+        if not revocation_is_shared():
+            logger.warning(
+                'AUTH_REVOCATION_CACHE_ALIAS is a per-process cache; revocations reach other '
+                'workers only through the user row, up to AUTH_ACTIVE_CACHE_TTL seconds late. '
+                'Set REDIS_URL to share them'
+            )
@@ -0,0 +1,142 @@
+"""
+Stateless JWT authentication.
+
+simplejwt's JWTAuthentication loads the User row from SQL on every request,
+though the task API only needs request.user.id. ClaimsJWTAuthentication
+builds a TokenUser from the verified token claims instead. Views that need
+the real user call full_user(), which is served from a small per-process
+TTL cache.
+
+Revocation: revoke_user_tokens() records a per-user cutoff in the Django
+cache (AUTH_REVOCATION_CACHE_ALIAS). Tokens issued before it are rejected.
+Deactivating a user revokes their tokens automatically. The cutoff only
+reaches every worker through a shared backend (REDIS_URL). When the alias
+is process-local (LocMemCache, DummyCache), the check falls back to the
+user row's is_active, cached per process for AUTH_ACTIVE_CACHE_TTL seconds,
+so another worker accepts a deactivated user for at most that long.
+"""
+import functools
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+
+
+def _revocation_cache():
+    from django.core.cache import caches
+
+    return caches[getattr(settings, 'AUTH_REVOCATION_CACHE_ALIAS', 'default')]
+
+
+def _revocation_key(user_id) -> str:
+    return f'auth:revoked-before:{user_id}'
+
+
+def revoke_user_tokens(user_id):
+    """Reject every token issued to the user until now"""
+    # Older tokens have expired once a refresh lifetime has passed
+    timeout = int(api_settings.REFRESH_TOKEN_LIFETIME.total_seconds())
+    _revocation_cache().set(_revocation_key(user_id), int(time.time()), timeout)
+    _user_cache.forget(user_id)
+    _active_cache.forget(user_id)
+
+
+@functools.cache
+def revocation_is_shared() -> bool:
+    """Whether revocation cutoffs written by one process are seen by the others"""
+    return not isinstance(_revocation_cache(), (LocMemCache, DummyCache))
+
+
+def _user_is_active(user_id) -> bool:
+    active = _active_cache.get(user_id)
+    if active is None:
+        user = get_user_model().objects.filter(**{api_settings.USER_ID_FIELD: user_id}).first()
+        active = user is not None and api_settings.USER_AUTHENTICATION_RULE(user)
+        _active_cache.set(user_id, active)
+    return active
+
+
+def is_token_revoked(validated_token) -> bool:
+    user_id = validated_token[api_settings.USER_ID_CLAIM]
+    cutoff = _revocation_cache().get(_revocation_key(user_id))
+    if cutoff is not None:
+        issued_at = validated_token.get('iat')
+        # Tokens without iat cannot prove they are newer than the cutoff
+        if issued_at is None or issued_at <= cutoff:
+            return True
+    if not revocation_is_shared():
+        # Cutoffs set by other workers never reach this one; check the row,
+        # at most once per AUTH_ACTIVE_CACHE_TTL
+        return not _user_is_active(user_id)
+    return False
+
+
+class ClaimsJWTAuthentication(JWTStatelessUserAuthentication):
+    """JWT authentication that trusts the signed claims and skips the SQL user lookup"""
+
+    def get_user(self, validated_token):
+        user = super().get_user(validated_token)
+        if is_token_revoked(validated_token):
+            raise AuthenticationFailed('Token has been revoked', code='token_revoked')
+        return user
+
+
+class _UserCache:
+    """Per-process TTL cache of User rows (or their active flags)"""
+
+    def __init__(self, ttl=60, max_entries=10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(str(user_id))
+        if entry is None or entry[1] < time.monotonic():
+            return None
+        return entry[0]
+
+    def set(self, user_id, user):
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._entries.clear()
+            self._entries[str(user_id)] = (user, time.monotonic() + self.ttl)
+
+    def forget(self, user_id):
+        with self._lock:
+            self._entries.pop(str(user_id), None)
+
+
+_user_cache = _UserCache(ttl=getattr(settings, 'AUTH_USER_CACHE_TTL', 60))
+_active_cache = _UserCache(ttl=getattr(settings, 'AUTH_ACTIVE_CACHE_TTL', 5))
+
+
+def full_user(user):
+    """
+    The User model instance for request.user, whether that is already a User
+    or a TokenUser from ClaimsJWTAuthentication. Raises AuthenticationFailed
+    if the user no longer exists or is inactive.
+    """
+    if isinstance(user, get_user_model()):
+        return user
+
+    cached = _user_cache.get(user.id)
+    if cached is not None:
+        return cached
+
+    User = get_user_model()
+    try:
+        instance = User.objects.get(**{api_settings.USER_ID_FIELD: user.id})
+    except User.DoesNotExist:
+        raise AuthenticationFailed('User not found', code='user_not_found')
+    if not api_settings.USER_AUTHENTICATION_RULE(instance):
+        raise AuthenticationFailed('User is inactive', code='user_inactive')
+    _user_cache.set(user.id, instance)
+    return instance
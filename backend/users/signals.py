@@ -0,0 +1,12 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .authentication import revoke_user_tokens
+
+
+@receiver(post_save, sender=get_user_model())
+def revoke_tokens_of_inactive_users(sender, instance, created, **kwargs):
+    """Stateless tokens outlive the user row check, so deactivation revokes them"""
+    if not created and not instance.is_active:
+        revoke_user_tokens(instance.pk)
@@ -4,6 +4,8 @@ from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth.models import User
+from tasks.ws_auth import WebSocketTicket
+from .authentication import full_user
 from .serializers import UserRegistrationSerializer, UserSerializer
 
 
@@ -60,5 +62,16 @@ def register(request):
 @permission_classes([IsAuthenticated])
 def profile(request):
     """Get current user profile"""
-    serializer = UserSerializer(request.user)
+    serializer = UserSerializer(full_user(request.user))
     return Response(serializer.data)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def ws_ticket(request):
+    """Issue a short-lived ticket for opening the task WebSocket"""
+    ticket = WebSocketTicket.for_user(request.user)
+    return Response({
+        'ticket': str(ticket),
+        'expires_in': int(WebSocketTicket.lifetime.total_seconds()),
+    })
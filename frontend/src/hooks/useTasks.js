@@ -77,9 +77,16 @@ export const useTasks = () => {
     },
   });
 
-  // Reanalyze task mutation
+  // Reanalyze task mutation - the API queues a job, so poll until it finishes
   const reanalyzeTask = useMutation({
-    mutationFn: (id) => tasksAPI.reanalyze(id),
+    mutationFn: async (id) => {
+      let { data: job } = await tasksAPI.reanalyze(id);
+      for (let attempt = 0; attempt < 30 && ['queued', 'running'].includes(job.status); attempt++) {
+        await new Promise((resolve) => setTimeout(resolve, 1000));
+        ({ data: job } = await tasksAPI.getAnalysisJob(job.job_id));
+      }
+      return job;
+    },
     onSuccess: () => {
       queryClient.invalidateQueries(['tasks']);
     },
@@ -68,12 +68,14 @@ export const authAPI = {
 
 // Tasks API
 export const tasksAPI = {
-  getAll: () => api.get('/tasks/'),
+  // The list endpoint is cursor-paginated by default; the dashboard wants every task
+  getAll: () => api.get('/tasks/', { params: { all: 'true' } }),
   getById: (id) => api.get(`/tasks/${id}/`),
   create: (data) => api.post('/tasks/', data),
   update: (id, data) => api.patch(`/tasks/${id}/`, data),
   delete: (id) => api.delete(`/tasks/${id}/`),
   reanalyze: (id) => api.post(`/tasks/${id}/reanalyze/`),
+  getAnalysisJob: (jobId) => api.get(`/tasks/jobs/${jobId}/`),
 };
 
 export default api;